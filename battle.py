@@ -0,0 +1,720 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+
+"""
+This Python module contains the headless battle engine of the Game.
+
+@contents :  This module contains the non-interactive simulation of a battle
+             between two coaches, the selection policies and the test cases
+             to probe its functionality.
+@project :  N/A
+@program :  N/A
+@file :  battle.py
+@author :  Antonio Artes Garcia (antonio.artesgarcia@ceu.es)
+           Francisco Hernando Gallego (francisco.hernandogallego@ceu.es)
+           Ruben Juarez Cadiz (ruben.juarezcadiz@ceu.es)
+
+@version :  0.0.1, 08 November 2021
+@information :  The Zen of Python
+                  https://www.python.org/dev/peps/pep-0020/
+                Style Guide for Python Code
+                  https://www.python.org/dev/peps/pep-0008/
+                Example NumPy Style Python Docstrings
+                  http://sphinxcontrib-napoleon.readthedocs.io/en/latest/example_numpy.html
+                doctest – Testing through documentation
+                  https://pymotw.com/2/doctest/
+
+@copyright :  Copyright 2021 GNU AFFERO GENERAL PUBLIC.
+              All rights are reserved. Reproduction in whole or in part is
+              prohibited without the written consent of the copyright owner.
+"""
+
+
+# Source packages.
+
+import collections
+import random
+from battle_events import BattleEvent, EventType, RingBufferSink
+from duel_solver import draws_uniforms, hit_damage, is_stalemate, solve_duel
+from pokemon import Pokemon
+from pokemon_air import PokemonAir
+from pokemon_electricity import PokemonElectricity
+from rng import get_uniform, reset_uniform, set_uniform
+from weapon_type import WeaponType
+
+
+# Result of a battle. The field winner is 1 or 2 for the coach that keeps
+# Pokemons alive and 0 for a draw, rounds counts every exchange of attacks,
+# duels holds one tuple (id_pokemon_1, id_pokemon_2, winner, rounds) per duel
+# and health_points_N holds the final health of each Pokemon of the team N.
+BattleResult = collections.namedtuple(
+    'BattleResult',
+    ['winner', 'rounds', 'duels', 'health_points_1', 'health_points_2'])
+
+
+def first_pokemon_policy(coach, list_of_pokemons, opponent):
+    """Selection policy that sends the first undefeated Pokemon of the list.
+
+    Syntax
+    ------
+       [ ] = first_pokemon_policy(coach, list_of_pokemons, opponent)
+
+    Parameters
+    ----------
+       [in] coach Number of the coach (1 or 2) that has to select.
+       [in] list_of_pokemons List of the undefeated Pokemons of the coach.
+       [in] opponent Pokemon of the other coach that is in the fight, or None
+                     if the other coach has not selected yet.
+
+    Returns
+    -------
+       Pokemon Pokemon selected for the next duel.
+
+    Example
+    -------
+       >>> first_pokemon_policy(1, list_of_pokemons, None)
+    """
+    return list_of_pokemons[0]
+
+
+def strongest_pokemon_policy(coach, list_of_pokemons, opponent):
+    """Selection policy that sends the Pokemon with the best attack rating.
+
+    Syntax
+    ------
+       [ ] = strongest_pokemon_policy(coach, list_of_pokemons, opponent)
+
+    Parameters
+    ----------
+       [in] coach Number of the coach (1 or 2) that has to select.
+       [in] list_of_pokemons List of the undefeated Pokemons of the coach.
+       [in] opponent Pokemon of the other coach that is in the fight, or None
+                     if the other coach has not selected yet.
+
+    Returns
+    -------
+       Pokemon Pokemon selected for the next duel.
+
+    Example
+    -------
+       >>> strongest_pokemon_policy(1, list_of_pokemons, None)
+    """
+    return max(list_of_pokemons, key=Pokemon.get_attack_rating)
+
+
+def random_pokemon_policy(coach, list_of_pokemons, opponent):
+    """Selection policy that sends a random undefeated Pokemon.
+
+    The random number is drawn from the source of rng.get_uniform(), so the
+    selections follow the source of the battle.
+
+    Syntax
+    ------
+       [ ] = random_pokemon_policy(coach, list_of_pokemons, opponent)
+
+    Parameters
+    ----------
+       [in] coach Number of the coach (1 or 2) that has to select.
+       [in] list_of_pokemons List of the undefeated Pokemons of the coach.
+       [in] opponent Pokemon of the other coach that is in the fight, or None
+                     if the other coach has not selected yet.
+
+    Returns
+    -------
+       Pokemon Pokemon selected for the next duel.
+
+    Example
+    -------
+       >>> random_pokemon_policy(1, list_of_pokemons, None)
+    """
+    return list_of_pokemons[int(get_uniform()() * len(list_of_pokemons))]
+
+
+def _play_round(sink, round_number, pokemon_coach_1, pokemon_coach_2):
+    """Function to play a round of a duel emitting its events to a sink."""
+    id_1 = pokemon_coach_1.get_id()
+    id_2 = pokemon_coach_2.get_id()
+    sink.emit(BattleEvent(EventType.ROUND_START, round_number, 0, id_1, id_2, 0))
+    value = pokemon_coach_1.fight_attack(pokemon_coach_2)
+    sink.emit(BattleEvent(EventType.ATTACK, round_number, 1, id_1, id_2, value))
+    sink.emit(BattleEvent(EventType.DEFENSE, round_number, 2, id_2, id_1,
+                          pokemon_coach_2.get_health_points()))
+    value = pokemon_coach_2.fight_attack(pokemon_coach_1)
+    sink.emit(BattleEvent(EventType.ATTACK, round_number, 2, id_2, id_1, value))
+    sink.emit(BattleEvent(EventType.DEFENSE, round_number, 1, id_1, id_2,
+                          pokemon_coach_1.get_health_points()))
+
+
+def simulate(team_1, team_2, policy_1=first_pokemon_policy, policy_2=None,
+             max_rounds=10000, restore=True, sink=None, rng=None):
+    """Function to simulate a complete battle without any input or output.
+
+    This function drives a battle between two coaches with the same rules as
+    the Game: each coach sends one Pokemon, both Pokemons attack each other
+    with fight_attack() once per round until one of them is defeated, and the
+    defeated Pokemon is replaced by the next selection of its coach. The
+    winner of a duel stays in the fight with its remaining health. If both
+    Pokemons are defeated in the same round the duel is a draw. The duels in
+    which no Pokemon draws random numbers are solved in closed form by
+    solve_duel(), so the random numbers drawn are the same as when the rounds
+    are played one by one, and the duels in which neither Pokemon can damage
+    the other are draws.
+
+    If a sink of battle_events is given, every selection, round, attack,
+    defense and defeat is emitted to it as a BattleEvent, and every duel is
+    played round by round. The sink is not flushed here.
+
+    If a source of random numbers is given in rng, the dodges, the double
+    hits and the random selections of the battle are drawn from it instead
+    of the module random, so the battle only depends on that source.
+
+    Syntax
+    ------
+       [ ] = simulate(team_1, team_2, policy_1, policy_2, max_rounds, restore,
+                      sink, rng)
+
+    Parameters
+    ----------
+       [in] team_1 List of the Pokemons of the coach 1.
+       [in] team_2 List of the Pokemons of the coach 2.
+       [in] policy_1 Selection policy of the coach 1. It is called as
+                     policy(coach, list_of_pokemons, opponent).
+       [in] policy_2 Selection policy of the coach 2. By default the same as
+                     the policy of the coach 1.
+       [in] max_rounds Maximum number of rounds of a single duel. A duel that
+                       reaches it is a draw and both Pokemons are withdrawn.
+       [in] restore If True, the health of every Pokemon is restored once the
+                    battle ends, so the same teams can be simulated again.
+       [in] sink Sink of the events of the battle, or None.
+       [in] rng Source of random numbers accepted by rng.as_uniform(), or
+                None for the source of the current context.
+
+    Returns
+    -------
+       BattleResult Result of the battle.
+
+    Example
+    -------
+       >>> result = simulate(coach_1, coach_2, strongest_pokemon_policy)
+    """
+    if policy_2 is None:
+        policy_2 = policy_1
+    verbose = sink is not None and sink.enabled
+    token = None if rng is None else set_uniform(rng)
+
+    initial_health_1 = [pokemon.get_health_points() for pokemon in team_1]
+    initial_health_2 = [pokemon.get_health_points() for pokemon in team_2]
+    try:
+        alive_1 = [pokemon for pokemon in team_1 if pokemon.is_alive()]
+        alive_2 = [pokemon for pokemon in team_2 if pokemon.is_alive()]
+        pokemon_coach_1 = None
+        pokemon_coach_2 = None
+        rounds = 0
+        duels = []
+
+        while alive_1 and alive_2:
+            if pokemon_coach_1 is None:
+                pokemon_coach_1 = policy_1(1, alive_1, pokemon_coach_2)
+                if verbose:
+                    sink.emit(BattleEvent(EventType.SWITCH, rounds, 1, pokemon_coach_1.get_id(),
+                                          0 if pokemon_coach_2 is None else pokemon_coach_2.get_id(), 0))
+            if pokemon_coach_2 is None:
+                pokemon_coach_2 = policy_2(2, alive_2, pokemon_coach_1)
+                if verbose:
+                    sink.emit(BattleEvent(EventType.SWITCH, rounds, 2, pokemon_coach_2.get_id(),
+                                          pokemon_coach_1.get_id(), 0))
+
+            duel_rounds = 0
+            if is_stalemate(pokemon_coach_1, pokemon_coach_2):
+                # Neither Pokemon can damage the other: the duel is a draw.
+                pass
+            elif not verbose and not draws_uniforms(pokemon_coach_1) and not draws_uniforms(pokemon_coach_2):
+                outcome = solve_duel(pokemon_coach_1, pokemon_coach_2)
+                if outcome.rounds <= max_rounds:
+                    duel_rounds = outcome.rounds
+                    pokemon_coach_1.set_health_points(outcome.health_1)
+                    pokemon_coach_2.set_health_points(outcome.health_2)
+                else:
+                    duel_rounds = max_rounds
+                    pokemon_coach_1.set_health_points(pokemon_coach_1.get_health_points()
+                                                      - max_rounds * hit_damage(pokemon_coach_2, pokemon_coach_1))
+                    pokemon_coach_2.set_health_points(pokemon_coach_2.get_health_points()
+                                                      - max_rounds * hit_damage(pokemon_coach_1, pokemon_coach_2))
+            else:
+                attack_1 = pokemon_coach_1.fight_attack
+                attack_2 = pokemon_coach_2.fight_attack
+                while pokemon_coach_1.is_alive() and pokemon_coach_2.is_alive():
+                    if duel_rounds == max_rounds:
+                        break
+                    if verbose:
+                        _play_round(sink, rounds + duel_rounds + 1, pokemon_coach_1, pokemon_coach_2)
+                    else:
+                        attack_1(pokemon_coach_2)
+                        attack_2(pokemon_coach_1)
+                    duel_rounds += 1
+            rounds += duel_rounds
+
+            defeated_1 = not pokemon_coach_1.is_alive()
+            defeated_2 = not pokemon_coach_2.is_alive()
+            if defeated_1 == defeated_2:
+                winner = 0
+            elif defeated_2:
+                winner = 1
+            else:
+                winner = 2
+            duels.append((pokemon_coach_1.get_id(), pokemon_coach_2.get_id(),
+                          winner, duel_rounds))
+            if verbose:
+                if defeated_1:
+                    sink.emit(BattleEvent(EventType.KO, rounds, 1, pokemon_coach_1.get_id(),
+                                          pokemon_coach_2.get_id(), pokemon_coach_1.get_health_points()))
+                if defeated_2:
+                    sink.emit(BattleEvent(EventType.KO, rounds, 2, pokemon_coach_2.get_id(),
+                                          pokemon_coach_1.get_id(), pokemon_coach_2.get_health_points()))
+
+            if winner != 1:
+                alive_1.remove(pokemon_coach_1)
+                pokemon_coach_1 = None
+            if winner != 2:
+                alive_2.remove(pokemon_coach_2)
+                pokemon_coach_2 = None
+
+        if alive_1:
+            winner = 1
+        elif alive_2:
+            winner = 2
+        else:
+            winner = 0
+        if verbose:
+            sink.emit(BattleEvent(EventType.BATTLE_END, rounds, winner, 0, 0, rounds))
+
+        return BattleResult(
+            winner, rounds, duels,
+            tuple(pokemon.get_health_points() for pokemon in team_1),
+            tuple(pokemon.get_health_points() for pokemon in team_2))
+    finally:
+        if token is not None:
+            reset_uniform(token)
+        if restore:
+            for pokemon, health_points in zip(team_1, initial_health_1):
+                pokemon.set_health_points(health_points)
+            for pokemon, health_points in zip(team_2, initial_health_2):
+                pokemon.set_health_points(health_points)
+
+
+
+# State of a Battle, as returned by Battle.snapshot(). The Pokemons are given
+# by their position in their team: fighters holds the position of the Pokemon
+# of each coach in the fight (-1 if it has not been selected yet), alive the
+# positions of the undefeated Pokemons of each coach and health_points the
+# health of every Pokemon of each team.
+BattleState = collections.namedtuple(
+    'BattleState',
+    ['rounds', 'duel_rounds', 'fighters', 'alive', 'health_points', 'duels', 'winner'])
+
+
+class Battle():
+    """Python class to implement a battle that is played step by step.
+
+    This Python class plays a battle with the same rules as simulate(), but
+    one selection or one round at a time, so the battle can be driven by
+    anything that decides the selections (a policy, a coach typing IDs, a
+    replay file or a message of a client) and can be saved and restored at
+    any point with snapshot() and restore(). Every duel is played round by
+    round, so the random numbers drawn are the same however the battle is
+    driven. The undefeated Pokemons of each coach are kept in a dictionary
+    in the order of the team, so checking a selection and removing a KO cost
+    O(1) however large the teams are. The list of get_alive() given to the
+    policies is built on each call, so it costs O(n) in the undefeated
+    Pokemons of the coach.
+
+    Syntax
+    ------
+      obj = Battle(team_1, team_2, max_rounds, sink, rng)
+
+    Parameters
+    ----------
+      [in] team_1 List of the Pokemons of the coach 1.
+      [in] team_2 List of the Pokemons of the coach 2.
+      [in] max_rounds Maximum number of rounds of a single duel, or None
+                      for no limit.
+      [in] sink Sink of the events of the battle, or None.
+      [in] rng Source of random numbers of the rounds, accepted by
+               rng.as_uniform(), or None for the source of the context.
+
+    Returns
+    -------
+      obj Python object output parameter that represents an instance
+          of the class Battle.
+
+    Attributes
+    ----------
+
+    Example
+    -------
+      >>> battle = Battle(coach_1, coach_2)
+      >>> result = battle.run(strongest_pokemon_policy)
+    """
+
+    def __init__(self, team_1, team_2, max_rounds=10000, sink=None, rng=None):
+        self.__teams = (None, list(team_1), list(team_2))
+        self.__positions = (None,
+                            {id(pokemon): position for position, pokemon in enumerate(team_1)},
+                            {id(pokemon): position for position, pokemon in enumerate(team_2)})
+        self.__max_rounds = max_rounds
+        self.__sink = sink if sink is not None and sink.enabled else None
+        self.__rng = rng
+        self.__alive = [None,
+                        {id(pokemon): pokemon for pokemon in team_1 if pokemon.is_alive()},
+                        {id(pokemon): pokemon for pokemon in team_2 if pokemon.is_alive()}]
+        self.__fighters = [None, None, None]
+        self.__rounds = 0
+        self.__duel_rounds = 0
+        self.__duels = []
+        self.__winner = None
+        self.__check_end()
+
+    def get_team(self, coach):
+        return self.__teams[coach]
+
+    def get_alive(self, coach):
+        """Method to obtain a new list of the undefeated Pokemons of a coach, in O(n)."""
+        return list(self.__alive[coach].values())
+
+    def get_alive_count(self, coach):
+        return len(self.__alive[coach])
+
+    def get_fighter(self, coach):
+        return self.__fighters[coach]
+
+    def get_rounds(self):
+        return self.__rounds
+
+    def get_duels(self):
+        return self.__duels
+
+    def get_winner(self):
+        return self.__winner
+
+    def is_over(self):
+        return self.__winner is not None
+
+    def needs_selection(self):
+        """Method to know which coach has to select a Pokemon, or 0 if none."""
+        if self.__winner is not None:
+            return 0
+        if self.__fighters[1] is None:
+            return 1
+        if self.__fighters[2] is None:
+            return 2
+        return 0
+
+    def select(self, coach, pokemon):
+        """Method to send the Pokemon selected by a coach to the fight."""
+        if coach != self.needs_selection():
+            raise ValueError('El entrenador ' + str(coach) + ' no tiene que seleccionar')
+        if self.__alive[coach].get(id(pokemon)) is not pokemon:
+            raise ValueError('El Pokemon ' + str(pokemon.get_id()) + ' no puede combatir')
+        self.__fighters[coach] = pokemon
+        opponent = self.__fighters[3 - coach]
+        if self.__sink is not None:
+            self.__sink.emit(BattleEvent(EventType.SWITCH, self.__rounds, coach, pokemon.get_id(),
+                                         0 if opponent is None else opponent.get_id(), 0))
+        if opponent is not None and is_stalemate(self.__fighters[1], self.__fighters[2]):
+            # Neither Pokemon can damage the other: the duel is a draw.
+            self.__end_duel()
+
+    def step(self):
+        """Method to play one round of the duel in course."""
+        if self.needs_selection() or self.__winner is not None:
+            raise ValueError('No hay ningún combate en curso')
+        pokemon_coach_1 = self.__fighters[1]
+        pokemon_coach_2 = self.__fighters[2]
+        self.__rounds += 1
+        self.__duel_rounds += 1
+        token = None if self.__rng is None else set_uniform(self.__rng)
+        try:
+            if self.__sink is not None:
+                _play_round(self.__sink, self.__rounds, pokemon_coach_1, pokemon_coach_2)
+            else:
+                pokemon_coach_1.fight_attack(pokemon_coach_2)
+                pokemon_coach_2.fight_attack(pokemon_coach_1)
+        finally:
+            if token is not None:
+                reset_uniform(token)
+        if (not pokemon_coach_1.is_alive() or not pokemon_coach_2.is_alive()
+                or self.__duel_rounds == self.__max_rounds):
+            self.__end_duel()
+
+    def run(self, policy_1=first_pokemon_policy, policy_2=None):
+        """Method to play the rest of the battle with two selection policies.
+
+        The policies draw their random numbers from the source of the battle.
+        """
+        policies = (None, policy_1, policy_1 if policy_2 is None else policy_2)
+        token = None if self.__rng is None else set_uniform(self.__rng)
+        try:
+            while self.__winner is None:
+                coach = self.needs_selection()
+                if coach:
+                    self.select(coach, policies[coach](coach, self.get_alive(coach), self.__fighters[3 - coach]))
+                else:
+                    self.step()
+        finally:
+            if token is not None:
+                reset_uniform(token)
+        return self.result()
+
+    def result(self):
+        """Method to obtain the BattleResult of the battle."""
+        return BattleResult(
+            0 if self.__winner is None else self.__winner, self.__rounds, list(self.__duels),
+            tuple(pokemon.get_health_points() for pokemon in self.__teams[1]),
+            tuple(pokemon.get_health_points() for pokemon in self.__teams[2]))
+
+    def snapshot(self):
+        """Method to obtain the BattleState of the battle."""
+        positions = self.__positions
+        return BattleState(
+            self.__rounds, self.__duel_rounds,
+            tuple(-1 if self.__fighters[coach] is None else positions[coach][id(self.__fighters[coach])]
+                  for coach in (1, 2)),
+            tuple(tuple(positions[coach][key] for key in self.__alive[coach])
+                  for coach in (1, 2)),
+            tuple(tuple(pokemon.get_health_points() for pokemon in self.__teams[coach])
+                  for coach in (1, 2)),
+            tuple(self.__duels), self.__winner)
+
+    def restore(self, state):
+        """Method to set the battle to a BattleState of snapshot()."""
+        for coach in (1, 2):
+            team = self.__teams[coach]
+            for pokemon, health_points in zip(team, state.health_points[coach - 1]):
+                pokemon.set_health_points(health_points)
+            self.__alive[coach] = {id(team[position]): team[position]
+                                   for position in state.alive[coach - 1]}
+            position = state.fighters[coach - 1]
+            self.__fighters[coach] = None if position < 0 else team[position]
+        self.__rounds = state.rounds
+        self.__duel_rounds = state.duel_rounds
+        self.__duels = list(state.duels)
+        self.__winner = state.winner
+
+    def __end_duel(self):
+        pokemon_coach_1 = self.__fighters[1]
+        pokemon_coach_2 = self.__fighters[2]
+        defeated_1 = not pokemon_coach_1.is_alive()
+        defeated_2 = not pokemon_coach_2.is_alive()
+        if defeated_1 == defeated_2:
+            winner = 0
+        elif defeated_2:
+            winner = 1
+        else:
+            winner = 2
+        self.__duels.append((pokemon_coach_1.get_id(), pokemon_coach_2.get_id(),
+                             winner, self.__duel_rounds))
+        if self.__sink is not None:
+            if defeated_1:
+                self.__sink.emit(BattleEvent(EventType.KO, self.__rounds, 1, pokemon_coach_1.get_id(),
+                                             pokemon_coach_2.get_id(), pokemon_coach_1.get_health_points()))
+            if defeated_2:
+                self.__sink.emit(BattleEvent(EventType.KO, self.__rounds, 2, pokemon_coach_2.get_id(),
+                                             pokemon_coach_1.get_id(), pokemon_coach_2.get_health_points()))
+        if winner != 1:
+            del self.__alive[1][id(pokemon_coach_1)]
+            self.__fighters[1] = None
+        if winner != 2:
+            del self.__alive[2][id(pokemon_coach_2)]
+            self.__fighters[2] = None
+        self.__duel_rounds = 0
+        self.__check_end()
+
+    def __check_end(self):
+        if self.__alive[1] and self.__alive[2]:
+            return
+        if self.__alive[1]:
+            self.__winner = 1
+        elif self.__alive[2]:
+            self.__winner = 2
+        else:
+            self.__winner = 0
+        if self.__sink is not None:
+            self.__sink.emit(BattleEvent(EventType.BATTLE_END, self.__rounds, self.__winner, 0, 0,
+                                         self.__rounds))
+
+
+
+def main():
+    """Function main of the module.
+
+    The function main of this module is used to test the battle engine that
+    is described in this module.
+
+    Syntax
+    ------
+      [ ] = main()
+
+    Parameters
+    ----------
+      Null .
+
+    Returns
+    -------
+      Null .
+
+    Example
+    -------
+      >>> main()
+    """
+
+    print("=================================================================.")
+    print("Test Case 1: Simulate a battle of a single duel.")
+    print("=================================================================.")
+    team_1 = [Pokemon(1, "Ivysaur", WeaponType.HEADBUTT, 20, 10, 5)]
+    team_2 = [Pokemon(2, "Charmander", WeaponType.KICK, 12, 8, 6)]
+
+    result = simulate(team_1, team_2)
+
+    if result.winner == 1 and result.rounds == 3:
+        print("Test PASS. The function simulate() has been implemented correctly.")
+    else:
+        print("Test FAIL. Check the function simulate()." + " RESULT: " + str(result))
+
+    if result.health_points_1 == (11,) and result.health_points_2 == (0,):
+        print("Test PASS. The final health of the battle is correct.")
+    else:
+        print("Test FAIL. Check the function simulate()." + " RESULT: " + str(result))
+
+
+    print("=================================================================.")
+    print("Test Case 2: The teams are restored after the battle.")
+    print("=================================================================.")
+    if team_1[0].get_health_points() == 20 and team_2[0].get_health_points() == 12:
+        print("Test PASS. The health of the Pokemons has been restored.")
+    else:
+        print("Test FAIL. Check the parameter restore of simulate().")
+
+
+    print("=================================================================.")
+    print("Test Case 3: The winner of a duel stays in the fight.")
+    print("=================================================================.")
+    team_2.append(Pokemon(3, "Squirtle", WeaponType.ELBOW, 8, 7, 6))
+
+    result = simulate(team_1, team_2)
+
+    if result.winner == 1 and [duel[2] for duel in result.duels] == [1, 1]:
+        print("Test PASS. The winner of each duel has been computed correctly.")
+    else:
+        print("Test FAIL. Check the function simulate()." + " RESULT: " + str(result))
+
+
+    print("=================================================================.")
+    print("Test Case 4: A duel without damage ends as a draw.")
+    print("=================================================================.")
+    team_3 = [Pokemon(4, "Wartortle", WeaponType.KICK, 50, 5, 10)]
+    team_4 = [Pokemon(5, "Charmeleon", WeaponType.PUNCH, 50, 5, 10)]
+
+    result = simulate(team_3, team_4)
+
+    if result.winner == 0 and result.rounds == 0:
+        print("Test PASS. The draw has been detected correctly.")
+    else:
+        print("Test FAIL. Check the function simulate()." + " RESULT: " + str(result))
+
+
+    print("=================================================================.")
+    print("Test Case 5: The events of the battle are emitted to the sink.")
+    print("=================================================================.")
+    sink = RingBufferSink()
+    quiet_result = simulate(team_1, team_2)
+    result = simulate(team_1, team_2, sink=sink)
+    events = sink.get_events()
+    kinds = [event.event_type for event in events]
+
+    if (result == quiet_result and kinds.count(EventType.ROUND_START) == result.rounds
+            and kinds.count(EventType.KO) == 2 and kinds.count(EventType.SWITCH) == 3
+            and events[-1] == BattleEvent(EventType.BATTLE_END, result.rounds, 1, 0, 0, result.rounds)):
+        print("Test PASS. The events of the battle have been emitted correctly.")
+    else:
+        print("Test FAIL. Check the parameter sink of simulate()." + " RESULT: " + str(kinds))
+
+
+
+    print("=================================================================.")
+    print("Test Case 6: A Battle played step by step matches simulate().")
+    print("=================================================================.")
+    expected = simulate(team_1, team_2)
+    battle = Battle(team_1, team_2)
+    result = battle.run()
+
+    if result == expected:
+        print("Test PASS. The class Battle has been implemented correctly.")
+    else:
+        print("Test FAIL. Check the class Battle()." + " RESULT: " + str(result))
+
+    team_1[0].set_health_points(20)
+    team_2[0].set_health_points(12)
+    team_2[1].set_health_points(8)
+    battle = Battle(team_1, team_2)
+    battle.select(1, team_1[0])
+    battle.select(2, team_2[0])
+    battle.step()
+    state = battle.snapshot()
+    battle.run()
+    battle.restore(state)
+
+    if battle.get_rounds() == 1 and team_2[0].get_health_points() == 8 and battle.run() == result:
+        print("Test PASS. The methods snapshot() and restore() have been implemented correctly.")
+    else:
+        print("Test FAIL. Check the methods snapshot() and restore().")
+
+
+    print("=================================================================.")
+    print("Test Case 7: A battle with its own source of random numbers.")
+    print("=================================================================.")
+    team_5 = [PokemonAir(6, "Pidgey", WeaponType.KICK, 90, 9, 5),
+              PokemonElectricity(7, "Pikachu", WeaponType.HEADBUTT, 80, 9, 6)]
+    team_6 = [PokemonAir(8, "Spearow", WeaponType.PUNCH, 85, 9, 5),
+              Pokemon(9, "Diglett", WeaponType.PUNCH, 90, 9, 7)]
+    state = random.getstate()
+    result = simulate(team_5, team_6, random_pokemon_policy, rng=random.Random(3))
+
+    battle_result = Battle(team_5, team_6, rng=random.Random(3)).run(random_pokemon_policy)
+    for pokemon, health_points in zip(team_5 + team_6, (90, 80, 85, 90)):
+        pokemon.set_health_points(health_points)
+
+    if (result == simulate(team_5, team_6, random_pokemon_policy, rng=random.Random(3))
+            and battle_result == Battle(team_5, team_6, rng=random.Random(3)).run(random_pokemon_policy)
+            and random.getstate() == state):
+        print("Test PASS. The parameter rng has been implemented correctly.")
+    else:
+        print("Test FAIL. Check the parameter rng of simulate()." + " RESULT: " + str(result))
+
+    team_7 = [PokemonElectricity(10, "Raichu", WeaponType.HEADBUTT, 90, 9, 6),
+              Pokemon(11, "Squirtle", WeaponType.ELBOW, 85, 8, 6),
+              PokemonAir(12, "Zubat", WeaponType.KICK, 80, 10, 5)]
+    team_8 = [Pokemon(13, "Diglett", WeaponType.PUNCH, 90, 9, 7),
+              PokemonElectricity(14, "Pikachu", WeaponType.HEADBUTT, 80, 9, 6),
+              Pokemon(15, "Venusaur", WeaponType.KICK, 95, 8, 6)]
+    checks = []
+    for seed in range(50):
+        quiet_result = simulate(team_7, team_8, random_pokemon_policy, rng=random.Random(seed))
+        result = simulate(team_7, team_8, random_pokemon_policy, sink=RingBufferSink(), rng=random.Random(seed))
+        battle_result = Battle(team_7, team_8, rng=random.Random(seed)).run(random_pokemon_policy)
+        for pokemon, health_points in zip(team_7 + team_8, (90, 85, 80, 90, 80, 95)):
+            pokemon.set_health_points(health_points)
+        checks.append(quiet_result == result == battle_result)
+
+    if all(checks):
+        print("Test PASS. The quiet and the verbose battles of a mixed team are the same.")
+    else:
+        print("Test FAIL. Check the closed form of simulate()." + " RESULT: " + str(checks.count(False)))
+
+
+# Checking whether this module is executed just itself alone.
+if __name__ == "__main__":
+    main()
+
+
+# EOF
@@ -0,0 +1,387 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+
+"""
+This Python module contains the events of a battle and the sinks of events.
+
+@contents :  This module contains the typed events that a battle emits, the
+             sinks that receive them (null, buffered text, JSON Lines and a
+             binary ring buffer), and the test cases to probe their
+             functionality.
+@project :  N/A
+@program :  N/A
+@file :  battle_events.py
+@author :  Antonio Artes Garcia (antonio.artesgarcia@ceu.es)
+           Francisco Hernando Gallego (francisco.hernandogallego@ceu.es)
+           Ruben Juarez Cadiz (ruben.juarezcadiz@ceu.es)
+
+@version :  0.0.1, 08 November 2021
+@information :  The Zen of Python
+                  https://www.python.org/dev/peps/pep-0020/
+                Style Guide for Python Code
+                  https://www.python.org/dev/peps/pep-0008/
+                Example NumPy Style Python Docstrings
+                  http://sphinxcontrib-napoleon.readthedocs.io/en/latest/example_numpy.html
+                doctest – Testing through documentation
+                  https://pymotw.com/2/doctest/
+
+@copyright :  Copyright 2021 GNU AFFERO GENERAL PUBLIC.
+              All rights are reserved. Reproduction in whole or in part is
+              prohibited without the written consent of the copyright owner.
+"""
+
+
+# Source packages.
+
+import collections
+import enum
+import io
+import json
+import struct
+
+
+class EventType(enum.IntEnum):
+    """Python class to implement an enumeration for the types of event.
+
+    This Python class implements an enumeration for the types of the events
+    that a battle emits.
+
+    Syntax
+    ------
+      obj = EventType.Enum
+
+    Parameters
+    ----------
+
+    Returns
+    -------
+      obj Python object output parameter that represents an instance
+          of the class EventType.
+
+    Attributes
+    ----------
+
+    Example
+    -------
+      >>> from battle_events import EventType
+      >>> obj_EventType = EventType.ATTACK
+    """
+    ROUND_START = 1
+    ATTACK = 2
+    DEFENSE = 3
+    KO = 4
+    SWITCH = 5
+    BATTLE_END = 6
+
+
+# Event of a battle. The meaning of the fields depends on the type:
+#   ROUND_START  coach 0, the Pokemons of the coaches 1 and 2.
+#   ATTACK       coach, attacker, defender, value returned by fight_attack().
+#   DEFENSE      coach, defender, attacker, health after the attack.
+#   KO           coach, defeated Pokemon, opponent, final health.
+#   SWITCH       coach, selected Pokemon, opponent (0 if none).
+#   BATTLE_END   winner (0 for a draw), 0, 0, number of rounds.
+BattleEvent = collections.namedtuple(
+    'BattleEvent', ['event_type', 'round', 'coach', 'id_pokemon', 'id_opponent', 'value'])
+
+
+def format_event(event, names=None):
+    """Function to render an event as a line of text.
+
+    Syntax
+    ------
+       [ ] = format_event(event, names)
+
+    Parameters
+    ----------
+       [in] event BattleEvent to render.
+       [in] names Optional dictionary with the name of each ID of Pokemon.
+
+    Returns
+    -------
+       str Line of text without the end of line.
+
+    Example
+    -------
+       >>> format_event(BattleEvent(EventType.ATTACK, 1, 1, 11, 24, 1))
+    """
+    def describe(id_pokemon):
+        if names is not None and id_pokemon in names:
+            return 'Pokemon ID ' + str(id_pokemon) + ' with name ' + names[id_pokemon]
+        return 'Pokemon ID ' + str(id_pokemon)
+
+    event_type = event.event_type
+    if event_type == EventType.ROUND_START:
+        return ('Round ' + str(event.round) + ': ' + describe(event.id_pokemon)
+                + ' fights ' + describe(event.id_opponent) + '.')
+    if event_type == EventType.ATTACK:
+        return (describe(event.id_pokemon) + ' attacks ' + describe(event.id_opponent)
+                + ' with ' + str(event.value) + ' damage.')
+    if event_type == EventType.DEFENSE:
+        return (describe(event.id_pokemon) + ' defends from ' + describe(event.id_opponent)
+                + ' and has health ' + str(event.value) + '.')
+    if event_type == EventType.KO:
+        return (describe(event.id_pokemon) + ' of Coach ' + str(event.coach)
+                + ' has been defeated by ' + describe(event.id_opponent) + '.')
+    if event_type == EventType.SWITCH:
+        return 'Coach ' + str(event.coach) + ' has selected ' + describe(event.id_pokemon) + '.'
+    if event.coach == 0:
+        return 'The battle ends in a draw after ' + str(event.value) + ' rounds.'
+    return 'Coach ' + str(event.coach) + ' wins the battle after ' + str(event.value) + ' rounds.'
+
+
+class NullSink():
+    """Python class to implement a sink that discards every event.
+
+    The attribute enabled is False, so a battle with this sink does not even
+    build the events.
+
+    Syntax
+    ------
+      obj = NullSink()
+
+    Example
+    -------
+      >>> sink = NullSink()
+    """
+    enabled = False
+
+    def emit(self, event):
+        pass
+
+    def flush(self):
+        pass
+
+    def close(self):
+        pass
+
+
+class BufferedTextSink():
+    """Python class to implement a sink that writes the events as text.
+
+    The events are kept as tuples and rendered with format_event() only when
+    the buffer is flushed, and every flush writes all the lines at once.
+
+    Syntax
+    ------
+      obj = BufferedTextSink(stream, buffer_size, names)
+
+    Parameters
+    ----------
+      [in] stream Text stream where the lines are written.
+      [in] buffer_size Number of events kept before writing them.
+      [in] names Optional dictionary with the name of each ID of Pokemon.
+
+    Example
+    -------
+      >>> sink = BufferedTextSink(sys.stdout)
+    """
+    enabled = True
+
+    def __init__(self, stream, buffer_size=1024, names=None):
+        self.__stream = stream
+        self.__buffer_size = buffer_size
+        self.__names = names
+        self.__buffer = []
+
+    def emit(self, event):
+        self.__buffer.append(event)
+        if len(self.__buffer) >= self.__buffer_size:
+            self.flush()
+
+    def flush(self):
+        if self.__buffer:
+            names = self.__names
+            self.__stream.write(''.join(format_event(event, names) + '\n' for event in self.__buffer))
+            self.__buffer = []
+        self.__stream.flush()
+
+    def close(self):
+        self.flush()
+
+
+class JsonLinesSink():
+    """Python class to implement a sink that writes the events as JSON Lines.
+
+    Syntax
+    ------
+      obj = JsonLinesSink(stream, buffer_size)
+
+    Parameters
+    ----------
+      [in] stream Text stream where the lines are written.
+      [in] buffer_size Number of events kept before writing them.
+
+    Example
+    -------
+      >>> sink = JsonLinesSink(open("battle.jsonl", "w"))
+    """
+    enabled = True
+
+    def __init__(self, stream, buffer_size=1024):
+        self.__stream = stream
+        self.__buffer_size = buffer_size
+        self.__buffer = []
+
+    def emit(self, event):
+        self.__buffer.append(event)
+        if len(self.__buffer) >= self.__buffer_size:
+            self.flush()
+
+    def flush(self):
+        if self.__buffer:
+            self.__stream.write(''.join(
+                json.dumps({'type': event.event_type.name, 'round': event.round,
+                            'coach': event.coach, 'pokemon': event.id_pokemon,
+                            'opponent': event.id_opponent, 'value': event.value}) + '\n'
+                for event in self.__buffer))
+            self.__buffer = []
+        self.__stream.flush()
+
+    def close(self):
+        self.flush()
+
+
+class RingBufferSink():
+    """Python class to implement a sink that keeps the last events in memory.
+
+    The events are packed as fixed-size binary records in a bytearray used
+    as a ring, so only the last capacity events are kept and no memory is
+    allocated while the battle runs.
+
+    Syntax
+    ------
+      obj = RingBufferSink(capacity)
+
+    Parameters
+    ----------
+      [in] capacity Number of events kept.
+
+    Example
+    -------
+      >>> sink = RingBufferSink(4096)
+    """
+    enabled = True
+    RECORD = struct.Struct('<BIBqqq')
+
+    def __init__(self, capacity=4096):
+        self.__capacity = capacity
+        self.__buffer = bytearray(capacity * self.RECORD.size)
+        self.__next = 0
+        self.__count = 0
+
+    def __len__(self):
+        return self.__count
+
+    def emit(self, event):
+        self.RECORD.pack_into(self.__buffer, self.__next * self.RECORD.size, *event)
+        self.__next = (self.__next + 1) % self.__capacity
+        if self.__count < self.__capacity:
+            self.__count += 1
+
+    def flush(self):
+        pass
+
+    def close(self):
+        pass
+
+    def get_events(self):
+        """Method to obtain the events kept, from the oldest to the newest."""
+        first = (self.__next - self.__count) % self.__capacity
+        events = []
+        for position in range(self.__count):
+            fields = self.RECORD.unpack_from(
+                self.__buffer, ((first + position) % self.__capacity) * self.RECORD.size)
+            events.append(BattleEvent(EventType(fields[0]), *fields[1:]))
+        return events
+
+
+
+def main():
+    """Function main of the module.
+
+    The function main of this module is used to test the sinks that are
+    described in this module.
+
+    Syntax
+    ------
+      [ ] = main()
+
+    Parameters
+    ----------
+      Null .
+
+    Returns
+    -------
+      Null .
+
+    Example
+    -------
+      >>> main()
+    """
+
+    events = [BattleEvent(EventType.SWITCH, 0, 1, 11, 0, 0),
+              BattleEvent(EventType.ATTACK, 1, 1, 11, 24, 1),
+              BattleEvent(EventType.DEFENSE, 1, 2, 24, 11, 81),
+              BattleEvent(EventType.BATTLE_END, 1, 1, 0, 0, 1)]
+
+    print("=================================================================.")
+    print("Test Case 1: The text sink renders the events when it flushes.")
+    print("=================================================================.")
+    stream = io.StringIO()
+    sink = BufferedTextSink(stream, buffer_size=10, names={11: "Pikachu"})
+    for event in events:
+        sink.emit(event)
+
+    if stream.getvalue() == "":
+        print("Test PASS. The events are kept in the buffer.")
+    else:
+        print("Test FAIL. Check the method emit().")
+
+    sink.close()
+    lines = stream.getvalue().splitlines()
+
+    if len(lines) == 4 and lines[1] == "Pokemon ID 11 with name Pikachu attacks Pokemon ID 24 with 1 damage.":
+        print("Test PASS. The events have been rendered correctly.")
+    else:
+        print("Test FAIL. Check the function format_event()." + " RESULT: " + str(lines))
+
+
+    print("=================================================================.")
+    print("Test Case 2: The JSON Lines sink writes one object per event.")
+    print("=================================================================.")
+    stream = io.StringIO()
+    sink = JsonLinesSink(stream)
+    for event in events:
+        sink.emit(event)
+    sink.close()
+    objects = [json.loads(line) for line in stream.getvalue().splitlines()]
+
+    if len(objects) == 4 and objects[2] == {'type': 'DEFENSE', 'round': 1, 'coach': 2,
+                                            'pokemon': 24, 'opponent': 11, 'value': 81}:
+        print("Test PASS. The class JsonLinesSink has been implemented correctly.")
+    else:
+        print("Test FAIL. Check the class JsonLinesSink()." + " RESULT: " + str(objects))
+
+
+    print("=================================================================.")
+    print("Test Case 3: The ring buffer keeps the last events.")
+    print("=================================================================.")
+    sink = RingBufferSink(capacity=3)
+    for event in events:
+        sink.emit(event)
+
+    if len(sink) == 3 and sink.get_events() == events[1:]:
+        print("Test PASS. The class RingBufferSink has been implemented correctly.")
+    else:
+        print("Test FAIL. Check the class RingBufferSink()." + " RESULT: " + str(sink.get_events()))
+
+
+
+# Checking whether this module is executed just itself alone.
+if __name__ == "__main__":
+    main()
+
+
+# EOF
@@ -0,0 +1,240 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+
+"""
+This Python module contains the vectorized Monte Carlo kernel of the duels.
+
+@contents :  This module contains the simulation of many replays of a duel at
+             once on NumPy arrays, and the test cases to probe its
+             functionality.
+@project :  N/A
+@program :  N/A
+@file :  battle_kernel.py
+@author :  Antonio Artes Garcia (antonio.artesgarcia@ceu.es)
+           Francisco Hernando Gallego (francisco.hernandogallego@ceu.es)
+           Ruben Juarez Cadiz (ruben.juarezcadiz@ceu.es)
+
+@version :  0.0.1, 08 November 2021
+@information :  The Zen of Python
+                  https://www.python.org/dev/peps/pep-0020/
+                Style Guide for Python Code
+                  https://www.python.org/dev/peps/pep-0008/
+                Example NumPy Style Python Docstrings
+                  http://sphinxcontrib-napoleon.readthedocs.io/en/latest/example_numpy.html
+                doctest – Testing through documentation
+                  https://pymotw.com/2/doctest/
+
+@copyright :  Copyright 2021 GNU AFFERO GENERAL PUBLIC.
+              All rights are reserved. Reproduction in whole or in part is
+              prohibited without the written consent of the copyright owner.
+"""
+
+
+# Source packages.
+
+import collections
+import time
+import numpy as np
+import battle
+from damage import hit_damage
+from pokemon import Pokemon
+from pokemon_air import PokemonAir
+from weapon_type import WeaponType
+
+
+# Estimate of a duel. The fields win_1, win_2 and draw are the fractions of
+# the replays won by each Pokemon or drawn, and rounds is the mean number of
+# rounds of a replay.
+DuelEstimate = collections.namedtuple('DuelEstimate', ['win_1', 'win_2', 'draw', 'rounds'])
+
+
+def simulate_duels(health_1, attack_1, defense_1, air_1,
+                   health_2, attack_2, defense_2, air_2,
+                   replays=None, generator=None, max_rounds=10000):
+    """Function to simulate many replays of a duel at once.
+
+    Every replay follows the rules of fight_attack() and fight_defense(): in
+    each round the Pokemon 1 attacks the Pokemon 2 and then the Pokemon 2
+    attacks the Pokemon 1, the damage of a hit is attack - defense when it is
+    positive, and a PokemonAir dodges each hit with probability 0.5. The
+    double hit of PokemonElectricity only doubles the value returned by
+    fight_attack() and not the damage, so it needs no flag here. All the
+    replays that are still fighting are stepped together with one batch of
+    random draws per round.
+
+    Syntax
+    ------
+       [ ] = simulate_duels(health_1, attack_1, defense_1, air_1,
+                            health_2, attack_2, defense_2, air_2,
+                            replays, generator, max_rounds)
+
+    Parameters
+    ----------
+       [in] health_N Health points of the Pokemon N (scalar or array).
+       [in] attack_N Attack rating of the Pokemon N (scalar or array).
+       [in] defense_N Defense rating of the Pokemon N (scalar or array).
+       [in] air_N True if the Pokemon N is a PokemonAir (scalar or array).
+       [in] replays Number of replays. By default the size of the arrays.
+       [in] generator numpy.random.Generator used for the draws.
+       [in] max_rounds Maximum number of rounds. A replay that reaches it is
+                       a draw.
+
+    Returns
+    -------
+       Tuple (winner, rounds, health_1, health_2) of arrays with the winner
+       of each replay (1, 2 or 0 for a draw), its number of rounds and the
+       final health of both Pokemons.
+
+    Example
+    -------
+       >>> winner, rounds, health_1, health_2 = simulate_duels(
+       ...     100, 8, 7, True, 100, 9, 6, False, replays=100000)
+    """
+    if generator is None:
+        generator = np.random.default_rng()
+
+    arrays = np.broadcast_arrays(health_1, attack_1, defense_1, air_1,
+                                 health_2, attack_2, defense_2, air_2)
+    if replays is None:
+        replays = arrays[0].size
+    shape = (replays,)
+
+    hp_1 = np.array(np.broadcast_to(arrays[0], shape), dtype=np.int64)
+    hp_2 = np.array(np.broadcast_to(arrays[4], shape), dtype=np.int64)
+    damage_1 = np.maximum(0, np.broadcast_to(arrays[1], shape) - np.broadcast_to(arrays[6], shape)).astype(np.int64)
+    damage_2 = np.maximum(0, np.broadcast_to(arrays[5], shape) - np.broadcast_to(arrays[2], shape)).astype(np.int64)
+    dodge_1 = np.where(np.broadcast_to(arrays[3], shape), PokemonAir.dodge_probability, 0.0)
+    dodge_2 = np.where(np.broadcast_to(arrays[7], shape), PokemonAir.dodge_probability, 0.0)
+    rounds = np.zeros(shape, dtype=np.int64)
+
+    # Replays without damage on both sides never end, so they are not stepped.
+    index = np.nonzero((hp_1 > 0) & (hp_2 > 0) & ((damage_1 > 0) | (damage_2 > 0)))[0]
+    step = 0
+    while index.size and step < max_rounds:
+        draws = generator.random((2, index.size))
+        hp_2[index] -= damage_1[index] * (draws[0] >= dodge_2[index])
+        hp_1[index] -= damage_2[index] * (draws[1] >= dodge_1[index])
+        rounds[index] += 1
+        step += 1
+        index = index[(hp_1[index] > 0) & (hp_2[index] > 0)]
+
+    defeated_1 = hp_1 <= 0
+    defeated_2 = hp_2 <= 0
+    winner = np.zeros(shape, dtype=np.int8)
+    winner[defeated_2 & ~defeated_1] = 1
+    winner[defeated_1 & ~defeated_2] = 2
+    return winner, rounds, hp_1, hp_2
+
+
+def estimate_duel(pokemon_1, pokemon_2, replays=100000, seed=None, max_rounds=10000):
+    """Function to estimate the result of a duel between two Pokemons.
+
+    Syntax
+    ------
+       [ ] = estimate_duel(pokemon_1, pokemon_2, replays, seed, max_rounds)
+
+    Parameters
+    ----------
+       [in] pokemon_1 Pokemon of the coach 1.
+       [in] pokemon_2 Pokemon of the coach 2.
+       [in] replays Number of replays of the duel.
+       [in] seed Seed of the generator of the draws.
+       [in] max_rounds Maximum number of rounds of a replay.
+
+    Returns
+    -------
+       DuelEstimate Estimate of the duel.
+
+    Example
+    -------
+       >>> estimate = estimate_duel(pokemon_1, pokemon_2, 100000)
+    """
+    # The damages of the current model are passed as attacks against no
+    # defense, so the weapons and types count as in fight_attack().
+    winner, rounds, _, _ = simulate_duels(
+        pokemon_1.get_health_points(), hit_damage(pokemon_1, pokemon_2),
+        0, isinstance(pokemon_1, PokemonAir),
+        pokemon_2.get_health_points(), hit_damage(pokemon_2, pokemon_1),
+        0, isinstance(pokemon_2, PokemonAir),
+        replays=replays, generator=np.random.default_rng(seed),
+        max_rounds=max_rounds)
+    counts = np.bincount(winner, minlength=3) / replays
+    return DuelEstimate(float(counts[1]), float(counts[2]), float(counts[0]),
+                        float(rounds.mean()))
+
+
+
+def main():
+    """Function main of the module.
+
+    The function main of this module is used to test the kernel that is
+    described in this module.
+
+    Syntax
+    ------
+      [ ] = main()
+
+    Parameters
+    ----------
+      Null .
+
+    Returns
+    -------
+      Null .
+
+    Example
+    -------
+      >>> main()
+    """
+
+    print("=================================================================.")
+    print("Test Case 1: A deterministic duel gives always the same result.")
+    print("=================================================================.")
+    winner, rounds, health_1, health_2 = simulate_duels(20, 10, 5, False, 12, 8, 6, False, replays=10)
+
+    if (winner == 1).all() and (rounds == 3).all() and (health_1 == 11).all():
+        print("Test PASS. The function simulate_duels() has been implemented correctly.")
+    else:
+        print("Test FAIL. Check the function simulate_duels().")
+
+
+    print("=================================================================.")
+    print("Test Case 2: The kernel matches the rules of the Pokemons.")
+    print("=================================================================.")
+    pokemon_3 = PokemonAir(3, "Pidgey", WeaponType.KICK, 30, 8, 7)
+    pokemon_4 = Pokemon(4, "Squirtle", WeaponType.ELBOW, 30, 9, 6)
+
+    estimate = estimate_duel(pokemon_3, pokemon_4, 100000, seed=2021)
+    wins = 0
+    for _ in range(2000):
+        if battle.simulate([pokemon_3], [pokemon_4]).winner == 1:
+            wins += 1
+
+    if abs(estimate.win_1 - wins / 2000) < 0.05:
+        print("Test PASS. The estimate matches the simulation of the objects.")
+    else:
+        print("Test FAIL. Check the function simulate_duels()." + " RESULT: "
+              + str(estimate) + " " + str(wins / 2000))
+
+
+    print("=================================================================.")
+    print("Test Case 3: An estimate of 100000 replays is fast.")
+    print("=================================================================.")
+    start = time.perf_counter()
+    estimate_duel(pokemon_3, pokemon_4, 100000)
+    elapsed = time.perf_counter() - start
+
+    if elapsed < 1.0:
+        print("Test PASS. The estimate took " + str(round(elapsed, 3)) + " seconds.")
+    else:
+        print("Test FAIL. The estimate took " + str(round(elapsed, 3)) + " seconds.")
+
+
+
+# Checking whether this module is executed just itself alone.
+if __name__ == "__main__":
+    main()
+
+
+# EOF
@@ -0,0 +1,521 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+
+"""
+This Python module contains the server of battles of the Game.
+
+@contents :  This module contains an asyncio server that hosts many battles
+             at once over TCP or Unix sockets with a protocol of JSON lines,
+             a client and a load generator to test it, and the test cases to
+             probe its functionality.
+@project :  N/A
+@program :  N/A
+@file :  battle_server.py
+@author :  Antonio Artes Garcia (antonio.artesgarcia@ceu.es)
+           Francisco Hernando Gallego (francisco.hernandogallego@ceu.es)
+           Ruben Juarez Cadiz (ruben.juarezcadiz@ceu.es)
+
+@version :  0.0.1, 08 November 2021
+@information :  The Zen of Python
+                  https://www.python.org/dev/peps/pep-0020/
+                Style Guide for Python Code
+                  https://www.python.org/dev/peps/pep-0008/
+                Example NumPy Style Python Docstrings
+                  http://sphinxcontrib-napoleon.readthedocs.io/en/latest/example_numpy.html
+                doctest – Testing through documentation
+                  https://pymotw.com/2/doctest/
+
+@copyright :  Copyright 2021 GNU AFFERO GENERAL PUBLIC.
+              All rights are reserved. Reproduction in whole or in part is
+              prohibited without the written consent of the copyright owner.
+"""
+
+
+# Source packages.
+
+import asyncio
+import csv
+import json
+import os
+import random
+import tempfile
+import time
+from battle import Battle, first_pokemon_policy
+from id_registry import IdRegistry
+from roster_loader import parse_row
+
+
+# Protocol. Every message is a JSON object in a line.
+#   Coach -> server:
+#     {"type": "join", "match": name, "roster": [row, ...], "seed": int}
+#         Each row holds the fields of a row of the CSV file of a coach. The
+#         first coach that joins a match is the coach 1 and its seed is the
+#         seed of the battle.
+#     {"type": "select", "id": id_pokemon}
+#   Server -> coach:
+#     {"type": "joined", "coach": 1 or 2}
+#     {"type": "select", "alive": [pokemon, ...], "opponent": pokemon or null}
+#         Each pokemon is {"id": ..., "name": ..., "health": ...}.
+#     {"type": "duel", "pokemon_1": id, "pokemon_2": id, "winner": 0, 1 or 2,
+#      "rounds": int}
+#     {"type": "end", "winner": 0, 1 or 2, "rounds": int, "reason": str}
+#     {"type": "error", "message": str}
+
+
+def _describe(pokemon):
+    return {'id': pokemon.get_id(), 'name': pokemon.get_pokemon_name(),
+            'health': pokemon.get_health_points()}
+
+
+class _Forfeit(Exception):
+    """Exception raised when a coach does not answer or leaves the match."""
+
+    def __init__(self, coach, reason):
+        super().__init__(reason)
+        self.coach = coach
+        self.reason = reason
+
+
+class _Coach():
+    """Connection and roster of a coach in a match."""
+
+    def __init__(self, reader, writer, team):
+        self.reader = reader
+        self.writer = writer
+        self.team = team
+
+    async def send(self, message):
+        # drain() waits while the buffer of the socket is full, so a slow
+        # client slows down its own match and not the server.
+        self.writer.write(json.dumps(message).encode('utf-8') + b'\n')
+        await self.writer.drain()
+
+
+class _Match():
+    """Match between two coaches, created when the first one joins."""
+
+    def __init__(self, seed):
+        self.seed = seed
+        self.coaches = [None, None, None]
+        self.joined = asyncio.Event()
+        self.finished = asyncio.Event()
+
+
+class BattleServer():
+    """Python class to implement a server of battles.
+
+    This Python class hosts battles between coaches connected through
+    sockets. Each coach sends its roster when it joins a match, the server
+    asks each coach for a selection whenever battle.Battle needs one, plays
+    the rounds of the duels with the rules of the Pokemons, and reports each
+    duel and the end of the battle to both coaches. A coach that does not
+    select in selection_timeout seconds or leaves the match loses it, a coach
+    1 whose opponent does not join in join_timeout seconds gets an error,
+    and a match that lasts more than match_timeout seconds ends in a draw.
+    At most max_matches matches are played at once: a match takes its slot
+    when its coach 2 joins, so the coaches 1 that wait for an opponent do
+    not hold one, and the next matches wait for a free slot before their
+    first round. Long duels are played in slices of
+    rounds_per_slice rounds, so no match blocks the others.
+
+    Syntax
+    ------
+      obj = BattleServer(selection_timeout, match_timeout, max_matches,
+                         max_rounds, rounds_per_slice, join_timeout)
+
+    Parameters
+    ----------
+      [in] selection_timeout Seconds that a coach has to select a Pokemon.
+      [in] match_timeout Seconds that a match can last.
+      [in] max_matches Maximum number of matches played at once.
+      [in] max_rounds Maximum number of rounds of a single duel.
+      [in] rounds_per_slice Rounds played before yielding to other matches.
+      [in] join_timeout Seconds that the coach 1 waits for the coach 2.
+
+    Returns
+    -------
+      obj Python object output parameter that represents an instance
+          of the class BattleServer.
+
+    Attributes
+    ----------
+
+    Example
+    -------
+      >>> server = BattleServer()
+      >>> asyncio_server = await server.start_unix("/tmp/battles.sock")
+    """
+
+    def __init__(self, selection_timeout=30.0, match_timeout=600.0, max_matches=10000,
+                 max_rounds=10000, rounds_per_slice=1000, join_timeout=60.0):
+        self.__selection_timeout = selection_timeout
+        self.__join_timeout = join_timeout
+        self.__match_timeout = match_timeout
+        self.__max_rounds = max_rounds
+        self.__rounds_per_slice = rounds_per_slice
+        self.__slots = asyncio.Semaphore(max_matches)
+        self.__waiting = {}
+        self.__played = 0
+
+    def get_played(self):
+        return self.__played
+
+    async def start_tcp(self, host='127.0.0.1', port=0):
+        return await asyncio.start_server(self.handle_connection, host, port)
+
+    async def start_unix(self, path):
+        return await asyncio.start_unix_server(self.handle_connection, path)
+
+    async def handle_connection(self, reader, writer):
+        """Method to serve a coach from its join to the end of its match."""
+        try:
+            await self.__serve(reader, writer)
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def __serve(self, reader, writer):
+        try:
+            line = await asyncio.wait_for(reader.readline(), self.__selection_timeout)
+            message = json.loads(line)
+            if message.get('type') != 'join':
+                raise ValueError('Se esperaba un mensaje join')
+            registry = IdRegistry()
+            team = [parse_row([str(field) for field in row]) for row in message['roster']]
+            team = [row.pokemon_class(*row[:6], registry=registry) for row in team]
+            if not team:
+                raise ValueError('El roster está vacío')
+        except asyncio.TimeoutError:
+            return
+        except (ValueError, KeyError, TypeError) as error:
+            writer.write(json.dumps({'type': 'error', 'message': str(error)}).encode('utf-8') + b'\n')
+            await writer.drain()
+            return
+
+        coach = _Coach(reader, writer, team)
+        name = message.get('match')
+        match = self.__waiting.pop(name, None)
+        if match is None:
+            match = _Match(message.get('seed'))
+            match.coaches[1] = coach
+            self.__waiting[name] = match
+            await coach.send({'type': 'joined', 'coach': 1})
+            try:
+                await asyncio.wait_for(match.joined.wait(), self.__join_timeout)
+            except asyncio.TimeoutError:
+                if self.__waiting.get(name) is match:
+                    del self.__waiting[name]
+                    await coach.send({'type': 'error', 'message': 'No opponent joined the match.'})
+                    return
+            finally:
+                if self.__waiting.get(name) is match:
+                    del self.__waiting[name]
+            await match.finished.wait()
+            return
+
+        match.coaches[2] = coach
+        match.joined.set()
+        await coach.send({'type': 'joined', 'coach': 2})
+        try:
+            async with self.__slots:
+                await self.__play(match)
+        finally:
+            match.finished.set()
+
+    async def __play(self, match):
+        coaches = match.coaches
+        battle = Battle(coaches[1].team, coaches[2].team, self.__max_rounds,
+                        rng=random.Random(match.seed))
+        reason = 'defeat'
+        winner = None
+        try:
+            await asyncio.wait_for(self.__drive(match, battle), self.__match_timeout)
+            winner = battle.get_winner()
+        except _Forfeit as forfeit:
+            winner = 3 - forfeit.coach
+            reason = forfeit.reason
+        except asyncio.TimeoutError:
+            winner = 0
+            reason = 'match_timeout'
+        self.__played += 1
+        end = {'type': 'end', 'winner': winner, 'rounds': battle.get_rounds(), 'reason': reason}
+        for coach in (1, 2):
+            try:
+                await coaches[coach].send(end)
+            except ConnectionError:
+                pass
+
+    async def __drive(self, match, battle):
+        coaches = match.coaches
+        duels = 0
+        while not battle.is_over():
+            coach = battle.needs_selection()
+            if coach:
+                battle.select(coach, await self.__ask(coaches[coach], coach, battle))
+                continue
+            for _ in range(self.__rounds_per_slice):
+                battle.step()
+                if battle.needs_selection() or battle.is_over():
+                    break
+            else:
+                await asyncio.sleep(0)
+            for duel in battle.get_duels()[duels:]:
+                message = {'type': 'duel', 'pokemon_1': duel[0], 'pokemon_2': duel[1],
+                           'winner': duel[2], 'rounds': duel[3]}
+                for other in (1, 2):
+                    try:
+                        await coaches[other].send(message)
+                    except ConnectionError:
+                        raise _Forfeit(other, 'disconnected') from None
+            duels = len(battle.get_duels())
+
+    async def __ask(self, coach_connection, coach, battle):
+        alive = battle.get_alive(coach)
+        opponent = battle.get_fighter(3 - coach)
+        request = {'type': 'select', 'alive': [_describe(pokemon) for pokemon in alive],
+                   'opponent': None if opponent is None else _describe(opponent)}
+        try:
+            await coach_connection.send(request)
+            while True:
+                line = await asyncio.wait_for(coach_connection.reader.readline(), self.__selection_timeout)
+                if not line:
+                    raise _Forfeit(coach, 'disconnected')
+                try:
+                    id_pokemon = json.loads(line)['id']
+                except (ValueError, KeyError, TypeError):
+                    id_pokemon = None
+                for pokemon in alive:
+                    if pokemon.get_id() == id_pokemon:
+                        return pokemon
+                await coach_connection.send({'type': 'error', 'message': 'Invalid Pokemon ID selected.'})
+                await coach_connection.send(request)
+        except asyncio.TimeoutError:
+            raise _Forfeit(coach, 'selection_timeout') from None
+        except ConnectionError:
+            raise _Forfeit(coach, 'disconnected') from None
+
+
+async def _open_connection(address):
+    if isinstance(address, str):
+        return await asyncio.open_unix_connection(address)
+    return await asyncio.open_connection(*address)
+
+
+async def run_client(address, match, roster, seed=None, policy=first_pokemon_policy):
+    """Function to play a match as a coach connected to a BattleServer.
+
+    Syntax
+    ------
+       [ ] = run_client(address, match, roster, seed, policy)
+
+    Parameters
+    ----------
+       [in] address Path of a Unix socket or tuple (host, port).
+       [in] match Name of the match.
+       [in] roster List of the rows of the roster of the coach.
+       [in] seed Seed of the battle, used if the coach is the coach 1.
+       [in] policy Function that receives the message select and returns
+                   the ID of the Pokemon selected. By default the first one.
+
+    Returns
+    -------
+       dict Message end of the match.
+
+    Example
+    -------
+       >>> end = await run_client("/tmp/battles.sock", "match-1", rows)
+    """
+    if policy is first_pokemon_policy:
+        policy = _first_id
+    reader, writer = await _open_connection(address)
+    try:
+        writer.write(json.dumps({'type': 'join', 'match': match, 'roster': roster,
+                                 'seed': seed}).encode('utf-8') + b'\n')
+        await writer.drain()
+        while True:
+            line = await reader.readline()
+            if not line:
+                raise ConnectionError('El servidor ha cerrado la conexión')
+            message = json.loads(line)
+            if message['type'] == 'select':
+                writer.write(json.dumps({'type': 'select', 'id': policy(message)}).encode('utf-8') + b'\n')
+                await writer.drain()
+            elif message['type'] in ('end', 'error'):
+                return message
+    finally:
+        writer.close()
+
+
+def _first_id(message):
+    return message['alive'][0]['id']
+
+
+async def generate_load(address, matches, roster_1, roster_2, seed=0):
+    """Function to play many matches at once against a BattleServer.
+
+    Syntax
+    ------
+       [ ] = generate_load(address, matches, roster_1, roster_2, seed)
+
+    Parameters
+    ----------
+       [in] address Path of a Unix socket or tuple (host, port).
+       [in] matches Number of matches.
+       [in] roster_1 Rows of the roster of every coach 1.
+       [in] roster_2 Rows of the roster of every coach 2.
+       [in] seed Seed of the first match; the match i uses seed + i.
+
+    Returns
+    -------
+       tuple (list of the messages end of the coaches 1, seconds elapsed).
+
+    Example
+    -------
+       >>> ends, elapsed = await generate_load("/tmp/battles.sock", 1000, rows_1, rows_2)
+    """
+    start = time.perf_counter()
+    results = []
+    for index in range(matches):
+        name = 'load-%d-%d' % (seed, index)
+        # The coach 1 must join first, so it is connected before the coach 2.
+        coach_1 = asyncio.ensure_future(run_client(address, name, roster_1, seed + index))
+        await asyncio.sleep(0)
+        results.append((coach_1, asyncio.ensure_future(run_client(address, name, roster_2))))
+    ends = []
+    for coach_1, coach_2 in results:
+        ends.append(await coach_1)
+        await coach_2
+    return ends, time.perf_counter() - start
+
+
+
+def main():
+    """Function main of the module.
+
+    The function main of this module is used to test the server that is
+    described in this module.
+
+    Syntax
+    ------
+      [ ] = main()
+
+    Parameters
+    ----------
+      Null .
+
+    Returns
+    -------
+      Null .
+
+    Example
+    -------
+      >>> main()
+    """
+
+    with open("coach_1_pokemons.csv", newline='') as csvfile:
+        roster_1 = [row for row in csv.reader(csvfile) if row]
+    with open("coach_2_pokemons.csv", newline='') as csvfile:
+        roster_2 = [row for row in csv.reader(csvfile) if row]
+
+    async def test():
+        directory = tempfile.mkdtemp()
+        path = os.path.join(directory, "battles.sock")
+        server = BattleServer(selection_timeout=0.5)
+        unix_server = await server.start_unix(path)
+
+        print("=================================================================.")
+        print("Test Case 1: Play thousands of matches at once.")
+        print("=================================================================.")
+        matches = 2000
+        ends, elapsed = await generate_load(path, matches, roster_1, roster_2, seed=100)
+        registry = IdRegistry()
+        expected = []
+        for index in range(10):
+            team_1 = [row.pokemon_class(*row[:6], registry=registry) for row in map(parse_row, roster_1)]
+            team_2 = [row.pokemon_class(*row[:6], registry=registry) for row in map(parse_row, roster_2)]
+            expected.append(Battle(team_1, team_2, rng=random.Random(100 + index)).run().winner)
+
+        if (len(ends) == matches and all(end['reason'] == 'defeat' for end in ends)
+                and [end['winner'] for end in ends[:10]] == expected):
+            print("Test PASS. " + str(matches) + " matches were played in " + str(round(elapsed, 2)) + " s.")
+        else:
+            print("Test FAIL. Check the class BattleServer()." + " RESULT: " + str(ends[:10]))
+
+
+        print("=================================================================.")
+        print("Test Case 2: A coach that does not select loses the match.")
+        print("=================================================================.")
+        reader, writer = await asyncio.open_unix_connection(path)
+        writer.write(json.dumps({'type': 'join', 'match': "silent", 'roster': roster_1}).encode('utf-8') + b'\n')
+        await writer.drain()
+        await reader.readline()
+        end = await run_client(path, "silent", roster_2)
+        writer.close()
+
+        if end['winner'] == 2 and end['reason'] == 'selection_timeout':
+            print("Test PASS. The selection timeout has been implemented correctly.")
+        else:
+            print("Test FAIL. Check the parameter selection_timeout." + " RESULT: " + str(end))
+
+        end = await run_client(path, "wrong", [["11", "Pikachu", "sword", "69", "8", "8"]])
+        if end['type'] == 'error':
+            print("Test PASS. A wrong roster has been rejected.")
+        else:
+            print("Test FAIL. A wrong roster must be rejected.")
+
+
+        print("=================================================================.")
+        print("Test Case 3: A coach without an opponent gets an error.")
+        print("=================================================================.")
+        lonely_path = os.path.join(directory, "lonely.sock")
+        lonely_server = BattleServer(join_timeout=0.2)
+        lonely_unix_server = await lonely_server.start_unix(lonely_path)
+        end = await run_client(lonely_path, "lonely", roster_1)
+        end_2 = await asyncio.wait_for(run_client(lonely_path, "lonely", roster_2), 1.0)
+
+        if end['type'] == 'error' and end_2['type'] == 'error':
+            print("Test PASS. The join timeout has been implemented correctly.")
+        else:
+            print("Test FAIL. Check the parameter join_timeout." + " RESULT: " + str(end))
+        lonely_unix_server.close()
+        await lonely_unix_server.wait_closed()
+        os.remove(lonely_path)
+
+
+        print("=================================================================.")
+        print("Test Case 4: The coaches waiting for an opponent do not hold a slot.")
+        print("=================================================================.")
+        single_path = os.path.join(directory, "single.sock")
+        single_server = BattleServer(max_matches=1, join_timeout=2.0)
+        single_unix_server = await single_server.start_unix(single_path)
+        first_1 = asyncio.ensure_future(run_client(single_path, "first", roster_1, 1))
+        second_1 = asyncio.ensure_future(run_client(single_path, "second", roster_1, 2))
+        await asyncio.sleep(0.1)
+        ends = await asyncio.gather(first_1, second_1, run_client(single_path, "first", roster_2),
+                                    run_client(single_path, "second", roster_2))
+
+        if all(end['type'] == 'end' and end['reason'] == 'defeat' for end in ends):
+            print("Test PASS. Both matches have been played with a single slot.")
+        else:
+            print("Test FAIL. Check the parameter max_matches." + " RESULT: " + str(ends))
+        single_unix_server.close()
+        await single_unix_server.wait_closed()
+        os.remove(single_path)
+
+        unix_server.close()
+        await unix_server.wait_closed()
+        os.remove(path)
+        os.rmdir(directory)
+
+    asyncio.run(test())
+
+
+
+# Checking whether this module is executed just itself alone.
+if __name__ == "__main__":
+    main()
+
+
+# EOF
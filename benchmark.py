@@ -0,0 +1,557 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+
+"""
+This Python module contains the benchmarks of the Game.
+
+@contents :  This module contains the benchmarks of the construction of the
+             Pokemons, of fight_attack() and fight_defense() of each type, of
+             the loading of the CSV files, of full battles and of the memory
+             of each Pokemon, their comparison with a stored baseline, and the
+             test cases to probe its functionality.
+@project :  N/A
+@program :  N/A
+@file :  benchmark.py
+@author :  Antonio Artes Garcia (antonio.artesgarcia@ceu.es)
+           Francisco Hernando Gallego (francisco.hernandogallego@ceu.es)
+           Ruben Juarez Cadiz (ruben.juarezcadiz@ceu.es)
+
+@version :  0.0.1, 08 November 2021
+@information :  The Zen of Python
+                  https://www.python.org/dev/peps/pep-0020/
+                Style Guide for Python Code
+                  https://www.python.org/dev/peps/pep-0008/
+                Example NumPy Style Python Docstrings
+                  http://sphinxcontrib-napoleon.readthedocs.io/en/latest/example_numpy.html
+                doctest – Testing through documentation
+                  https://pymotw.com/2/doctest/
+
+@copyright :  Copyright 2021 GNU AFFERO GENERAL PUBLIC.
+              All rights are reserved. Reproduction in whole or in part is
+              prohibited without the written consent of the copyright owner.
+"""
+
+
+# Source packages.
+
+import argparse
+import collections
+import csv
+import gc
+import json
+import os
+import platform
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+import battle
+from id_registry import IdRegistry
+from main import get_data_from_user
+from pokemon import Pokemon
+from pokemon_air import PokemonAir
+from pokemon_earth import PokemonEarth
+from pokemon_electricity import PokemonElectricity
+from pokemon_water import PokemonWater
+from rng import use_uniform
+from weapon_type import WeaponType
+
+
+# File where the baseline is stored by default.
+BASELINE_FILE = 'benchmark_baseline.json'
+
+
+# Result of a benchmark. Every value is a cost, so lower is better: seconds
+# per operation or bytes per Pokemon.
+BenchmarkResult = collections.namedtuple('BenchmarkResult', ['name', 'value', 'unit'])
+
+
+# Arguments of the constructor of a Pokemon of each type. They are in the
+# ranges of attack of PokemonWater and of defense of PokemonEarth.
+_POKEMON_ARGUMENTS = collections.OrderedDict([
+    ('normal', (Pokemon, ('Squirtle', WeaponType.ELBOW, 100, 12, 12))),
+    ('air', (PokemonAir, ('Pidgey', WeaponType.KICK, 100, 12, 12))),
+    ('earth', (PokemonEarth, ('Diglett', WeaponType.HEADBUTT, 100, 12, 12))),
+    ('electricity', (PokemonElectricity, ('Pikachu', WeaponType.HEADBUTT, 100, 12, 12))),
+    ('water', (PokemonWater, ('Psyduck', WeaponType.KICK, 100, 12, 12))),
+])
+
+
+def _best_time(function, number, repeat):
+    """Function to obtain the best time per call of number calls to function."""
+    best = float('inf')
+    for _ in range(repeat):
+        gc.collect()
+        start = time.perf_counter()
+        function(number)
+        best = min(best, time.perf_counter() - start)
+    return best / number
+
+
+def bench_construction(number=100000, repeat=5):
+    """Function to measure the construction of the Pokemons of each type.
+
+    Syntax
+    ------
+       [ ] = bench_construction(number, repeat)
+
+    Parameters
+    ----------
+       [in] number Number of Pokemons built in each repetition.
+       [in] repeat Number of repetitions. The best one is kept.
+
+    Returns
+    -------
+       List of BenchmarkResult.
+
+    Example
+    -------
+       >>> results = bench_construction(1000, 3)
+    """
+    results = []
+    for type_name, (pokemon_class, arguments) in _POKEMON_ARGUMENTS.items():
+        def build(number):
+            registry = IdRegistry()
+            pokemons = [pokemon_class(id_pokemon, *arguments, registry=registry)
+                        for id_pokemon in range(number)]
+            del pokemons
+        results.append(BenchmarkResult('construction_' + type_name,
+                                       _best_time(build, number, repeat), 's/op'))
+    return results
+
+
+def bench_fight(number=100000, repeat=5):
+    """Function to measure fight_attack() and fight_defense() of each type.
+
+    The attacker of fight_attack() is of each type and the defender is a
+    Pokemon of the base class. The defender of fight_defense() is of each
+    type. The defenders have enough health to stay alive, and the random
+    numbers of the stochastic Pokemons are drawn from a seeded source.
+
+    Syntax
+    ------
+       [ ] = bench_fight(number, repeat)
+
+    Parameters
+    ----------
+       [in] number Number of calls in each repetition.
+       [in] repeat Number of repetitions. The best one is kept.
+
+    Returns
+    -------
+       List of BenchmarkResult.
+
+    Example
+    -------
+       >>> results = bench_fight(1000, 3)
+    """
+    results = []
+    registry = IdRegistry()
+    health_points = 20 * number * repeat
+    for type_name, (pokemon_class, arguments) in _POKEMON_ARGUMENTS.items():
+        name, weapon_type, _, attack_rating, defense_rating = arguments
+        attacker = pokemon_class(1, name, weapon_type, health_points, attack_rating,
+                                 defense_rating, registry=registry)
+        defender = Pokemon(2, 'Squirtle', WeaponType.ELBOW, health_points, 5, 5,
+                           registry=registry)
+
+        def attack(number):
+            fight_attack = attacker.fight_attack
+            for _ in range(number):
+                fight_attack(defender)
+
+        def defense(number):
+            fight_defense = attacker.fight_defense
+            damage = defense_rating + 1
+            for _ in range(number):
+                fight_defense(damage)
+
+        with use_uniform(random.Random(0)):
+            results.append(BenchmarkResult('fight_attack_' + type_name,
+                                           _best_time(attack, number, repeat), 's/op'))
+            results.append(BenchmarkResult('fight_defense_' + type_name,
+                                           _best_time(defense, number, repeat), 's/op'))
+    return results
+
+
+def _write_roster(name_file, rows):
+    """Function to write a CSV file of a coach with rows Pokemons of every type."""
+    type_names = list(_POKEMON_ARGUMENTS)
+    with open(name_file, 'w', newline='') as file:
+        writer = csv.writer(file)
+        for index in range(rows):
+            type_name = type_names[index % len(type_names)]
+            name, weapon_type, health_points, attack_rating, defense_rating = \
+                _POKEMON_ARGUMENTS[type_name][1]
+            writer.writerow([index, name, weapon_type.name.lower(), health_points,
+                             attack_rating, defense_rating, type_name])
+
+
+def bench_load(sizes=(1000, 1000000), repeat=3):
+    """Function to measure main.get_data_from_user() with files of several sizes.
+
+    Syntax
+    ------
+       [ ] = bench_load(sizes, repeat)
+
+    Parameters
+    ----------
+       [in] sizes Number of rows of each file.
+       [in] repeat Number of repetitions. The best one is kept.
+
+    Returns
+    -------
+       List of BenchmarkResult with the seconds per row.
+
+    Example
+    -------
+       >>> results = bench_load((1000,), 3)
+    """
+    results = []
+    with tempfile.TemporaryDirectory() as directory:
+        for rows in sizes:
+            name_file = os.path.join(directory, 'roster_' + str(rows) + '.csv')
+            _write_roster(name_file, rows)
+
+            def load(number):
+                for _ in range(number):
+                    pokemons = get_data_from_user(name_file)
+                    del pokemons
+            # Large files are slow to load, so they are repeated fewer times.
+            seconds = _best_time(load, 1, repeat if rows <= 100000 else 1)
+            results.append(BenchmarkResult('get_data_from_user_' + str(rows),
+                                           seconds / rows, 's/row'))
+    return results
+
+
+def bench_game(number=200, repeat=5, name_files=('coach_1_pokemons.csv', 'coach_2_pokemons.csv')):
+    """Function to measure full battles between the rosters of two coaches.
+
+    Syntax
+    ------
+       [ ] = bench_game(number, repeat, name_files)
+
+    Parameters
+    ----------
+       [in] number Number of battles in each repetition.
+       [in] repeat Number of repetitions. The best one is kept.
+       [in] name_files CSV files of the rosters of both coaches.
+
+    Returns
+    -------
+       List of BenchmarkResult.
+
+    Example
+    -------
+       >>> results = bench_game(100, 3)
+    """
+    team_1 = get_data_from_user(name_files[0])
+    team_2 = get_data_from_user(name_files[1])
+
+    def simulate(number):
+        for seed in range(number):
+            battle.simulate(team_1, team_2, rng=random.Random(seed))
+
+    def play(number):
+        for seed in range(number):
+            battle.Battle(team_1, team_2, rng=random.Random(seed)).run(
+                battle.first_pokemon_policy)
+            for pokemon, health in health_points:
+                pokemon.set_health_points(health)
+
+    health_points = [(pokemon, pokemon.get_health_points()) for pokemon in team_1 + team_2]
+    return [BenchmarkResult('game_simulate', _best_time(simulate, number, repeat), 's/op'),
+            BenchmarkResult('game_battle', _best_time(play, number, repeat), 's/op')]
+
+
+def bench_memory(number=100000):
+    """Function to measure the memory of a Pokemon of each type.
+
+    The memory is measured with tracemalloc while number Pokemons are built,
+    so it includes the object and its attributes, but not the name and the
+    weapon, which are shared by every Pokemon, nor the entries of the IDs in
+    the registry, whose size depends on when its dictionary grows.
+
+    Syntax
+    ------
+       [ ] = bench_memory(number)
+
+    Parameters
+    ----------
+       [in] number Number of Pokemons built of each type.
+
+    Returns
+    -------
+       List of BenchmarkResult with the bytes per Pokemon.
+
+    Example
+    -------
+       >>> results = bench_memory(1000)
+    """
+    results = []
+    for type_name, (pokemon_class, arguments) in _POKEMON_ARGUMENTS.items():
+        registry = IdRegistry()
+        # The IDs, the list and the entries of the registry are built before
+        # measuring, so only the Pokemons are counted.
+        ids = list(range(10**6, 10**6 + number))
+        for id_pokemon in ids:
+            registry.register(id_pokemon)
+        pokemons = [None] * number
+        gc.collect()
+        tracemalloc.start()
+        before = tracemalloc.get_traced_memory()[0]
+        for index, id_pokemon in enumerate(ids):
+            pokemons[index] = pokemon_class(id_pokemon, *arguments, registry=registry)
+        after = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+        del pokemons
+        results.append(BenchmarkResult('memory_' + type_name, (after - before) / number, 'B/pokemon'))
+    return results
+
+
+def run_benchmarks(quick=False):
+    """Function to run every benchmark.
+
+    Syntax
+    ------
+       [ ] = run_benchmarks(quick)
+
+    Parameters
+    ----------
+       [in] quick If True, smaller sizes are used, and the file of 1M rows is
+                  replaced by one of 100K rows.
+
+    Returns
+    -------
+       List of BenchmarkResult.
+
+    Example
+    -------
+       >>> results = run_benchmarks(quick=True)
+    """
+    if quick:
+        return (bench_construction(10000, 3) + bench_fight(10000, 3)
+                + bench_load((1000, 100000), 3) + bench_game(50, 3) + bench_memory(10000))
+    return (bench_construction() + bench_fight() + bench_load() + bench_game()
+            + bench_memory())
+
+
+def results_to_json(results):
+    """Function to obtain the JSON document of a list of BenchmarkResult.
+
+    The document holds the versions of Python and the platform, so two
+    documents of different machines are not compared by mistake.
+
+    Syntax
+    ------
+       [ ] = results_to_json(results)
+
+    Parameters
+    ----------
+       [in] results List of BenchmarkResult.
+
+    Returns
+    -------
+       dict Document that can be dumped with json.
+    """
+    return {
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'results': {result.name: {'value': result.value, 'unit': result.unit}
+                    for result in results},
+    }
+
+
+def write_results(results, name_file):
+    """Function to write a list of BenchmarkResult in a JSON file."""
+    with open(name_file, 'w') as file:
+        json.dump(results_to_json(results), file, indent=2, sort_keys=True)
+        file.write('\n')
+
+
+def read_results(name_file):
+    """Function to read the list of BenchmarkResult of a JSON file."""
+    with open(name_file) as file:
+        document = json.load(file)
+    return [BenchmarkResult(name, entry['value'], entry['unit'])
+            for name, entry in sorted(document['results'].items())]
+
+
+def compare(results, baseline, threshold=0.25):
+    """Function to find the regressions of some results against a baseline.
+
+    A result is a regression when its value is more than threshold times
+    larger than the value of the baseline with the same name. The results
+    without a baseline are not compared.
+
+    Syntax
+    ------
+       [ ] = compare(results, baseline, threshold)
+
+    Parameters
+    ----------
+       [in] results List of BenchmarkResult.
+       [in] baseline List of BenchmarkResult of the baseline.
+       [in] threshold Allowed relative increase of each value.
+
+    Returns
+    -------
+       List of tuples (name, baseline_value, value, ratio) of the regressions.
+
+    Example
+    -------
+       >>> regressions = compare(results, read_results(BASELINE_FILE))
+    """
+    baseline_values = {result.name: result.value for result in baseline}
+    regressions = []
+    for result in results:
+        baseline_value = baseline_values.get(result.name)
+        if baseline_value is None or baseline_value <= 0:
+            continue
+        ratio = result.value / baseline_value
+        if ratio > 1 + threshold:
+            regressions.append((result.name, baseline_value, result.value, ratio))
+    return regressions
+
+
+def format_results(results, baseline=None):
+    """Function to obtain a table with a list of BenchmarkResult."""
+    baseline_values = {result.name: result.value for result in baseline or []}
+    lines = []
+    for result in results:
+        line = '%-32s %14.6g %-10s' % (result.name, result.value, result.unit)
+        if result.name in baseline_values and baseline_values[result.name] > 0:
+            line += ' x%.2f' % (result.value / baseline_values[result.name])
+        lines.append(line)
+    return '\n'.join(lines)
+
+
+def run(arguments=None):
+    """Function to run the benchmarks from the command line.
+
+    The exit status is 1 if any result is a regression against the baseline.
+
+    Syntax
+    ------
+       [ ] = run(arguments)
+
+    Parameters
+    ----------
+       [in] arguments List of the arguments of the command line.
+
+    Returns
+    -------
+       int Exit status.
+
+    Example
+    -------
+       >>> run(['--quick', '--output', 'results.json'])
+    """
+    parser = argparse.ArgumentParser(description='Benchmarks of the Game.')
+    parser.add_argument('--quick', action='store_true', help='use smaller sizes')
+    parser.add_argument('--output', help='JSON file where the results are written')
+    parser.add_argument('--baseline', default=BASELINE_FILE,
+                        help='JSON file of the baseline')
+    parser.add_argument('--threshold', type=float, default=0.25,
+                        help='allowed relative increase of each value')
+    parser.add_argument('--update-baseline', action='store_true',
+                        help='write the results as the new baseline')
+    options = parser.parse_args(arguments)
+
+    results = run_benchmarks(options.quick)
+    baseline = read_results(options.baseline) if os.path.exists(options.baseline) else None
+    print(format_results(results, baseline))
+    if options.output:
+        write_results(results, options.output)
+    if options.update_baseline:
+        write_results(results, options.baseline)
+        return 0
+    if baseline is None:
+        return 0
+
+    regressions = compare(results, baseline, options.threshold)
+    for name, baseline_value, value, ratio in regressions:
+        print('REGRESSION ' + name + ': ' + '%.6g' % baseline_value + ' -> '
+              + '%.6g' % value + ' (x%.2f)' % ratio)
+    return 1 if regressions else 0
+
+
+
+def main():
+    """Function main of the module.
+
+    The function main of this module is used to test the benchmarks that are
+    described in this module.
+
+    Syntax
+    ------
+      [ ] = main()
+
+    Parameters
+    ----------
+      Null .
+
+    Returns
+    -------
+      Null .
+
+    Example
+    -------
+      >>> main()
+    """
+
+    print("=================================================================.")
+    print("Test Case 1: Run the benchmarks with small sizes.")
+    print("=================================================================.")
+    results = (bench_construction(1000, 2) + bench_fight(1000, 2) + bench_load((1000,), 2)
+               + bench_game(10, 2) + bench_memory(1000))
+    names = [result.name for result in results]
+
+    if (len(names) == len(set(names)) == 5 + 10 + 1 + 2 + 5
+            and all(result.value > 0 for result in results)):
+        print("Test PASS. The benchmarks have been implemented correctly.")
+    else:
+        print("Test FAIL. Check the benchmarks." + " RESULT: " + str(results))
+    print(format_results(results))
+
+
+    print("=================================================================.")
+    print("Test Case 2: Write and read the results in JSON.")
+    print("=================================================================.")
+    with tempfile.TemporaryDirectory() as directory:
+        name_file = os.path.join(directory, 'results.json')
+        write_results(results, name_file)
+        read = read_results(name_file)
+
+    if sorted(read) == sorted(results):
+        print("Test PASS. The functions write_results() and read_results() have been implemented correctly.")
+    else:
+        print("Test FAIL. Check the functions write_results() and read_results().")
+
+
+    print("=================================================================.")
+    print("Test Case 3: Find the regressions against a baseline.")
+    print("=================================================================.")
+    baseline = [BenchmarkResult('a', 1.0, 's/op'), BenchmarkResult('b', 1.0, 's/op')]
+    current = [BenchmarkResult('a', 1.05, 's/op'), BenchmarkResult('b', 1.5, 's/op'),
+               BenchmarkResult('c', 9.0, 's/op')]
+    regressions = compare(current, baseline, threshold=0.25)
+
+    if [regression[0] for regression in regressions] == ['b']:
+        print("Test PASS. The function compare() has been implemented correctly.")
+    else:
+        print("Test FAIL. Check the function compare()." + " RESULT: " + str(regressions))
+
+
+
+# Checking whether this module is executed just itself alone.
+if __name__ == "__main__":
+    if len(sys.argv) > 1:
+        sys.exit(run(sys.argv[1:]))
+    else:
+        main()
+
+
+# EOF
@@ -0,0 +1,481 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+
+"""
+This Python module contains the damage model of the Game.
+
+@contents :  This module contains the damage of a hit as a function of the
+             weapon, the types of both Pokemons and their attack and defense
+             ratings, precomputed in a table that every battle reads, and the
+             test cases to probe its functionality.
+@project :  N/A
+@program :  N/A
+@file :  damage.py
+@author :  Antonio Artes Garcia (antonio.artesgarcia@ceu.es)
+           Francisco Hernando Gallego (francisco.hernandogallego@ceu.es)
+           Ruben Juarez Cadiz (ruben.juarezcadiz@ceu.es)
+
+@version :  0.0.1, 08 November 2021
+@information :  The Zen of Python
+                  https://www.python.org/dev/peps/pep-0020/
+                Style Guide for Python Code
+                  https://www.python.org/dev/peps/pep-0008/
+                Example NumPy Style Python Docstrings
+                  http://sphinxcontrib-napoleon.readthedocs.io/en/latest/example_numpy.html
+                doctest – Testing through documentation
+                  https://pymotw.com/2/doctest/
+
+@copyright :  Copyright 2021 GNU AFFERO GENERAL PUBLIC.
+              All rights are reserved. Reproduction in whole or in part is
+              prohibited without the written consent of the copyright owner.
+"""
+
+
+# Source packages.
+
+import array
+import contextlib
+import time
+from weapon_type import WeaponType
+
+
+# Names of the classes of Pokemon, in the order of roster.POKEMON_CLASSES. A
+# class is coded by the first of its bases with one of these names, so the
+# records of a Roster and any subclass get the code of their type. The names
+# are used instead of the classes because the classes import this module.
+CLASS_NAMES = ('Pokemon', 'PokemonAir', 'PokemonEarth', 'PokemonElectricity', 'PokemonWater')
+
+# Weapons in the order of their codes.
+WEAPON_TYPES = tuple(WeaponType)
+
+# Ratings of attack and defense stored in the table, from 0 to MAX_RATING - 1.
+# The damage of other ratings is computed by the model.
+MAX_RATING = 128
+
+_WEAPON_CODES = {weapon_type: code for code, weapon_type in enumerate(WEAPON_TYPES)}
+_WEAPON_VALUE_CODES = {weapon_type.value: code for code, weapon_type in enumerate(WEAPON_TYPES)}
+_DEFENSE_KEYS = len(CLASS_NAMES) * MAX_RATING
+_class_codes = {}
+# The keys are interned, so the Pokemons with the same stats share them and a
+# Pokemon only pays for the references in its slots.
+_keys = {}
+
+
+def class_code(pokemon_class):
+    """Function to obtain the code of a class of Pokemon."""
+    code = _class_codes.get(pokemon_class)
+    if code is None:
+        code = next((CLASS_NAMES.index(base.__name__) for base in pokemon_class.__mro__
+                     if base.__name__ in CLASS_NAMES), 0)
+        _class_codes[pokemon_class] = code
+    return code
+
+
+def weapon_code(weapon_type):
+    """Function to obtain the code of a weapon, or of the value of a weapon."""
+    if isinstance(weapon_type, WeaponType):
+        return _WEAPON_CODES[weapon_type]
+    return _WEAPON_VALUE_CODES[weapon_type]
+
+
+def attack_key(pokemon_class, weapon_type, attack_rating):
+    """Function to obtain the part of the index of the table of an attacker.
+
+    Syntax
+    ------
+       [ ] = attack_key(pokemon_class, weapon_type, attack_rating)
+
+    Parameters
+    ----------
+       [in] pokemon_class Class of the attacker.
+       [in] weapon_type WeaponType of the attacker.
+       [in] attack_rating Attack rating of the attacker.
+
+    Returns
+    -------
+       int Key that is added to the key of the defender, or -1 if the rating
+           is out of the table.
+
+    Example
+    -------
+       >>> key = attack_key(Pokemon, WeaponType.KICK, 8)
+    """
+    if 0 <= attack_rating < MAX_RATING:
+        key = (((_WEAPON_CODES[weapon_type] * len(CLASS_NAMES) + class_code(pokemon_class))
+                * MAX_RATING + attack_rating) * _DEFENSE_KEYS)
+        return _keys.setdefault(key, key)
+    return -1
+
+
+def defense_key(pokemon_class, defense_rating):
+    """Function to obtain the part of the index of the table of a defender.
+
+    Returns -1 if the rating is out of the table.
+    """
+    if 0 <= defense_rating < MAX_RATING:
+        key = class_code(pokemon_class) * MAX_RATING + defense_rating
+        return _keys.setdefault(key, key)
+    return -1
+
+
+class DamageModel():
+    """Python class to implement a model of the damage of a hit.
+
+    This Python class computes the damage that a hit does before the
+    defender tries to dodge it: the attack rating plus the bonus of the
+    weapon minus the defense rating, when it is positive, multiplied by the
+    factor of the type of the attacker against the type of the defender and
+    rounded down. The damage of every weapon, pair of types and pair of
+    ratings up to MAX_RATING is precomputed in a flat table, so a hit costs
+    one lookup at the sum of the keys of attack_key() and defense_key().
+
+    Syntax
+    ------
+      obj = DamageModel(weapon_bonus, type_factors)
+
+    Parameters
+    ----------
+      [in] weapon_bonus Dictionary from WeaponType to the points added to the
+                        attack. By default the weapons add nothing.
+      [in] type_factors Dictionary from (attacker_class, defender_class) to
+                        the factor of the damage. By default 1.
+
+    Returns
+    -------
+      obj Python object output parameter that represents an instance
+          of the class DamageModel.
+
+    Attributes
+    ----------
+
+    Example
+    -------
+      >>> model = DamageModel({WeaponType.HEADBUTT: 5})
+      >>> model.get_damage(WeaponType.HEADBUTT, Pokemon, Pokemon, 8, 7)
+    """
+
+    def __init__(self, weapon_bonus=None, type_factors=None):
+        weapon_bonus = weapon_bonus or {}
+        self.__weapon_bonus = tuple(weapon_bonus.get(weapon_type, 0) for weapon_type in WEAPON_TYPES)
+        factors = [[1.0] * len(CLASS_NAMES) for _ in CLASS_NAMES]
+        for (attacker_class, defender_class), factor in (type_factors or {}).items():
+            factors[class_code(attacker_class)][class_code(defender_class)] = factor
+        self.__type_factors = tuple(tuple(row) for row in factors)
+        self.__table = None
+
+    def get_weapon_bonus(self, weapon_type):
+        return self.__weapon_bonus[_WEAPON_CODES[weapon_type]]
+
+    def get_damage(self, weapon_type, attacker_class, defender_class, attack_rating, defense_rating):
+        """Method to compute the damage of a hit without the table."""
+        return self.__damage(self.__weapon_bonus[_WEAPON_CODES[weapon_type]],
+                             self.__type_factors[class_code(attacker_class)][class_code(defender_class)],
+                             attack_rating, defense_rating)
+
+    @staticmethod
+    def __damage(bonus, factor, attack_rating, defense_rating):
+        damage = attack_rating + bonus - defense_rating
+        if damage <= 0:
+            return 0
+        return int(damage * factor)
+
+    def get_table(self):
+        """Method to obtain the table of damages, built the first time.
+
+        The table is an array of int32 ordered by weapon, attacker class,
+        attack rating, defender class and defense rating. The rows of equal
+        bonus and factor are computed once and copied.
+        """
+        if self.__table is None:
+            rows = {}
+            table = array.array('i')
+            for bonus in self.__weapon_bonus:
+                for factors in self.__type_factors:
+                    for attack_rating in range(MAX_RATING):
+                        for factor in factors:
+                            row = rows.get((bonus, factor, attack_rating))
+                            if row is None:
+                                row = array.array('i', [self.__damage(bonus, factor, attack_rating, defense_rating)
+                                                        for defense_rating in range(MAX_RATING)])
+                                rows[(bonus, factor, attack_rating)] = row
+                            table.extend(row)
+            self.__table = table
+        return self.__table
+
+    def get_damage_array(self, weapon_codes, attacker_codes, attack_ratings, defender_codes, defense_ratings):
+        """Method to look up the damages of arrays of hits with NumPy.
+
+        The arguments are broadcast together. The hits whose ratings are out
+        of the table are computed with the same formula.
+
+        Syntax
+        ------
+           [ ] = model.get_damage_array(weapon_codes, attacker_codes,
+                                        attack_ratings, defender_codes,
+                                        defense_ratings)
+
+        Parameters
+        ----------
+           [in] weapon_codes Codes of the weapons of the attackers.
+           [in] attacker_codes Codes of the classes of the attackers.
+           [in] attack_ratings Attack ratings of the attackers.
+           [in] defender_codes Codes of the classes of the defenders.
+           [in] defense_ratings Defense ratings of the defenders.
+
+        Returns
+        -------
+           numpy.ndarray Damages of the hits as int64.
+
+        Example
+        -------
+           >>> damages = model.get_damage_array(weapons[:, None], classes[:, None],
+           ...                                  attacks[:, None], classes[None, :],
+           ...                                  defenses[None, :])
+        """
+        import numpy as np
+
+        weapon_codes, attacker_codes, attack_ratings, defender_codes, defense_ratings = np.broadcast_arrays(
+            *(np.asarray(values, dtype=np.int64) for values in
+              (weapon_codes, attacker_codes, attack_ratings, defender_codes, defense_ratings)))
+        inside = ((attack_ratings >= 0) & (attack_ratings < MAX_RATING)
+                  & (defense_ratings >= 0) & (defense_ratings < MAX_RATING))
+        index = ((((weapon_codes * len(CLASS_NAMES) + attacker_codes) * MAX_RATING
+                   + np.where(inside, attack_ratings, 0)) * _DEFENSE_KEYS)
+                 + defender_codes * MAX_RATING + np.where(inside, defense_ratings, 0))
+        damages = np.frombuffer(self.get_table(), dtype=np.int32)[index].astype(np.int64)
+        if not inside.all():
+            bonus = np.array(self.__weapon_bonus, dtype=np.int64)[weapon_codes]
+            factor = np.array(self.__type_factors)[attacker_codes, defender_codes]
+            points = attack_ratings + bonus - defense_ratings
+            formula = np.where(points > 0, np.floor(np.maximum(points, 0) * factor), 0).astype(np.int64)
+            damages = np.where(inside, damages, formula)
+        return damages
+
+
+# Rules of the Game: the weapon does not change the damage.
+CLASSIC_DAMAGE = DamageModel()
+
+# Rules where each weapon adds half of its value to the attack.
+WEAPON_DAMAGE = DamageModel({weapon_type: weapon_type.value // 2 for weapon_type in WeaponType})
+
+# Models that can be chosen by name, in the command line of main, in the
+# tournaments and in the replay files, which keep the position of the name.
+DAMAGE_MODELS = {'classic': CLASSIC_DAMAGE, 'weapon': WEAPON_DAMAGE}
+
+# Model and table read by every battle.
+_model = CLASSIC_DAMAGE
+_table = _model.get_table()
+
+
+def get_damage_model():
+    return _model
+
+
+def get_named_damage_model(name):
+    """Function to obtain the model of DAMAGE_MODELS with a name."""
+    model = DAMAGE_MODELS.get(name)
+    if model is None:
+        raise ValueError('El modelo de daño ' + str(name) + ' no existe, los modelos son: '
+                         + ', '.join(DAMAGE_MODELS))
+    return model
+
+
+def get_damage_model_name(model):
+    """Function to obtain the name of a model of DAMAGE_MODELS."""
+    for name, named_model in DAMAGE_MODELS.items():
+        if named_model is model:
+            return name
+    raise ValueError('El modelo de daño no está en DAMAGE_MODELS')
+
+
+def set_damage_model(model):
+    """Function to set the model of damage of every battle of the process.
+
+    Returns the model that was set before.
+    """
+    global _model, _table
+    previous = _model
+    _table = model.get_table()
+    _model = model
+    return previous
+
+
+@contextlib.contextmanager
+def use_damage_model(model):
+    """Function to use a model of damage inside a with block.
+
+    Syntax
+    ------
+       [ ] = use_damage_model(model)
+
+    Parameters
+    ----------
+       [in] model DamageModel used by the battles.
+
+    Returns
+    -------
+       Context manager.
+
+    Example
+    -------
+       >>> with use_damage_model(WEAPON_DAMAGE):
+       ...     result = battle.simulate(coach_1, coach_2)
+    """
+    previous = set_damage_model(model)
+    try:
+        yield model
+    finally:
+        set_damage_model(previous)
+
+
+def hit_damage(attacker, defender):
+    """Function to obtain the damage of a hit of a Pokemon to another one.
+
+    Syntax
+    ------
+       [ ] = hit_damage(attacker, defender)
+
+    Parameters
+    ----------
+       [in] attacker Pokemon that attacks.
+       [in] defender Pokemon that is attacked.
+
+    Returns
+    -------
+       int Damage of the hit if it is not dodged.
+
+    Example
+    -------
+       >>> hit_damage(pokemon_1, pokemon_2)
+    """
+    key_1 = attacker.get_attack_key()
+    key_2 = defender.get_defense_key()
+    if key_1 >= 0 and key_2 >= 0:
+        return _table[key_1 + key_2]
+    return _model.get_damage(attacker.get_weapon_type(), type(attacker), type(defender),
+                             attacker.get_attack_rating(), defender.get_defense_rating())
+
+
+
+def main():
+    """Function main of the module.
+
+    The function main of this module is used to test the damage model that is
+    described in this module.
+
+    Syntax
+    ------
+      [ ] = main()
+
+    Parameters
+    ----------
+      Null .
+
+    Returns
+    -------
+      Null .
+
+    Example
+    -------
+      >>> main()
+    """
+    import numpy as np
+    from pokemon import Pokemon
+    from pokemon_air import PokemonAir
+    from pokemon_earth import PokemonEarth
+
+    print("=================================================================.")
+    print("Test Case 1: The classic model keeps the rules of the Game.")
+    print("=================================================================.")
+    pokemon_1 = Pokemon(1, "Venusaur", WeaponType.PUNCH, 99, 10, 7)
+    pokemon_2 = PokemonAir(2, "Pidgey", WeaponType.HEADBUTT, 99, 9, 8)
+    pokemon_3 = PokemonEarth(3, "Diglett", WeaponType.KICK, 99, 200, 15)
+
+    if (hit_damage(pokemon_1, pokemon_2) == 2 and hit_damage(pokemon_2, pokemon_1) == 2
+            and hit_damage(pokemon_2, pokemon_3) == 0 and hit_damage(pokemon_3, pokemon_1) == 193):
+        print("Test PASS. The function hit_damage() has been implemented correctly.")
+    else:
+        print("Test FAIL. Check the function hit_damage().")
+
+
+    print("=================================================================.")
+    print("Test Case 2: The weapons change the damage of another model.")
+    print("=================================================================.")
+    # The Pokemons read the module damage, which is not this one when it is
+    # executed alone.
+    import damage
+    model = damage.DamageModel({WeaponType.HEADBUTT: 5}, {(PokemonAir, PokemonEarth): 2.0})
+    with damage.use_damage_model(model):
+        damages = (damage.hit_damage(pokemon_1, pokemon_2), damage.hit_damage(pokemon_2, pokemon_1),
+                   damage.hit_damage(pokemon_2, pokemon_3))
+        pokemon_2.fight_attack(pokemon_1)
+
+    if (damages == (2, 7, 0) and pokemon_1.get_health_points() == 92
+            and damage.get_damage_model() is damage.CLASSIC_DAMAGE and damage.hit_damage(pokemon_2, pokemon_1) == 2):
+        print("Test PASS. The function use_damage_model() has been implemented correctly.")
+    else:
+        print("Test FAIL. Check the function use_damage_model()." + " RESULT: " + str(damages))
+
+    rng = np.random.default_rng(7)
+    size = 100000
+    codes = (rng.integers(0, len(WEAPON_TYPES), size), rng.integers(0, len(CLASS_NAMES), size),
+             rng.integers(-5, MAX_RATING + 20, size), rng.integers(0, len(CLASS_NAMES), size),
+             rng.integers(-5, MAX_RATING + 20, size))
+    damages = model.get_damage_array(*codes)
+    expected = [model.get_damage(WEAPON_TYPES[weapon], _class_by_code(attacker), _class_by_code(defender),
+                                 attack, defense)
+                for weapon, attacker, attack, defender, defense in zip(*(column.tolist() for column in codes))]
+
+    if damages.tolist() == expected:
+        print("Test PASS. The method get_damage_array() matches the formula.")
+    else:
+        print("Test FAIL. Check the method get_damage_array().")
+
+    try:
+        damage.get_damage_model_name(model)
+        unnamed = False
+    except ValueError:
+        unnamed = True
+
+    if (all(damage.get_damage_model_name(damage.get_named_damage_model(name)) == name
+            for name in damage.DAMAGE_MODELS) and unnamed):
+        print("Test PASS. The models are chosen by name correctly.")
+    else:
+        print("Test FAIL. Check the functions get_named_damage_model() and get_damage_model_name().")
+
+
+    print("=================================================================.")
+    print("Test Case 3: A hit costs one lookup in the table.")
+    print("=================================================================.")
+    start = time.perf_counter()
+    WEAPON_DAMAGE.get_table()
+    DamageModel({WeaponType.KICK: 1}).get_table()
+    elapsed_table = time.perf_counter() - start
+    start = time.perf_counter()
+    for _ in range(100000):
+        hit_damage(pokemon_1, pokemon_2)
+    elapsed_hit = (time.perf_counter() - start) / 100000
+
+    if len(CLASSIC_DAMAGE.get_table()) == len(WEAPON_TYPES) * (len(CLASS_NAMES) * MAX_RATING) ** 2:
+        print("Test PASS. Two tables were built in " + str(round(elapsed_table, 3)) + " s and a hit takes "
+              + str(round(elapsed_hit * 1e9)) + " ns.")
+    else:
+        print("Test FAIL. Check the method get_table().")
+
+
+def _class_by_code(code):
+    """Function to obtain a class with a code for the test cases."""
+    return _TEST_CLASSES[code]
+
+
+_TEST_CLASSES = tuple(type(name, (), {}) for name in CLASS_NAMES)
+
+
+
+# Checking whether this module is executed just itself alone.
+if __name__ == "__main__":
+    main()
+
+
+# EOF
@@ -0,0 +1,387 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+
+"""
+This Python module contains the exact probabilities of the stochastic duels.
+
+@contents :  This module contains the dynamic programming over the states of
+             health of a duel, the tables of probabilities that can be saved
+             to disk, and the test cases to probe its functionality.
+@project :  N/A
+@program :  N/A
+@file :  duel_markov.py
+@author :  Antonio Artes Garcia (antonio.artesgarcia@ceu.es)
+           Francisco Hernando Gallego (francisco.hernandogallego@ceu.es)
+           Ruben Juarez Cadiz (ruben.juarezcadiz@ceu.es)
+
+@version :  0.0.1, 08 November 2021
+@information :  The Zen of Python
+                  https://www.python.org/dev/peps/pep-0020/
+                Style Guide for Python Code
+                  https://www.python.org/dev/peps/pep-0008/
+                Example NumPy Style Python Docstrings
+                  http://sphinxcontrib-napoleon.readthedocs.io/en/latest/example_numpy.html
+                doctest – Testing through documentation
+                  https://pymotw.com/2/doctest/
+
+@copyright :  Copyright 2021 GNU AFFERO GENERAL PUBLIC.
+              All rights are reserved. Reproduction in whole or in part is
+              prohibited without the written consent of the copyright owner.
+"""
+
+
+# Source packages.
+
+import collections
+import functools
+import os
+import pickle
+import tempfile
+import battle
+import duel_solver
+from duel_solver import hit_damage
+from pokemon import Pokemon
+from pokemon_air import PokemonAir
+from weapon_type import WeaponType
+
+
+# Probabilities of a duel. The fields win_1, win_2 and draw are the exact
+# probabilities of each result, rounds is the expected number of rounds and
+# outcomes is a tuple of ((health_1, health_2), probability) with the
+# distribution of the final health of both Pokemons.
+DuelProbabilities = collections.namedtuple(
+    'DuelProbabilities', ['win_1', 'win_2', 'draw', 'rounds', 'outcomes'])
+
+
+# Tables of probabilities loaded from disk, indexed by the stat tuple.
+_table = {}
+
+
+def dodge_probability(pokemon):
+    """Function to know the probability that a Pokemon dodges a hit.
+
+    Syntax
+    ------
+       [ ] = dodge_probability(pokemon)
+
+    Parameters
+    ----------
+       [in] pokemon Pokemon to check.
+
+    Returns
+    -------
+       float Probability of dodging each hit in fight_defense().
+
+    Example
+    -------
+       >>> dodge_probability(pokemon)
+    """
+    if isinstance(pokemon, PokemonAir):
+        return pokemon.dodge_probability
+    return 0.0
+
+
+@functools.lru_cache(maxsize=4096)
+def _solve(health_1, damage_1, dodge_1, health_2, damage_2, dodge_2):
+    """Function to run the dynamic programming over the states of a duel.
+
+    The state (hits_1, hits_2) counts the hits received by each Pokemon, so
+    its health is health - hits * damage of the other one. In each round the
+    Pokemon 1 hits with probability 1 - dodge_2 and the Pokemon 2 hits with
+    probability 1 - dodge_1, independently. The number of hits never
+    decreases, so the states are visited in lexicographic order and the
+    probability of reaching each one is propagated forward once. A state
+    that is left with probability 1 - stay is visited 1 / (1 - stay) times.
+    A Pokemon without health is already defeated, so the duel has no rounds.
+    """
+    if health_1 <= 0 or health_2 <= 0:
+        if health_1 <= 0 and health_2 <= 0:
+            results = (0.0, 0.0, 1.0)
+        elif health_2 <= 0:
+            results = (1.0, 0.0, 0.0)
+        else:
+            results = (0.0, 1.0, 0.0)
+        return DuelProbabilities(*results, 0.0, (((health_1, health_2), 1.0),))
+
+    hit_1 = (1.0 - dodge_2) if damage_1 > 0 else 0.0
+    hit_2 = (1.0 - dodge_1) if damage_2 > 0 else 0.0
+    stay = (1.0 - hit_1) * (1.0 - hit_2)
+    if stay >= 1.0:
+        return DuelProbabilities(0.0, 0.0, 1.0, 0.0, (((health_1, health_2), 1.0),))
+
+    # Number of hits that defeat each Pokemon. A Pokemon that is never hit
+    # keeps a single state.
+    hits_to_defeat_1 = -(-health_1 // damage_2) if damage_2 > 0 else 1
+    hits_to_defeat_2 = -(-health_2 // damage_1) if damage_1 > 0 else 1
+
+    moves = [(1, 0, (1.0 - hit_1) * hit_2),
+             (0, 1, hit_1 * (1.0 - hit_2)),
+             (1, 1, hit_1 * hit_2)]
+    moves = [move for move in moves if move[2] > 0.0]
+
+    reach = [[0.0] * hits_to_defeat_2 for _ in range(hits_to_defeat_1)]
+    reach[0][0] = 1.0
+    results = [0.0, 0.0, 0.0]
+    outcomes = collections.defaultdict(float)
+    rounds = 0.0
+    for hits_1 in range(hits_to_defeat_1):
+        row = reach[hits_1]
+        for hits_2 in range(hits_to_defeat_2):
+            mass = row[hits_2]
+            if mass == 0.0:
+                continue
+            leave = mass / (1.0 - stay)
+            rounds += leave
+            for step_1, step_2, probability in moves:
+                next_1 = hits_1 + step_1
+                next_2 = hits_2 + step_2
+                defeated_1 = next_1 >= hits_to_defeat_1
+                defeated_2 = next_2 >= hits_to_defeat_2
+                if defeated_1 or defeated_2:
+                    if defeated_1 and defeated_2:
+                        results[0] += leave * probability
+                    elif defeated_2:
+                        results[1] += leave * probability
+                    else:
+                        results[2] += leave * probability
+                    outcomes[(health_1 - next_1 * damage_2,
+                              health_2 - next_2 * damage_1)] += leave * probability
+                else:
+                    reach[next_1][next_2] += leave * probability
+
+    return DuelProbabilities(results[1], results[2], results[0], rounds,
+                             tuple(sorted(outcomes.items())))
+
+
+def solve_duel_stats(health_1, damage_1, dodge_1, health_2, damage_2, dodge_2):
+    """Function to compute the exact probabilities of a duel from its stats.
+
+    The tables loaded with load_table() are checked first, and the rest of
+    the stat tuples are memoized.
+
+    Syntax
+    ------
+       [ ] = solve_duel_stats(health_1, damage_1, dodge_1,
+                              health_2, damage_2, dodge_2)
+
+    Parameters
+    ----------
+       [in] health_N Health points of the Pokemon N.
+       [in] damage_N Damage of each hit of the Pokemon N that is not dodged.
+       [in] dodge_N Probability that the Pokemon N dodges a hit.
+
+    Returns
+    -------
+       DuelProbabilities Probabilities of the duel.
+
+    Example
+    -------
+       >>> solve_duel_stats(100, 1, 0.5, 100, 3, 0.0)
+    """
+    key = (health_1, damage_1, dodge_1, health_2, damage_2, dodge_2)
+    probabilities = _table.get(key)
+    if probabilities is None:
+        probabilities = _solve(*key)
+    return probabilities
+
+
+def solve_duel(pokemon_1, pokemon_2):
+    """Function to compute the exact probabilities of a duel.
+
+    Syntax
+    ------
+       [ ] = solve_duel(pokemon_1, pokemon_2)
+
+    Parameters
+    ----------
+       [in] pokemon_1 Pokemon of the coach 1.
+       [in] pokemon_2 Pokemon of the coach 2.
+
+    Returns
+    -------
+       DuelProbabilities Probabilities of the duel.
+
+    Example
+    -------
+       >>> solve_duel(pokemon_1, pokemon_2)
+    """
+    return solve_duel_stats(pokemon_1.get_health_points(), hit_damage(pokemon_1, pokemon_2),
+                            dodge_probability(pokemon_1),
+                            pokemon_2.get_health_points(), hit_damage(pokemon_2, pokemon_1),
+                            dodge_probability(pokemon_2))
+
+
+def build_table(health_points, damages, dodges=(0.0, PokemonAir.dodge_probability)):
+    """Function to compute the probabilities of every duel of a range of stats.
+
+    Syntax
+    ------
+       [ ] = build_table(health_points, damages, dodges)
+
+    Parameters
+    ----------
+       [in] health_points Iterable with the health points to tabulate.
+       [in] damages Iterable with the damages per hit to tabulate.
+       [in] dodges Iterable with the probabilities of dodging to tabulate.
+
+    Returns
+    -------
+       dict Probabilities of each duel indexed by its stat tuple.
+
+    Example
+    -------
+       >>> table = build_table(range(60, 101), range(0, 5))
+    """
+    health_points = list(health_points)
+    damages = list(damages)
+    dodges = list(dodges)
+    table = {}
+    for health_1 in health_points:
+        for damage_1 in damages:
+            for dodge_1 in dodges:
+                for health_2 in health_points:
+                    for damage_2 in damages:
+                        for dodge_2 in dodges:
+                            key = (health_1, damage_1, dodge_1, health_2, damage_2, dodge_2)
+                            table[key] = _solve(*key)
+    return table
+
+
+def save_table(name_file, table):
+    """Function to save a table of probabilities to disk.
+
+    Syntax
+    ------
+       [ ] = save_table(name_file, table)
+
+    Parameters
+    ----------
+       [in] name_file Name of the file.
+       [in] table Table returned by build_table().
+
+    Returns
+    -------
+       Null .
+
+    Example
+    -------
+       >>> save_table("duels.pickle", table)
+    """
+    with open(name_file, 'wb') as table_file:
+        pickle.dump(table, table_file, protocol=pickle.HIGHEST_PROTOCOL)
+
+
+def load_table(name_file):
+    """Function to load a table of probabilities from disk.
+
+    The duels of the table are not computed again by solve_duel_stats().
+
+    Syntax
+    ------
+       [ ] = load_table(name_file)
+
+    Parameters
+    ----------
+       [in] name_file Name of the file written by save_table().
+
+    Returns
+    -------
+       int Number of duels loaded.
+
+    Example
+    -------
+       >>> load_table("duels.pickle")
+    """
+    with open(name_file, 'rb') as table_file:
+        table = pickle.load(table_file)
+    _table.update(table)
+    return len(table)
+
+
+
+def main():
+    """Function main of the module.
+
+    The function main of this module is used to test the dynamic programming
+    that is described in this module.
+
+    Syntax
+    ------
+      [ ] = main()
+
+    Parameters
+    ----------
+      Null .
+
+    Returns
+    -------
+      Null .
+
+    Example
+    -------
+      >>> main()
+    """
+
+    print("=================================================================.")
+    print("Test Case 1: A deterministic duel matches the closed form.")
+    print("=================================================================.")
+    probabilities = solve_duel_stats(20, 5, 0.0, 12, 3, 0.0)
+    outcome = duel_solver.solve_duel_stats(20, 5, 12, 3)
+
+    if (probabilities.win_1 == 1.0 and probabilities.rounds == outcome.rounds
+            and probabilities.outcomes == (((outcome.health_1, outcome.health_2), 1.0),)):
+        print("Test PASS. The function solve_duel_stats() has been implemented correctly.")
+    else:
+        print("Test FAIL. Check the function solve_duel_stats()." + " RESULT: " + str(probabilities))
+
+    probabilities = solve_duel_stats(0, 3, 0.5, 10, 2, 0.0)
+    outcome = duel_solver.solve_duel_stats(0, 3, 10, 2)
+    if (probabilities.win_2 == 1.0 and outcome.winner == 2 and probabilities.rounds == outcome.rounds == 0
+            and solve_duel_stats(-4, 3, 0.0, 0, 2, 0.5).draw == 1.0):
+        print("Test PASS. A Pokemon without health has lost the duel before it starts.")
+    else:
+        print("Test FAIL. Check the function _solve()." + " RESULT: " + str(probabilities))
+
+
+    print("=================================================================.")
+    print("Test Case 2: The probabilities match the fights of the Pokemons.")
+    print("=================================================================.")
+    pokemon_1 = PokemonAir(1, "Pidgey", WeaponType.KICK, 30, 8, 7)
+    pokemon_2 = Pokemon(2, "Squirtle", WeaponType.ELBOW, 30, 9, 6)
+
+    probabilities = solve_duel(pokemon_1, pokemon_2)
+    wins = 0
+    for _ in range(2000):
+        if battle.simulate([pokemon_1], [pokemon_2]).winner == 1:
+            wins += 1
+
+    total = probabilities.win_1 + probabilities.win_2 + probabilities.draw
+    if abs(total - 1.0) < 1e-9 and abs(probabilities.win_1 - wins / 2000) < 0.05:
+        print("Test PASS. The probabilities match the simulation of the objects.")
+    else:
+        print("Test FAIL. Check the function solve_duel()." + " RESULT: "
+              + str(probabilities[:4]) + " " + str(wins / 2000))
+
+
+    print("=================================================================.")
+    print("Test Case 3: Save and load a table of probabilities.")
+    print("=================================================================.")
+    table = build_table(range(28, 31), range(0, 3))
+    name_file = os.path.join(tempfile.mkdtemp(), "duels.pickle")
+    save_table(name_file, table)
+
+    if load_table(name_file) == len(table) == 3 * 3 * 2 * 3 * 3 * 2:
+        print("Test PASS. The table has been saved and loaded correctly.")
+    else:
+        print("Test FAIL. Check the functions save_table() and load_table().")
+    os.remove(name_file)
+
+
+
+# Checking whether this module is executed just itself alone.
+if __name__ == "__main__":
+    main()
+
+
+# EOF
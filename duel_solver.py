@@ -0,0 +1,323 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+
+"""
+This Python module contains the closed-form solver of the deterministic duels.
+
+@contents :  This module contains the analytical solution of a duel between
+             two Pokemons that never dodge, and the test cases to probe its
+             functionality.
+@project :  N/A
+@program :  N/A
+@file :  duel_solver.py
+@author :  Antonio Artes Garcia (antonio.artesgarcia@ceu.es)
+           Francisco Hernando Gallego (francisco.hernandogallego@ceu.es)
+           Ruben Juarez Cadiz (ruben.juarezcadiz@ceu.es)
+
+@version :  0.0.1, 08 November 2021
+@information :  The Zen of Python
+                  https://www.python.org/dev/peps/pep-0020/
+                Style Guide for Python Code
+                  https://www.python.org/dev/peps/pep-0008/
+                Example NumPy Style Python Docstrings
+                  http://sphinxcontrib-napoleon.readthedocs.io/en/latest/example_numpy.html
+                doctest – Testing through documentation
+                  https://pymotw.com/2/doctest/
+
+@copyright :  Copyright 2021 GNU AFFERO GENERAL PUBLIC.
+              All rights are reserved. Reproduction in whole or in part is
+              prohibited without the written consent of the copyright owner.
+"""
+
+
+# Source packages.
+
+import collections
+import functools
+import damage
+from pokemon import Pokemon
+from pokemon_air import PokemonAir
+from pokemon_electricity import PokemonElectricity
+from weapon_type import WeaponType
+
+
+# Outcome of a duel. The field winner is 1 or 2 for the Pokemon that is still
+# alive and 0 for a draw, rounds is the number of rounds of the duel,
+# health_N is the final health of the Pokemon N and stalemate is True when
+# neither Pokemon can damage the other, so the duel would never end.
+DuelOutcome = collections.namedtuple(
+    'DuelOutcome', ['winner', 'rounds', 'health_1', 'health_2', 'stalemate'])
+
+
+def hit_damage(attacker, defender):
+    """Function to know the damage of a hit that is not dodged.
+
+    Syntax
+    ------
+       [ ] = hit_damage(attacker, defender)
+
+    Parameters
+    ----------
+       [in] attacker Pokemon that attacks.
+       [in] defender Pokemon that defends.
+
+    Returns
+    -------
+       int Points of health that the defender loses, as in fight_attack(),
+           read from the table of the current damage model.
+
+    Example
+    -------
+       >>> hit_damage(pokemon_1, pokemon_2)
+    """
+    return damage.hit_damage(attacker, defender)
+
+
+def is_deterministic(pokemon):
+    """Function to know if the fights of a Pokemon do not depend on chance.
+
+    Only PokemonAir may dodge a hit. The double hit of PokemonElectricity
+    doubles the value returned by fight_attack() but not the damage, so it
+    does not change the outcome of a duel.
+
+    Syntax
+    ------
+       [ ] = is_deterministic(pokemon)
+
+    Parameters
+    ----------
+       [in] pokemon Pokemon to check.
+
+    Returns
+    -------
+       Boolean True if the damage that the Pokemon receives is deterministic.
+
+    Example
+    -------
+       >>> is_deterministic(pokemon)
+    """
+    return not isinstance(pokemon, PokemonAir)
+
+
+def draws_uniforms(pokemon):
+    """Function to know if the fights of a Pokemon draw random numbers.
+
+    PokemonAir draws a uniform for each hit that it receives and
+    PokemonElectricity for each of its attacks. A duel solved in closed form
+    does not draw them, so it only gives the same battle as the rounds
+    played one by one if neither Pokemon draws uniforms.
+
+    Syntax
+    ------
+       [ ] = draws_uniforms(pokemon)
+
+    Parameters
+    ----------
+       [in] pokemon Pokemon to check.
+
+    Returns
+    -------
+       Boolean True if the fights of the Pokemon draw from rng.get_uniform().
+
+    Example
+    -------
+       >>> draws_uniforms(pokemon)
+    """
+    return isinstance(pokemon, (PokemonAir, PokemonElectricity))
+
+
+def is_stalemate(pokemon_1, pokemon_2):
+    """Function to know if neither Pokemon can damage the other.
+
+    Syntax
+    ------
+       [ ] = is_stalemate(pokemon_1, pokemon_2)
+
+    Parameters
+    ----------
+       [in] pokemon_1 Pokemon of the coach 1.
+       [in] pokemon_2 Pokemon of the coach 2.
+
+    Returns
+    -------
+       Boolean True if the duel between both Pokemons would never end.
+
+    Example
+    -------
+       >>> is_stalemate(pokemon_1, pokemon_2)
+    """
+    return hit_damage(pokemon_1, pokemon_2) == 0 and hit_damage(pokemon_2, pokemon_1) == 0
+
+
+@functools.lru_cache(maxsize=65536)
+def solve_duel_stats(health_1, damage_1, health_2, damage_2):
+    """Function to solve a deterministic duel from the stats of the fighters.
+
+    In each round the Pokemon 1 deals damage_1 to the Pokemon 2 and the
+    Pokemon 2 deals damage_2 to the Pokemon 1, so each Pokemon is defeated
+    after ceil(health / damage) rounds. When both are defeated in the same
+    round the duel is a draw. The results are memoized on the stat tuple.
+
+    Syntax
+    ------
+       [ ] = solve_duel_stats(health_1, damage_1, health_2, damage_2)
+
+    Parameters
+    ----------
+       [in] health_N Health points of the Pokemon N.
+       [in] damage_N Damage of each hit of the Pokemon N.
+
+    Returns
+    -------
+       DuelOutcome Outcome of the duel.
+
+    Example
+    -------
+       >>> solve_duel_stats(20, 5, 12, 3)
+    """
+    if damage_1 <= 0 and damage_2 <= 0:
+        return DuelOutcome(0, 0, health_1, health_2, True)
+
+    # Ceiling division of the health by the damage of the other Pokemon.
+    if damage_2 > 0:
+        rounds_1 = max(0, -(-health_1 // damage_2))
+    else:
+        rounds_1 = None
+    if damage_1 > 0:
+        rounds_2 = max(0, -(-health_2 // damage_1))
+    else:
+        rounds_2 = None
+
+    if rounds_1 is None or (rounds_2 is not None and rounds_2 < rounds_1):
+        winner = 1
+        rounds = rounds_2
+    elif rounds_2 is None or rounds_1 < rounds_2:
+        winner = 2
+        rounds = rounds_1
+    else:
+        winner = 0
+        rounds = rounds_1
+
+    return DuelOutcome(winner, rounds,
+                       health_1 - rounds * max(0, damage_2),
+                       health_2 - rounds * max(0, damage_1), False)
+
+
+def solve_duel(pokemon_1, pokemon_2):
+    """Function to solve the duel between two deterministic Pokemons.
+
+    Syntax
+    ------
+       [ ] = solve_duel(pokemon_1, pokemon_2)
+
+    Parameters
+    ----------
+       [in] pokemon_1 Pokemon of the coach 1.
+       [in] pokemon_2 Pokemon of the coach 2.
+
+    Returns
+    -------
+       DuelOutcome Outcome of the duel.
+
+    Example
+    -------
+       >>> solve_duel(pokemon_1, pokemon_2)
+    """
+    if not is_deterministic(pokemon_1) or not is_deterministic(pokemon_2):
+        raise ValueError('El duelo depende del azar y no se puede resolver de forma exacta')
+    return solve_duel_stats(pokemon_1.get_health_points(), hit_damage(pokemon_1, pokemon_2),
+                            pokemon_2.get_health_points(), hit_damage(pokemon_2, pokemon_1))
+
+
+
+def main():
+    """Function main of the module.
+
+    The function main of this module is used to test the solver that is
+    described in this module.
+
+    Syntax
+    ------
+      [ ] = main()
+
+    Parameters
+    ----------
+      Null .
+
+    Returns
+    -------
+      Null .
+
+    Example
+    -------
+      >>> main()
+    """
+
+    print("=================================================================.")
+    print("Test Case 1: Solve a deterministic duel.")
+    print("=================================================================.")
+    pokemon_1 = Pokemon(1, "Ivysaur", WeaponType.HEADBUTT, 20, 10, 5)
+    pokemon_2 = PokemonElectricity(2, "Pikachu", WeaponType.KICK, 12, 8, 6)
+
+    outcome = solve_duel(pokemon_1, pokemon_2)
+
+    if outcome == DuelOutcome(1, 3, 11, 0, False):
+        print("Test PASS. The function solve_duel() has been implemented correctly.")
+    else:
+        print("Test FAIL. Check the function solve_duel()." + " RESULT: " + str(outcome))
+
+
+    print("=================================================================.")
+    print("Test Case 2: The solver matches the fights round by round.")
+    print("=================================================================.")
+    while pokemon_1.is_alive() and pokemon_2.is_alive():
+        pokemon_1.fight_attack(pokemon_2)
+        pokemon_2.fight_attack(pokemon_1)
+
+    if (pokemon_1.get_health_points(), pokemon_2.get_health_points()) == (outcome.health_1, outcome.health_2):
+        print("Test PASS. The final health matches the fights.")
+    else:
+        print("Test FAIL. Check the function solve_duel_stats().")
+
+
+    print("=================================================================.")
+    print("Test Case 3: Detect a stalemate.")
+    print("=================================================================.")
+    pokemon_3 = Pokemon(3, "Wartortle", WeaponType.KICK, 50, 5, 10)
+    pokemon_4 = Pokemon(4, "Charmeleon", WeaponType.PUNCH, 50, 5, 10)
+
+    if is_stalemate(pokemon_3, pokemon_4) and solve_duel(pokemon_3, pokemon_4).stalemate:
+        print("Test PASS. The stalemate has been detected correctly.")
+    else:
+        print("Test FAIL. Check the function is_stalemate().")
+
+
+    print("=================================================================.")
+    print("Test Case 4: Both Pokemons are defeated in the same round.")
+    print("=================================================================.")
+    outcome = solve_duel_stats(10, 5, 10, 5)
+
+    if outcome.winner == 0 and outcome.rounds == 2:
+        print("Test PASS. The draw has been detected correctly.")
+    else:
+        print("Test FAIL. Check the function solve_duel_stats()." + " RESULT: " + str(outcome))
+
+
+    print("=================================================================.")
+    print("Test Case 5: A Pokemon that dodges cannot be solved exactly.")
+    print("=================================================================.")
+    try:
+        solve_duel(PokemonAir(5, "Pidgey", WeaponType.KICK, 50, 8, 7), pokemon_3)
+        print("Test FAIL. Check the function solve_duel().")
+    except ValueError:
+        print("Test PASS. The function solve_duel() rejects a PokemonAir.")
+
+
+
+# Checking whether this module is executed just itself alone.
+if __name__ == "__main__":
+    main()
+
+
+# EOF
@@ -0,0 +1,450 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+
+"""
+This Python module contains the copy-on-write states of a game of the Game.
+
+@contents :  This module contains the state of a game as vectors of health and
+             bitmasks of undefeated Pokemons over the shared stats of both
+             teams, with O(changed) fork, diff and restore for search and
+             what-if analysis, and the test cases to probe its functionality.
+@project :  N/A
+@program :  N/A
+@file :  game_state.py
+@author :  Antonio Artes Garcia (antonio.artesgarcia@ceu.es)
+           Francisco Hernando Gallego (francisco.hernandogallego@ceu.es)
+           Ruben Juarez Cadiz (ruben.juarezcadiz@ceu.es)
+
+@version :  0.0.1, 08 November 2021
+@information :  The Zen of Python
+                  https://www.python.org/dev/peps/pep-0020/
+                Style Guide for Python Code
+                  https://www.python.org/dev/peps/pep-0008/
+                Example NumPy Style Python Docstrings
+                  http://sphinxcontrib-napoleon.readthedocs.io/en/latest/example_numpy.html
+                doctest – Testing through documentation
+                  https://pymotw.com/2/doctest/
+
+@copyright :  Copyright 2021 GNU AFFERO GENERAL PUBLIC.
+              All rights are reserved. Reproduction in whole or in part is
+              prohibited without the written consent of the copyright owner.
+"""
+
+
+# Source packages.
+
+import copy
+import random
+import time
+import battle
+from duel_solver import is_stalemate
+from pokemon import Pokemon
+from pokemon_air import PokemonAir
+from rng import use_uniform
+from weapon_type import WeaponType
+
+
+class GameState():
+    """Python class to implement a copy-on-write state of a game.
+
+    This Python class holds the state of a game between two teams: the
+    health of every Pokemon, a bitmask of the Pokemons of each coach that
+    can still fight, the Pokemons in the fight and the rounds played. The
+    Pokemons themselves are shared by every state and are only used for
+    their stats and their rules of fight.
+
+    The health is kept as a base vector, shared by a state and its forks,
+    plus a small dictionary with the changes since that base, so fork(),
+    diff() between states of the same base and restore() cost O(changed)
+    instead of O(number of Pokemons). When the changes grow to a quarter of
+    the teams they are folded into a new base.
+
+    The rules are the ones of battle.Battle: each round the Pokemon of the
+    coach 1 attacks first, the winner of a duel stays in the fight, and a
+    duel that ends in a draw withdraws both Pokemons.
+
+    Syntax
+    ------
+      obj = GameState(team_1, team_2, max_rounds)
+
+    Parameters
+    ----------
+      [in] team_1 List of the Pokemons of the coach 1.
+      [in] team_2 List of the Pokemons of the coach 2.
+      [in] max_rounds Maximum number of rounds of a single duel, or None for
+                      no limit.
+
+    Returns
+    -------
+      obj Python object output parameter that represents an instance
+          of the class GameState.
+
+    Attributes
+    ----------
+
+    Example
+    -------
+      >>> state = GameState(coach_1, coach_2)
+      >>> branch = state.fork()
+      >>> branch.select(1, 0)
+    """
+
+    __slots__ = ('__teams', '__max_rounds', '__base', '__changes', '__alive',
+                 '__fighters', '__rounds', '__duel_rounds', '__winner')
+
+    def __init__(self, team_1, team_2, max_rounds=10000):
+        self.__teams = (None, tuple(team_1), tuple(team_2))
+        self.__max_rounds = max_rounds
+        self.__base = (None,
+                       tuple(pokemon.get_health_points() for pokemon in team_1),
+                       tuple(pokemon.get_health_points() for pokemon in team_2))
+        self.__changes = {}
+        self.__alive = [0, 0, 0]
+        for coach in (1, 2):
+            for position, health_points in enumerate(self.__base[coach]):
+                if health_points > 0:
+                    self.__alive[coach] |= 1 << position
+        self.__fighters = [None, -1, -1]
+        self.__rounds = 0
+        self.__duel_rounds = 0
+        self.__winner = None
+        self.__check_end()
+
+    def fork(self):
+        """Method to obtain an independent copy of the state in O(changed)."""
+        state = GameState.__new__(GameState)
+        state.__teams = self.__teams
+        state.__max_rounds = self.__max_rounds
+        state.__base = self.__base
+        state.__changes = dict(self.__changes)
+        state.__alive = list(self.__alive)
+        state.__fighters = list(self.__fighters)
+        state.__rounds = self.__rounds
+        state.__duel_rounds = self.__duel_rounds
+        state.__winner = self.__winner
+        return state
+
+    def get_team(self, coach):
+        return self.__teams[coach]
+
+    def get_health_points(self, coach, position):
+        return self.__changes.get((coach, position), self.__base[coach][position])
+
+    def get_alive_mask(self, coach):
+        return self.__alive[coach]
+
+    def is_alive(self, coach, position):
+        return (self.__alive[coach] >> position) & 1 == 1
+
+    def get_alive(self, coach):
+        """Method to obtain the positions of the Pokemons that can still fight."""
+        mask = self.__alive[coach]
+        positions = []
+        while mask:
+            low_bit = mask & -mask
+            positions.append(low_bit.bit_length() - 1)
+            mask ^= low_bit
+        return positions
+
+    def get_fighter(self, coach):
+        """Method to obtain the position of the Pokemon in the fight, or -1."""
+        return self.__fighters[coach]
+
+    def get_rounds(self):
+        return self.__rounds
+
+    def get_winner(self):
+        return self.__winner
+
+    def is_over(self):
+        return self.__winner is not None
+
+    def get_changes(self):
+        return len(self.__changes)
+
+    def set_health_points(self, coach, position, health_points):
+        """Method to change the health of a Pokemon in this state only."""
+        if health_points == self.__base[coach][position]:
+            self.__changes.pop((coach, position), None)
+        else:
+            self.__changes[(coach, position)] = health_points
+            if len(self.__changes) > max(64, (len(self.__base[1]) + len(self.__base[2])) // 4):
+                self.compact()
+        if health_points <= 0:
+            self.__alive[coach] &= ~(1 << position)
+
+    def compact(self):
+        """Method to fold the changes into a new base vector in O(n)."""
+        base = [None, list(self.__base[1]), list(self.__base[2])]
+        for (coach, position), health_points in self.__changes.items():
+            base[coach][position] = health_points
+        self.__base = (None, tuple(base[1]), tuple(base[2]))
+        self.__changes = {}
+
+    def needs_selection(self):
+        """Method to know which coach has to select a Pokemon, or 0 if none."""
+        if self.__winner is not None:
+            return 0
+        if self.__fighters[1] < 0:
+            return 1
+        if self.__fighters[2] < 0:
+            return 2
+        return 0
+
+    def select(self, coach, position):
+        """Method to send the Pokemon of a position of a coach to the fight."""
+        if coach != self.needs_selection():
+            raise ValueError('El entrenador ' + str(coach) + ' no tiene que seleccionar')
+        if not self.is_alive(coach, position):
+            raise ValueError('El Pokemon de la posición ' + str(position) + ' no puede combatir')
+        self.__fighters[coach] = position
+        other = self.__fighters[3 - coach]
+        if other >= 0 and is_stalemate(self.__teams[1][self.__fighters[1]],
+                                       self.__teams[2][self.__fighters[2]]):
+            self.__end_duel(0)
+
+    def play_round(self):
+        """Method to play one round of the duel in course.
+
+        The health of the two Pokemons in the fight is written in their
+        objects, they fight with their own rules and the new health is read
+        back, so only two Pokemons are touched. The random numbers are drawn
+        from the source of rng.get_uniform().
+        """
+        if self.needs_selection() or self.__winner is not None:
+            raise ValueError('No hay ningún combate en curso')
+        position_1 = self.__fighters[1]
+        position_2 = self.__fighters[2]
+        pokemon_1 = self.__teams[1][position_1]
+        pokemon_2 = self.__teams[2][position_2]
+        saved_1 = pokemon_1.get_health_points()
+        saved_2 = pokemon_2.get_health_points()
+        pokemon_1.set_health_points(self.get_health_points(1, position_1))
+        pokemon_2.set_health_points(self.get_health_points(2, position_2))
+        try:
+            pokemon_1.fight_attack(pokemon_2)
+            pokemon_2.fight_attack(pokemon_1)
+            health_points_1 = pokemon_1.get_health_points()
+            health_points_2 = pokemon_2.get_health_points()
+        finally:
+            pokemon_1.set_health_points(saved_1)
+            pokemon_2.set_health_points(saved_2)
+        self.__rounds += 1
+        self.__duel_rounds += 1
+        self.set_health_points(1, position_1, health_points_1)
+        self.set_health_points(2, position_2, health_points_2)
+
+        defeated_1 = health_points_1 <= 0
+        defeated_2 = health_points_2 <= 0
+        if defeated_1 or defeated_2 or self.__duel_rounds == self.__max_rounds:
+            if defeated_1 == defeated_2:
+                self.__end_duel(0)
+            else:
+                self.__end_duel(2 if defeated_1 else 1)
+
+    def play_duel(self):
+        """Method to play the rounds of the duel in course until it ends."""
+        while not self.needs_selection() and self.__winner is None:
+            self.play_round()
+
+    def diff(self, other):
+        """Method to obtain the changes of health from this state to other.
+
+        Syntax
+        ------
+           [ ] = state.diff(other)
+
+        Parameters
+        ----------
+           [in] other GameState of the same teams.
+
+        Returns
+        -------
+           List of tuples (coach, position, health_points) with the health in
+           other of each Pokemon whose health is different. It costs
+           O(changed) when both states share their base vector.
+
+        Example
+        -------
+           >>> changes = state.diff(state.fork())
+        """
+        if other.__teams is not self.__teams:
+            raise ValueError('Los estados no son de los mismos equipos')
+        if other.__base is self.__base:
+            keys = self.__changes.keys() | other.__changes.keys()
+        else:
+            keys = [(coach, position) for coach in (1, 2)
+                    for position in range(len(self.__base[coach]))]
+        changes = []
+        for coach, position in sorted(keys):
+            health_points = other.get_health_points(coach, position)
+            if health_points != self.get_health_points(coach, position):
+                changes.append((coach, position, health_points))
+        return changes
+
+    def restore(self, previous=None):
+        """Method to write the health of this state in the Pokemons.
+
+        If previous is the state that the Pokemons hold now, only the
+        Pokemons whose health differs are written.
+
+        Syntax
+        ------
+           [ ] = state.restore(previous)
+
+        Parameters
+        ----------
+           [in] previous GameState that the Pokemons hold now, or None.
+
+        Returns
+        -------
+           int Number of Pokemons written.
+
+        Example
+        -------
+           >>> state.restore()
+        """
+        if previous is None:
+            written = 0
+            for coach in (1, 2):
+                for position, pokemon in enumerate(self.__teams[coach]):
+                    pokemon.set_health_points(self.get_health_points(coach, position))
+                    written += 1
+            return written
+        changes = previous.diff(self)
+        for coach, position, health_points in changes:
+            self.__teams[coach][position].set_health_points(health_points)
+        return len(changes)
+
+    def __end_duel(self, winner):
+        for coach in (1, 2):
+            if winner != coach:
+                self.__alive[coach] &= ~(1 << self.__fighters[coach])
+                self.__fighters[coach] = -1
+        self.__duel_rounds = 0
+        self.__check_end()
+
+    def __check_end(self):
+        if self.__alive[1] and self.__alive[2]:
+            return
+        if self.__alive[1]:
+            self.__winner = 1
+        elif self.__alive[2]:
+            self.__winner = 2
+        else:
+            self.__winner = 0
+
+
+
+def main():
+    """Function main of the module.
+
+    The function main of this module is used to test the states that are
+    described in this module.
+
+    Syntax
+    ------
+      [ ] = main()
+
+    Parameters
+    ----------
+      Null .
+
+    Returns
+    -------
+      Null .
+
+    Example
+    -------
+      >>> main()
+    """
+
+    print("=================================================================.")
+    print("Test Case 1: A fork is independent of its parent.")
+    print("=================================================================.")
+    team_1 = [Pokemon(1, "Pikachu", WeaponType.HEADBUTT, 69, 8, 8),
+              Pokemon(2, "Squirtle", WeaponType.ELBOW, 74, 7, 6)]
+    team_2 = [Pokemon(3, "Diglett", WeaponType.PUNCH, 82, 9, 7),
+              Pokemon(4, "Venusaur", WeaponType.KICK, 78, 8, 6)]
+    state = GameState(team_1, team_2)
+    branch = state.fork()
+    branch.set_health_points(1, 0, 0)
+
+    if (state.get_health_points(1, 0) == 69 and state.get_alive(1) == [0, 1]
+            and branch.get_health_points(1, 0) == 0 and branch.get_alive(1) == [1]
+            and team_1[0].get_health_points() == 69):
+        print("Test PASS. The method fork() has been implemented correctly.")
+    else:
+        print("Test FAIL. Check the method fork().")
+
+
+    print("=================================================================.")
+    print("Test Case 2: A state plays the same game as battle.Battle.")
+    print("=================================================================.")
+    team_3 = [PokemonAir(5, "Pidgey", WeaponType.KICK, 85, 7, 7),
+              Pokemon(6, "Squirtle", WeaponType.ELBOW, 74, 7, 6)]
+    team_4 = [Pokemon(7, "Diglett", WeaponType.PUNCH, 82, 9, 7),
+              Pokemon(8, "Venusaur", WeaponType.KICK, 78, 8, 6)]
+    expected = battle.Battle(team_3, team_4, rng=random.Random(5)).run()
+    for pokemon, health_points in zip(team_3 + team_4, (85, 74, 82, 78)):
+        pokemon.set_health_points(health_points)
+
+    state = GameState(team_3, team_4)
+    with use_uniform(random.Random(5)):
+        while not state.is_over():
+            coach = state.needs_selection()
+            if coach:
+                state.select(coach, state.get_alive(coach)[0])
+            else:
+                state.play_round()
+
+    if (state.get_winner() == expected.winner and state.get_rounds() == expected.rounds
+            and tuple(state.get_health_points(2, position) for position in range(2)) == expected.health_points_2
+            and [pokemon.get_health_points() for pokemon in team_3] == [85, 74]):
+        print("Test PASS. The method play_round() has been implemented correctly.")
+    else:
+        print("Test FAIL. Check the method play_round()." + " RESULT: " + str(expected))
+
+
+    print("=================================================================.")
+    print("Test Case 3: Diff and restore cost O(changed).")
+    print("=================================================================.")
+    big_team_1 = [Pokemon(10 + position, "Pikachu", WeaponType.PUNCH, 100, 8, 7)
+                  for position in range(50000)]
+    big_team_2 = [Pokemon(100000 + position, "Squirtle", WeaponType.KICK, 100, 9, 6)
+                  for position in range(50000)]
+    root = GameState(big_team_1, big_team_2)
+    start = time.perf_counter()
+    branches = []
+    for position in range(2000):
+        branch = root.fork()
+        branch.select(1, position)
+        branch.select(2, position)
+        branch.play_duel()
+        branches.append(branch)
+    elapsed_branches = time.perf_counter() - start
+
+    start = time.perf_counter()
+    copy.deepcopy(big_team_1)
+    elapsed_deepcopy = time.perf_counter() - start
+
+    changes = branches[0].diff(branches[1])
+    written = branches[1].restore(root)
+    written += root.restore(branches[1])
+    if (len(changes) == 4 and written == 4 and big_team_1[1].get_health_points() == 100
+            and branches[7].get_changes() == 2):
+        print("Test PASS. The methods diff() and restore() have been implemented correctly.")
+    else:
+        print("Test FAIL. Check the methods diff() and restore()." + " RESULT: " + str(changes))
+    print("2000 branches of 100000 Pokemons in " + str(round(elapsed_branches, 3)) + " s, "
+          + "one deepcopy of a team in " + str(round(elapsed_deepcopy, 3)) + " s.")
+
+
+
+# Checking whether this module is executed just itself alone.
+if __name__ == "__main__":
+    main()
+
+
+# EOF
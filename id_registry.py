@@ -0,0 +1,189 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+
+"""
+This Python module contains not only the class IdRegistry, but also the test
+of this Python class.
+
+@contents :  This module contains not only a single Python class, but also the
+             test cases to probe its functionality.
+@project :  N/A
+@program :  N/A
+@file :  id_registry.py
+@author :  Antonio Artes Garcia (antonio.artesgarcia@ceu.es)
+           Francisco Hernando Gallego (francisco.hernandogallego@ceu.es)
+           Ruben Juarez Cadiz (ruben.juarezcadiz@ceu.es)
+
+@version :  0.0.1, 08 November 2021
+@information :  The Zen of Python
+                  https://www.python.org/dev/peps/pep-0020/
+                Style Guide for Python Code
+                  https://www.python.org/dev/peps/pep-0008/
+                Example NumPy Style Python Docstrings
+                  http://sphinxcontrib-napoleon.readthedocs.io/en/latest/example_numpy.html
+                doctest – Testing through documentation
+                  https://pymotw.com/2/doctest/
+
+@copyright :  Copyright 2021 GNU AFFERO GENERAL PUBLIC.
+              All rights are reserved. Reproduction in whole or in part is
+              prohibited without the written consent of the copyright owner.
+"""
+
+
+# Source packages.
+
+import threading
+
+
+class IdRegistry():
+    """Python class to implement a registry of the IDs of the Pokemons.
+
+    This Python class implements a registry of IDs backed by a dictionary
+    that counts how many live Pokemons use each ID, so registering, looking
+    up and releasing an ID take constant time. A registry can be shared by
+    the whole program or created for a single game or roster, and it can
+    reject repeated IDs. The operations are protected by a lock, so the
+    registry can be shared between threads.
+
+    Syntax
+    ------
+      obj = IdRegistry(unique)
+
+    Parameters
+    ----------
+      [in] unique If True, registering an ID that is already in use raises
+                  a ValueError.
+
+    Returns
+    -------
+      obj Python object output parameter that represents an instance
+          of the class IdRegistry.
+
+    Attributes
+    ----------
+
+    Example
+    -------
+      >>> from id_registry import IdRegistry
+      >>> registry = IdRegistry(unique=True)
+      >>> registry.register(1)
+    """
+    __slots__ = ('__counts', '__unique', '__lock')
+
+    def __init__(self, unique=False):
+        self.__counts = {}
+        self.__unique = unique
+        self.__lock = threading.Lock()
+
+    def __getstate__(self):
+        return (self.__counts, self.__unique)
+
+    def __setstate__(self, state):
+        self.__counts, self.__unique = state
+        self.__lock = threading.Lock()
+
+    def __contains__(self, id_pokemon):
+        return id_pokemon in self.__counts
+
+    def __len__(self):
+        return len(self.__counts)
+
+    def __iter__(self):
+        return iter(list(self.__counts))
+
+    def is_unique(self):
+        return self.__unique
+
+    def count(self, id_pokemon):
+        return self.__counts.get(id_pokemon, 0)
+
+    def register(self, id_pokemon):
+        with self.__lock:
+            count = self.__counts.get(id_pokemon, 0)
+            if count and self.__unique:
+                raise ValueError('El ID ' + str(id_pokemon) + ' ya está en uso')
+            self.__counts[id_pokemon] = count + 1
+
+    def release(self, id_pokemon):
+        with self.__lock:
+            count = self.__counts.get(id_pokemon, 0)
+            if count > 1:
+                self.__counts[id_pokemon] = count - 1
+            elif count == 1:
+                del self.__counts[id_pokemon]
+            else:
+                return False
+            return True
+
+    def clear(self):
+        with self.__lock:
+            self.__counts.clear()
+
+
+
+def main():
+    """Function main of the module.
+
+    The function main of this module is used to test the Class that is described
+    in this module.
+
+    Syntax
+    ------
+      [ ] = main()
+
+    Parameters
+    ----------
+      Null .
+
+    Returns
+    -------
+      Null .
+
+    Example
+    -------
+      >>> main()
+    """
+
+    print("=================================================================.")
+    print("Test Case 1: Register and release IDs.")
+    print("=================================================================.")
+    registry = IdRegistry()
+    registry.register(1)
+    registry.register(1)
+    registry.register(2)
+
+    if 1 in registry and registry.count(1) == 2 and len(registry) == 2:
+        print("Test PASS. The method register() has been implemented correctly.")
+    else:
+        print("Test FAIL. Check the method register().")
+
+    registry.release(1)
+    registry.release(2)
+
+    if registry.count(1) == 1 and 2 not in registry and not registry.release(2):
+        print("Test PASS. The method release() has been implemented correctly.")
+    else:
+        print("Test FAIL. Check the method release().")
+
+
+    print("=================================================================.")
+    print("Test Case 2: A unique registry rejects repeated IDs.")
+    print("=================================================================.")
+    registry = IdRegistry(unique=True)
+    registry.register(1)
+
+    try:
+        registry.register(1)
+        print("Test FAIL. Check the method register().")
+    except ValueError:
+        print("Test PASS. The repeated ID has been rejected.")
+
+
+
+# Checking whether this module is executed just itself alone.
+if __name__ == "__main__":
+    main()
+
+
+# EOF
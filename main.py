@@ -32,12 +32,22 @@ This Python method contains the application of the Game.
 
 # Source packages.
 
-import csv
-from pokemon import Pokemon
-from weapon_type import WeaponType
-import random
+import argparse
+from battle_events import BufferedTextSink
+from damage import get_named_damage_model, use_damage_model
+from profiling import Profiler
+from replay import record_battle, write_replay
+from result_store import ResultStore
+from roster import Roster
+from roster_loader import iter_pokemons
+import sys
 
 
+# File where the replay of the last Game is written.
+REPLAY_FILE = 'last_game.pkrp'
+
+# Database where the results of every Game are added.
+RESULTS_FILE = 'results.sqlite3'
 
 
 def get_data_from_user(name_file):
@@ -64,19 +74,36 @@ def get_data_from_user(name_file):
       >>> list_pokemons = get_data_from_user("file.csv")
     """
     
-    list_of_pokemons = []
-    with open(name_file, newline='') as csvfile:
-        reader = csv.reader(csvfile)
-        for row in reader:
-            id_pokemon = int(row[0])
-            pokemon_name = row[1]
-            weapon_type = WeaponType[row[2].upper()]
-            health_points = int(row[3])
-            attack_rating = int(row[4])
-            defense_rating = int(row[5])
-            pokemon = Pokemon(id_pokemon, pokemon_name, weapon_type, health_points, attack_rating, defense_rating)
-            list_of_pokemons.append(pokemon)
-    return list_of_pokemons
+    return list(iter_pokemons(name_file, validate_first=True))
+
+
+def get_roster(list_of_pokemons):
+    """Function to store the Pokemons of a coach in a roster.Roster.
+
+    The Roster counts the undefeated Pokemons whenever a health is written
+    and indexes the IDs once, so the selections and the end of the Game do
+    not scan the list again.
+
+    Syntax
+    ------
+      [ ] = get_roster(list_of_pokemons)
+
+    Parameters
+    ----------
+      [in] list_of_pokemons List of the Pokemons of the coach.
+
+    Returns
+    -------
+      Roster Roster of the Pokemons of the coach.
+
+    Example
+    -------
+      >>> roster = get_roster(get_data_from_user("file.csv"))
+    """
+    roster = Roster()
+    for pokemon in list_of_pokemons:
+        roster.append_pokemon(pokemon)
+    return roster
 
 
 def get_pokemon_in_a_list_of_pokemons(coach_to_ask, list_of_pokemons):
@@ -84,7 +111,10 @@ def get_pokemon_in_a_list_of_pokemons(coach_to_ask, list_of_pokemons):
 
     This function is used in order to know the list of Pokemos that are
     associated to the coach. This function prints the result of this list, so
-    the user can select a Pokemon.
+    the user can select a Pokemon. The Pokemons are kept in a roster.Roster,
+    whose undefeated Pokemons are printed and searched by its index of IDs,
+    so each answer of the coach is checked in O(1). The coach is asked again
+    until the ID is of an undefeated Pokemon.
 
     Syntax
     ------
@@ -93,12 +123,12 @@ def get_pokemon_in_a_list_of_pokemons(coach_to_ask, list_of_pokemons):
     Parameters
     ----------
        [in] coach_to_ask Coach to ask for her/his list of Pokemons.
-       [in] list_of_pokemons List of the Pokemons that are associated to the
-                             coach.
+       [in] list_of_pokemons Roster of the Pokemons that are associated to
+                             the coach.
 
     Returns
     -------
-       List List of the Pokemons associaated to the coach that are undefeated.
+       PokemonRecord Record of the Pokemon selected in the Roster.
 
     Example
     -------
@@ -109,22 +139,17 @@ def get_pokemon_in_a_list_of_pokemons(coach_to_ask, list_of_pokemons):
     print('Coach ' + str(coach_to_ask) + ' select your Pokemon.')
     print('------------------------------------------------------------------')
     print('List of Pokemons:')
-    for pokemon in list_of_pokemons:
+    for pokemon in list_of_pokemons.iter_alive():
         print(pokemon)
+    find_pokemon = list_of_pokemons.get_by_id
     print('------------------------------------------------------------------')
-    pokemon_id = int(input('Select the ID of the Pokemon: '))
-    pokemon = None
-    for p in list_of_pokemons:
-        if p.get_id() == pokemon_id:  
-            pokemon = p
-            break
-    if pokemon is None:
+    pokemon = find_pokemon(int(input('Select the ID of the Pokemon: ')))
+    while pokemon is None or not pokemon.is_alive():
         print('Invalid Pokemon ID selected.')
-        get_pokemon_in_a_list_of_pokemons(coach_to_ask, list_of_pokemons)
-    else:
-        print('------------------------------------------------------------------')
-        print('Coach ' + str(coach_to_ask) + ' selected the Pokemon: ' + str(pokemon))
-        print('------------------------------------------------------------------')
+        pokemon = find_pokemon(int(input('Select the ID of the Pokemon: ')))
+    print('------------------------------------------------------------------')
+    print('Coach ' + str(coach_to_ask) + ' selected the Pokemon: ' + str(pokemon))
+    print('------------------------------------------------------------------')
     return pokemon
 
 
@@ -139,8 +164,9 @@ def coach_is_undefeated(list_of_pokemons):
 
     Parameters
     ----------
-       [in] list_of_pokemons List of the Pokemons that are associated to the
-                             coach.
+       [in] list_of_pokemons Roster of the Pokemons that are associated to
+                             the coach, whose count of undefeated Pokemons
+                             is read in O(1).
 
     Returns
     -------
@@ -152,27 +178,27 @@ def coach_is_undefeated(list_of_pokemons):
        >>> coach_is_undefeated(list_of_pokemons)
     """
     
-    defeated_pokemons = []
-    for pokemon in list_of_pokemons:
-        if pokemon.get_health_points() <= 0:
-            defeated_pokemons.append(pokemon)
-    if len(defeated_pokemons) == len(list_of_pokemons):
-        return True
-    else:
-        return False
+    return list_of_pokemons.get_alive_count() == 0
 
-def main():
+def main(damage_model='classic', profile_file=None):
     """Function main of the module.
 
-    The function main of this module is used to perform the Game.
+    The function main of this module is used to perform the Game. The model
+    of damage can be chosen in the command line, as in python main.py weapon,
+    and the Game is profiled with python main.py --profile game.prom.
 
     Syntax
     ------
-      [ ] = main()
+      [ ] = main(damage_model, profile_file)
 
     Parameters
     ----------
-      Null .
+      [in] damage_model Name of the model of damage of the Game in
+                        damage.DAMAGE_MODELS.
+      [in] profile_file File where the profile of the Game is written, in
+                        Prometheus text format if its name ends in .prom, or
+                        in JSON otherwise. By default the Game is not
+                        profiled.
 
     Returns
     -------
@@ -183,167 +209,103 @@ def main():
       >>> main()
     """
 
+    model = get_named_damage_model(damage_model)
+    profiler = Profiler()
+    if profile_file is not None:
+        profiler.enable()
     print("Welcome to the Game.")
     print("Let's start to set the configuration of each game user. \n")
 
     # Get configuration for Game User 1.
-    coach_1 = get_data_from_user('coach_1_pokemons.csv')
+    name_file_1 = 'coach_1_pokemons.csv'
+    coach_1 = get_data_from_user(name_file_1)
 
 
     # Get configuration for Game User 2.
-    coach_2 = get_data_from_user('coach_2_pokemons.csv')
+    name_file_2 = 'coach_2_pokemons.csv'
+    coach_2 = get_data_from_user(name_file_2)
 
     print("------------------------------------------------------------------")
     print("The Game starts...")
     print("------------------------------------------------------------------")
 
-    # Get a copy of the list of pokemons:
-    
-    list_of_pokemons_1 = coach_1.copy()
-    list_of_pokemons_2 = coach_2.copy()
-    
-    
-    # Choose first pokemons
-    eleccion_1_coach_1 = get_pokemon_in_a_list_of_pokemons(1, list_of_pokemons_1)
-    eleccion_1_coach_2 = get_pokemon_in_a_list_of_pokemons(2, list_of_pokemons_2)
-
-    # Main loop.
-    coach_stats = {1: [0, 0, 0], 2: [0, 0, 0]}
-    # First battle.
-    while not coach_is_undefeated(list_of_pokemons_1) and not coach_is_undefeated(list_of_pokemons_2):
-        pokemon_coach_1 = eleccion_1_coach_1
-        pokemon_coach_2 = eleccion_1_coach_2
-
-        print("------------------------------------------------------------------")
-        print("Coach 1 has selected " + str(pokemon_coach_1))
-        print("Coach 2 has selected " + str(pokemon_coach_2))
-        print("------------------------------------------------------------------")
-
-
-        while pokemon_coach_1.is_alive() > 0 and pokemon_coach_2.is_alive() > 0:
-            damage_1 = pokemon_coach_1.fight_attack(pokemon_coach_2)
-            damage_2 = pokemon_coach_2.fight_attack(pokemon_coach_1)
-            print("------------------------------------------------------------------")
-            print(str(pokemon_coach_1) + " attacks " + str(pokemon_coach_2) + " with " + str(damage_1) + " damage.")
-            print(str(pokemon_coach_2) + " attacks " + str(pokemon_coach_1) + " with " + str(damage_2) + " damage.")
-            pokemon_coach_1.fight_defense(damage_2)
-            pokemon_coach_2.fight_defense(damage_1)
-            print("------------------------------------------------------------------")
-
-
-        if pokemon_coach_1.get_health_points() <= 0:
-            print("Coach 2 wins this battle!")
-            ganador = 2
-            list_of_pokemons_1.remove(pokemon_coach_1)
-        else:
-            print("Coach 1 wins this battle!")
-            ganador = 1
-            list_of_pokemons_2.remove(pokemon_coach_2)
+    # The events of the battle are rendered and written at once when the
+    # sink is flushed, before each selection and at the end of the Game.
+    names = {pokemon.get_id(): pokemon.get_pokemon_name() for pokemon in coach_1 + coach_2}
+    sink = BufferedTextSink(sys.stdout, names=names)
+
+    # The battle is played with the records of a Roster per coach, so the
+    # health written by every hit keeps the count of undefeated Pokemons.
+    rosters = (None, get_roster(coach_1), get_roster(coach_2))
+    teams = (None, list(rosters[1]), list(rosters[2]))
+
+    def interactive_policy(coach, list_of_pokemons, opponent):
+        sink.flush()
+        record = get_pokemon_in_a_list_of_pokemons(coach, rosters[coach])
+        return teams[coach][record.get_index()]
+
+    # Main loop. The battle asks a coach for a Pokemon whenever its fighter
+    # is defeated, and the selections are recorded in a replay file.
+    with use_damage_model(model):
+        replay, result = record_battle(teams[1], teams[2], interactive_policy, sink=sink)
+    write_replay(REPLAY_FILE, replay)
+    sink.flush()
+    with ResultStore(RESULTS_FILE) as store:
+        store.add_pokemons(coach_1 + coach_2)
+        store.add_result(name_file_1, name_file_2, result)
+        win_rates = store.win_rate_by_weapon_type()
+
+    # The recording restores the health of the Pokemons, so the final one is
+    # set again for the statistics.
+    for team, health_points in ((teams[1], result.health_points_1), (teams[2], result.health_points_2)):
+        for pokemon, pokemon_health_points in zip(team, health_points):
+            pokemon.set_health_points(pokemon_health_points)
 
+    print("------------------------------------------------------------------")
+    print("The Game has end...")
+    print("------------------------------------------------------------------")
+    if result.winner == 0:
+        print("The Game ends in a draw.")
+    else:
+        print("Game User " + str(result.winner) + " wins after " + str(result.rounds) + " rounds.")
+    print("The Game can be replayed with: python replay.py " + REPLAY_FILE)
 
 
-    # Second battle.
-    eleccion_2_coach_1 = get_pokemon_in_a_list_of_pokemons(1, list_of_pokemons_1)
-    eleccion_2_coach_2 = get_pokemon_in_a_list_of_pokemons(2, list_of_pokemons_2)
 
-    while not coach_is_undefeated(list_of_pokemons_1) and not coach_is_undefeated(list_of_pokemons_2):
-        pokemon_coach_1 = eleccion_2_coach_1
-        pokemon_coach_2 = eleccion_2_coach_2
+    print("------------------------------------------------------------------")
+    print("Statistics")
+    print("------------------------------------------------------------------")
 
-        print("------------------------------------------------------------------")
-        print("Coach 1 has selected " + str(pokemon_coach_1))
-        print("Coach 2 has selected " + str(pokemon_coach_2))
-        print("------------------------------------------------------------------")
-    
-        while pokemon_coach_1.is_alive() > 0 and pokemon_coach_2.is_alive() > 0:
-            damage_1 = pokemon_coach_1.fight_attack(pokemon_coach_2)
-            damage_2 = pokemon_coach_2.fight_attack(pokemon_coach_1)
+    # Printing the statistics of the undefeated Pokemons of each coach.
+    for game_user in (1, 2):
+        print("Game User " + str(game_user) + ":")
+        if coach_is_undefeated(rosters[game_user]):
+            print("All the Pokemons have been defeated.")
+        for pokemon in rosters[game_user].iter_alive():
             print("------------------------------------------------------------------")
-            print(str(pokemon_coach_1) + " attacks " + str(pokemon_coach_2) + " with " + str(damage_1) + " damage.")
-            print(str(pokemon_coach_2) + " attacks " + str(pokemon_coach_1) + " with " + str(damage_2) + " damage.")
-            pokemon_coach_1.fight_defense(damage_2)
-            pokemon_coach_2.fight_defense(damage_1)
+            print("Pokemon: " + str(pokemon))
+            print("Health Points: " + str(pokemon.get_health_points()))
             print("------------------------------------------------------------------")
 
+    # Printing the share of duels won by each weapon in every stored Game.
+    print("Duels won by weapon in " + RESULTS_FILE + ":")
+    for win_rate in win_rates:
+        print(win_rate.key.name + ": " + str(win_rate.wins) + " of "
+              + str(win_rate.wins + win_rate.losses + win_rate.draws))
 
-        if pokemon_coach_1.get_health_points() <= 0:
-            print("Coach 2 wins this battle!")
-            ganador = 2
-            list_of_pokemons_1.remove(pokemon_coach_1)
-        else:
-            print("Coach 1 wins this battle!")
-            ganador = 1
-            list_of_pokemons_2.remove(pokemon_coach_2)
-
-
-    
-    # Third battle.
-    eleccion_3_coach_1 = get_pokemon_in_a_list_of_pokemons(1, list_of_pokemons_1)
-    eleccion_3_coach_2 = get_pokemon_in_a_list_of_pokemons(2, list_of_pokemons_2)
-    while not coach_is_undefeated(list_of_pokemons_1) and not coach_is_undefeated(list_of_pokemons_2):
-        pokemon_coach_1 = eleccion_3_coach_1
-        pokemon_coach_2 = eleccion_3_coach_2
-
-        print("------------------------------------------------------------------")
-        print("Coach 1 has selected " + str(pokemon_coach_1))
-        print("Coach 2 has selected " + str(pokemon_coach_2))
-        print("------------------------------------------------------------------")
-    
-        while pokemon_coach_1.is_alive() > 0 and pokemon_coach_2.is_alive() > 0:
-            damage_1 = pokemon_coach_1.fight_attack(pokemon_coach_2)
-            damage_2 = pokemon_coach_2.fight_attack(pokemon_coach_1)
-            print("------------------------------------------------------------------")
-            print(str(pokemon_coach_1) + " attacks " + str(pokemon_coach_2) + " with " + str(damage_1) + " damage.")
-            print(str(pokemon_coach_2) + " attacks " + str(pokemon_coach_1) + " with " + str(damage_2) + " damage.")
-            pokemon_coach_1.fight_defense(damage_2)
-            pokemon_coach_2.fight_defense(damage_1)
-            print("------------------------------------------------------------------")
-
-
-            if pokemon_coach_1.get_health_points() <= 0:
-                print("Coach 2 wins this battle!")
-                ganador = 2
-                list_of_pokemons_1.remove(pokemon_coach_1)
-            else:
-                print("Coach 1 wins this battle!")
-                ganador = 1
-                list_of_pokemons_2.remove(pokemon_coach_2)
-
-                
-                 
-
-
-    print("------------------------------------------------------------------")
-    print("The Game has end...")
-    print("------------------------------------------------------------------")
-    
-    
-
-    print("------------------------------------------------------------------")
-    print("Statistics")
-    print("------------------------------------------------------------------")
-    print("Game User 1:")
-    
-    # Printing the statistics of the first coach.
-
-    for pokemon in list_of_pokemons_1:
-        print("------------------------------------------------------------------")
-        print("Pokemon: " + str(pokemon))
-        print("Health Points: " + str(pokemon.get_health_points()))
-        
-        print("------------------------------------------------------------------")
-    print("Game User 2:")
-    
-    for pokemon in list_of_pokemons_2:
-        print("------------------------------------------------------------------")
-        print("Pokemon: " + str(pokemon))
-        print("Health Points: " + str(pokemon.get_health_points()))
-        print("------------------------------------------------------------------")
+    if profile_file is not None:
+        profiler.disable()
+        profiler.write(profile_file)
+        print("The profile of the Game has been written in " + profile_file)
 
 
 # Checking whether this module is executed just itself alone.
 if __name__ == "__main__":
-    main()
+    parser = argparse.ArgumentParser(description='The Game.')
+    parser.add_argument('damage_model', nargs='?', default='classic', help='name of the model of damage')
+    parser.add_argument('--profile', help='file where the profile of the Game is written')
+    options = parser.parse_args()
+    main(options.damage_model, options.profile)
 
 
 # EOF
@@ -0,0 +1,482 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+
+"""
+This Python module contains the matchup matrix of a roster.
+
+@contents :  This module contains the table of the probabilities of winning
+             of every Pokemon of a roster against every other one, computed
+             in blocks with NumPy, its incremental update and persistence,
+             and the test cases to probe its functionality.
+@project :  N/A
+@program :  N/A
+@file :  matchup_matrix.py
+@author :  Antonio Artes Garcia (antonio.artesgarcia@ceu.es)
+           Francisco Hernando Gallego (francisco.hernandogallego@ceu.es)
+           Ruben Juarez Cadiz (ruben.juarezcadiz@ceu.es)
+
+@version :  0.0.1, 08 November 2021
+@information :  The Zen of Python
+                  https://www.python.org/dev/peps/pep-0020/
+                Style Guide for Python Code
+                  https://www.python.org/dev/peps/pep-0008/
+                Example NumPy Style Python Docstrings
+                  http://sphinxcontrib-napoleon.readthedocs.io/en/latest/example_numpy.html
+                doctest – Testing through documentation
+                  https://pymotw.com/2/doctest/
+
+@copyright :  Copyright 2021 GNU AFFERO GENERAL PUBLIC.
+              All rights are reserved. Reproduction in whole or in part is
+              prohibited without the written consent of the copyright owner.
+"""
+
+
+# Source packages.
+
+import os
+import tempfile
+import time
+import numpy as np
+import duel_markov
+from damage import WEAPON_TYPES, class_code, get_damage_model, get_damage_model_name, weapon_code
+from pokemon import Pokemon
+from pokemon_air import PokemonAir
+from roster import POKEMON_CLASSES
+from weapon_type import WeaponType
+
+
+# Number of hits of a Pokemon that cannot damage its opponent.
+_NEVER = np.iinfo(np.int64).max
+
+
+def _pokemon_stats(pokemons):
+    """Function to obtain the IDs and the stats of a roster as arrays.
+
+    The roster can be a list of Pokemons or a Roster. The stats are the
+    health, the attack, the defense, the probability of dodging a hit and the
+    codes of the weapon and of the class in the damage table.
+    """
+    if hasattr(pokemons, 'get_column'):
+        dodges = np.array([pokemon_class.dodge_probability if issubclass(pokemon_class, PokemonAir) else 0.0
+                           for pokemon_class in POKEMON_CLASSES])
+        # The Roster stores the value of the weapon and the code of the class
+        # in POKEMON_CLASSES, which has the order of damage.CLASS_NAMES.
+        weapon_codes = np.zeros(max(weapon_type.value for weapon_type in WEAPON_TYPES) + 1, dtype=np.int64)
+        for weapon_type in WEAPON_TYPES:
+            weapon_codes[weapon_type.value] = weapon_code(weapon_type)
+        class_codes = np.asarray(pokemons.get_column('class'), dtype=np.intp)
+        return (np.asarray(pokemons.get_column('id'), dtype=np.int64),
+                (np.asarray(pokemons.get_column('health_points'), dtype=np.int64),
+                 np.asarray(pokemons.get_column('attack_rating'), dtype=np.int64),
+                 np.asarray(pokemons.get_column('defense_rating'), dtype=np.int64),
+                 dodges[class_codes],
+                 weapon_codes[np.asarray(pokemons.get_column('weapon_type'), dtype=np.intp)],
+                 class_codes.astype(np.int64)))
+    return (np.array([pokemon.get_id() for pokemon in pokemons], dtype=np.int64),
+            (np.array([pokemon.get_health_points() for pokemon in pokemons], dtype=np.int64),
+             np.array([pokemon.get_attack_rating() for pokemon in pokemons], dtype=np.int64),
+             np.array([pokemon.get_defense_rating() for pokemon in pokemons], dtype=np.int64),
+             np.array([duel_markov.dodge_probability(pokemon) for pokemon in pokemons], dtype=np.float64),
+             np.array([weapon_code(pokemon.get_weapon_type()) for pokemon in pokemons], dtype=np.int64),
+             np.array([class_code(type(pokemon)) for pokemon in pokemons], dtype=np.int64)))
+
+
+def _stochastic_wins(hits_1, hits_2, hit_1, hit_2, chunk_size=4096):
+    """Function to compute the probabilities of winning of duels with dodges.
+
+    In every round each Pokemon hits with its own probability, independently
+    of the other one, so the round X in which the Pokemon 1 lands its hits_1
+    hits and the round Y in which the Pokemon 2 lands its hits_2 hits are
+    independent negative binomial variables, and the Pokemon 1 wins when
+    X < Y. The distribution of X is computed once for every different pair
+    (hits, probability), up to a round where its tail is negligible, and
+    P(X < Y) is the sum over t of P(X = t) * P(Y > t).
+    """
+    hits = np.concatenate([hits_1, hits_2])
+    probabilities = np.concatenate([hit_1, hit_2])
+    never = (hits == _NEVER) | (probabilities <= 0.0)
+    # A Pokemon that never lands its hits is given the key (1, 0.0).
+    hits = np.where(never, 1, hits)
+    probabilities = np.where(never, 0.0, probabilities)
+    values, codes = np.unique(probabilities, return_inverse=True)
+    unique, inverse = np.unique(hits * len(values) + codes.ravel(), return_inverse=True)
+    inverse = inverse.ravel()
+    unique_hits = (unique // len(values)).astype(np.float64)[:, None]
+    unique_probabilities = values[unique % len(values)][:, None]
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        last = int(np.max(np.where(unique_probabilities > 0.0,
+                                   (unique_hits + 12.0 * np.sqrt(unique_hits * (1.0 - unique_probabilities)))
+                                   / unique_probabilities, 0.0))) + 20
+        rounds = np.arange(last + 1, dtype=np.float64)[None, :]
+        reached = rounds >= unique_hits
+        steps = np.where(rounds > unique_hits - 1,
+                         np.log(rounds) - np.log(rounds - unique_hits + 1) + np.log1p(-unique_probabilities),
+                         0.0)
+        steps = np.where(np.isnan(steps), -np.inf, steps)
+        # Logarithm of P(X = t): hits * log(p) plus the steps of the rounds
+        # from hits to t - 1.
+        log_pmf = np.cumsum(steps, axis=1)
+        log_pmf = np.concatenate([np.zeros((len(unique), 1)), log_pmf[:, :-1]], axis=1)
+        log_pmf += unique_hits * np.log(unique_probabilities)
+    pmf = np.where(reached, np.exp(log_pmf), 0.0)
+    survival = np.cumsum(pmf[:, ::-1], axis=1)[:, ::-1] - pmf
+
+    position_never = unique_probabilities[:, 0] == 0.0
+    pmf[position_never] = 0.0
+    survival[position_never] = 1.0
+
+    # Many duels share the pair of distributions, so each pair is summed once.
+    count = len(hits_1)
+    pairs, pair_inverse = np.unique(inverse[:count] * len(unique) + inverse[count:], return_inverse=True)
+    rows_1 = pairs // len(unique)
+    rows_2 = pairs % len(unique)
+    wins = np.empty(len(pairs), dtype=np.float64)
+    for start in range(0, len(pairs), chunk_size):
+        stop = start + chunk_size
+        wins[start:stop] = np.einsum('ij,ij->i', pmf[rows_1[start:stop]], survival[rows_2[start:stop]])
+    return wins[pair_inverse.ravel()]
+
+
+def _win_probabilities(stats_rows, stats_columns, model):
+    """Function to compute a block of the matchup matrix.
+
+    The element (i, j) is the probability that the Pokemon i of the rows
+    defeats the Pokemon j of the columns. Without dodges the duel is decided
+    by the number of hits that each Pokemon needs, and the pairs with dodges
+    are solved by _stochastic_wins(). The damages are looked up in the table
+    of the damage model.
+    """
+    health_rows, attack_rows, defense_rows, dodge_rows, weapon_rows, class_rows = stats_rows
+    health_columns, attack_columns, defense_columns, dodge_columns, weapon_columns, class_columns = stats_columns
+
+    damage_rows = model.get_damage_array(weapon_rows[:, None], class_rows[:, None], attack_rows[:, None],
+                                         class_columns[None, :], defense_columns[None, :])
+    damage_columns = model.get_damage_array(weapon_columns[None, :], class_columns[None, :],
+                                            attack_columns[None, :], class_rows[:, None],
+                                            defense_rows[:, None])
+    hits_rows = np.where(damage_rows > 0, -(-health_columns[None, :] // np.maximum(damage_rows, 1)), _NEVER)
+    hits_columns = np.where(damage_columns > 0, -(-health_rows[:, None] // np.maximum(damage_columns, 1)), _NEVER)
+    win = (hits_rows < hits_columns).astype(np.float32)
+
+    stochastic = (((dodge_rows[:, None] > 0.0) | (dodge_columns[None, :] > 0.0))
+                  & ((damage_rows > 0) | (damage_columns > 0)))
+    rows, columns = np.nonzero(stochastic)
+    if len(rows):
+        win[rows, columns] = _stochastic_wins(hits_rows[rows, columns], hits_columns[rows, columns],
+                                              1.0 - dodge_columns[columns], 1.0 - dodge_rows[rows])
+    return win
+
+
+def _take(stats, positions):
+    return tuple(column[positions] for column in stats)
+
+
+class MatchupMatrix():
+    """Python class to implement the matchup matrix of a roster.
+
+    This Python class holds the probability that each Pokemon of a roster
+    defeats each other one in a duel starting with full health. The element
+    (i, j) is the probability that the Pokemon i wins; as both Pokemons
+    attack in every round, the probability that the Pokemon j wins is the
+    element (j, i), and the rest is the probability of a draw. The Pokemons
+    are found by their ID with a dictionary, and the best counter of every
+    Pokemon is computed once, so the queries are index lookups. The matrix
+    keeps the name of the damage model that computed it.
+
+    Syntax
+    ------
+      obj = MatchupMatrix(ids, stats, win, damage_model)
+
+    Parameters
+    ----------
+      [in] ids Array of the IDs of the Pokemons.
+      [in] stats Tuple of arrays of the health, attack, defense,
+                 probability of dodging and codes of the weapon and of the
+                 class of the Pokemons.
+      [in] win Square array of the probabilities of winning.
+      [in] damage_model Name of the model of damage in damage.DAMAGE_MODELS.
+
+    Returns
+    -------
+      obj Python object output parameter that represents an instance
+          of the class MatchupMatrix.
+
+    Attributes
+    ----------
+
+    Example
+    -------
+      >>> matrix = build_matchup_matrix(get_data_from_user("file.csv"))
+      >>> id_pokemon, probability = matrix.best_counter(24)
+    """
+
+    def __init__(self, ids, stats, win, damage_model):
+        self.__ids = ids
+        self.__stats = stats
+        self.__win = win
+        self.__damage_model = damage_model
+        self.__index = {id_pokemon: position for position, id_pokemon in enumerate(ids.tolist())}
+        self.__best = np.argmax(win, axis=0) if len(ids) else np.empty(0, dtype=np.intp)
+
+    def __len__(self):
+        return len(self.__ids)
+
+    def get_ids(self):
+        return self.__ids
+
+    def get_stats(self):
+        return self.__stats
+
+    def get_matrix(self):
+        return self.__win
+
+    def get_damage_model_name(self):
+        return self.__damage_model
+
+    def get_position(self, id_pokemon):
+        return self.__index[id_pokemon]
+
+    def get_win_probability(self, id_pokemon_1, id_pokemon_2):
+        return float(self.__win[self.__index[id_pokemon_1], self.__index[id_pokemon_2]])
+
+    def get_draw_probability(self, id_pokemon_1, id_pokemon_2):
+        position_1 = self.__index[id_pokemon_1]
+        position_2 = self.__index[id_pokemon_2]
+        return float(1.0 - self.__win[position_1, position_2] - self.__win[position_2, position_1])
+
+    def best_counter(self, id_pokemon):
+        """Method to obtain the Pokemon most likely to defeat a Pokemon.
+
+        Returns the tuple (id_pokemon, probability).
+        """
+        position = self.__index[id_pokemon]
+        best = self.__best[position]
+        return int(self.__ids[best]), float(self.__win[best, position])
+
+    def best_counters(self, id_pokemon, count):
+        """Method to obtain the count Pokemons most likely to defeat a Pokemon.
+
+        Returns a list of tuples (id_pokemon, probability), the best first.
+        """
+        column = self.__win[:, self.__index[id_pokemon]]
+        count = min(count, len(column))
+        best = np.argpartition(-column, count - 1)[:count]
+        best = best[np.argsort(-column[best], kind='stable')]
+        return [(int(self.__ids[position]), float(column[position])) for position in best]
+
+    def update(self, pokemons, block_size=512):
+        """Method to obtain the matchup matrix of a roster that has changed.
+
+        Only the rows and the columns of the Pokemons whose ID is new or
+        whose stats have changed are computed again; the rest of the matrix
+        is copied. If the current damage model is not the one of the matrix,
+        the whole matrix is computed again with it.
+        """
+        model = get_damage_model()
+        if get_damage_model_name(model) != self.__damage_model:
+            return build_matchup_matrix(pokemons, block_size)
+        ids, stats = _pokemon_stats(pokemons)
+        count = len(ids)
+        old_positions = np.array([self.__index.get(id_pokemon, -1) for id_pokemon in ids.tolist()],
+                                 dtype=np.intp)
+        same = old_positions >= 0
+        for column, old_column in zip(stats, self.__stats):
+            same[same] &= column[same] == old_column[old_positions[same]]
+        kept = np.nonzero(same)[0]
+        changed = np.nonzero(~same)[0]
+
+        win = np.empty((count, count), dtype=np.float32)
+        win[np.ix_(kept, kept)] = self.__win[np.ix_(old_positions[kept], old_positions[kept])]
+        for start in range(0, len(changed), block_size):
+            block = changed[start:start + block_size]
+            win[block, :] = _win_probabilities(_take(stats, block), stats, model)
+            win[:, block] = _win_probabilities(stats, _take(stats, block), model)
+        return MatchupMatrix(ids, stats, win, self.__damage_model)
+
+    def save(self, name_file):
+        """Method to write the matchup matrix to a file of NumPy."""
+        health_points, attack_rating, defense_rating, dodge, weapon, pokemon_class = self.__stats
+        with open(name_file, 'wb') as matrix_file:
+            np.savez(matrix_file, ids=self.__ids, health_points=health_points,
+                     attack_rating=attack_rating, defense_rating=defense_rating,
+                     dodge=dodge, weapon=weapon, pokemon_class=pokemon_class, win=self.__win,
+                     damage_model=np.array(self.__damage_model))
+
+
+def build_matchup_matrix(pokemons, block_size=512):
+    """Function to compute the matchup matrix of a roster.
+
+    The matrix is computed in blocks of block_size rows against the whole
+    roster, so the temporary arrays take O(block_size * N) memory, with the
+    current damage model, which must be one of damage.DAMAGE_MODELS.
+
+    Syntax
+    ------
+       [ ] = build_matchup_matrix(pokemons, block_size)
+
+    Parameters
+    ----------
+       [in] pokemons List of Pokemons or Roster.
+       [in] block_size Number of rows computed at once.
+
+    Returns
+    -------
+       MatchupMatrix Matchup matrix of the roster.
+
+    Example
+    -------
+       >>> matrix = build_matchup_matrix(get_data_from_user("file.csv"))
+    """
+    model = get_damage_model()
+    damage_model = get_damage_model_name(model)
+    ids, stats = _pokemon_stats(pokemons)
+    count = len(ids)
+    win = np.empty((count, count), dtype=np.float32)
+    for start in range(0, count, block_size):
+        block = np.arange(start, min(start + block_size, count))
+        win[start:start + len(block), :] = _win_probabilities(_take(stats, block), stats, model)
+    return MatchupMatrix(ids, stats, win, damage_model)
+
+
+def load_matchup_matrix(name_file):
+    """Function to read a matchup matrix written with MatchupMatrix.save().
+
+    Syntax
+    ------
+       [ ] = load_matchup_matrix(name_file)
+
+    Parameters
+    ----------
+       [in] name_file Name of the file.
+
+    Returns
+    -------
+       MatchupMatrix Matchup matrix of the file.
+
+    Example
+    -------
+       >>> matrix = load_matchup_matrix("matchups.npz")
+    """
+    with np.load(name_file) as data:
+        return MatchupMatrix(data['ids'], (data['health_points'], data['attack_rating'],
+                                           data['defense_rating'], data['dodge'], data['weapon'],
+                                           data['pokemon_class']), data['win'], str(data['damage_model']))
+
+
+
+def main():
+    """Function main of the module.
+
+    The function main of this module is used to test the matchup matrix that
+    is described in this module.
+
+    Syntax
+    ------
+      [ ] = main()
+
+    Parameters
+    ----------
+      Null .
+
+    Returns
+    -------
+      Null .
+
+    Example
+    -------
+      >>> main()
+    """
+    from main import get_data_from_user
+
+    print("=================================================================.")
+    print("Test Case 1: Compute the matchup matrix of the rosters.")
+    print("=================================================================.")
+    pokemons = get_data_from_user("coach_1_pokemons.csv") + get_data_from_user("coach_2_pokemons.csv")
+    matrix = build_matchup_matrix(pokemons, block_size=2)
+
+    errors = [abs(matrix.get_win_probability(pokemon_1.get_id(), pokemon_2.get_id())
+                  - duel_markov.solve_duel(pokemon_1, pokemon_2).win_1)
+              for pokemon_1 in pokemons for pokemon_2 in pokemons]
+    if len(matrix) == 6 and max(errors) < 1e-6:
+        print("Test PASS. The function build_matchup_matrix() has been implemented correctly.")
+    else:
+        print("Test FAIL. Check the function build_matchup_matrix()." + " RESULT: " + str(max(errors)))
+
+    column = [duel_markov.solve_duel(pokemon, pokemons[3]).win_1 for pokemon in pokemons]
+    id_pokemon, probability = matrix.best_counter(24)
+    if (abs(probability - max(column)) < 1e-6
+            and matrix.best_counters(24, 2)[0] == (id_pokemon, probability)):
+        print("Test PASS. The best counter to the ID 24 is the ID " + str(id_pokemon) + ".")
+    else:
+        print("Test FAIL. Check the method best_counter().")
+
+
+    print("=================================================================.")
+    print("Test Case 2: Update the matrix when a Pokemon changes.")
+    print("=================================================================.")
+    pokemons[1] = Pokemon(12, "Pidgey", WeaponType.KICK, 85, 9, 7)
+    pokemons.append(PokemonAir(27, "Zubat", WeaponType.KICK, 60, 10, 5))
+    del pokemons[0]
+    updated = matrix.update(pokemons)
+    rebuilt = build_matchup_matrix(pokemons)
+
+    if (np.array_equal(updated.get_ids(), rebuilt.get_ids())
+            and np.allclose(updated.get_matrix(), rebuilt.get_matrix())):
+        print("Test PASS. The method update() has been implemented correctly.")
+    else:
+        print("Test FAIL. Check the method update().")
+
+    name_file = os.path.join(tempfile.mkdtemp(), "matchups.npz")
+    updated.save(name_file)
+    loaded = load_matchup_matrix(name_file)
+    if np.array_equal(loaded.get_matrix(), updated.get_matrix()) and loaded.best_counter(24) == updated.best_counter(24):
+        print("Test PASS. The matrix has been saved and loaded correctly.")
+    else:
+        print("Test FAIL. Check the method save().")
+
+    # The matrix of another damage model is computed again instead of mixed.
+    import damage
+    with damage.use_damage_model(damage.WEAPON_DAMAGE):
+        weapon_matrix = updated.update(pokemons)
+        weapon_rebuilt = build_matchup_matrix(pokemons)
+    weapon_matrix.save(name_file)
+    loaded = load_matchup_matrix(name_file)
+    if (loaded.get_damage_model_name() == 'weapon' and updated.get_damage_model_name() == 'classic'
+            and np.array_equal(weapon_matrix.get_matrix(), weapon_rebuilt.get_matrix())
+            and np.allclose(loaded.update(pokemons).get_matrix(), rebuilt.get_matrix())
+            and not np.array_equal(weapon_rebuilt.get_matrix(), rebuilt.get_matrix())):
+        print("Test PASS. The damage model of the matrix has been kept.")
+    else:
+        print("Test FAIL. Check the field damage_model of the class MatchupMatrix().")
+    os.remove(name_file)
+    os.rmdir(os.path.dirname(name_file))
+
+
+    print("=================================================================.")
+    print("Test Case 3: Compute the matrix of a roster of 2000 Pokemons.")
+    print("=================================================================.")
+    rng = np.random.default_rng(7)
+    classes = (Pokemon, PokemonAir)
+    pokemons = [classes[index % 2](index, "Pokemon", WeaponType.KICK, int(health), int(attack), int(defense))
+                for index, (health, attack, defense) in enumerate(zip(rng.integers(50, 100, 2000),
+                                                                      rng.integers(1, 11, 2000),
+                                                                      rng.integers(1, 11, 2000)))]
+    start = time.perf_counter()
+    matrix = build_matchup_matrix(pokemons)
+    elapsed = time.perf_counter() - start
+
+    if len(matrix) == 2000 and elapsed < 5.0:
+        print("Test PASS. The matrix of 4000000 duels was computed in " + str(round(elapsed, 2)) + " s.")
+    else:
+        print("Test FAIL. The matrix of 4000000 duels was computed in " + str(round(elapsed, 2)) + " s.")
+
+
+
+# Checking whether this module is executed just itself alone.
+if __name__ == "__main__":
+    main()
+
+
+# EOF
@@ -1,6 +1,8 @@
 #!/usr/bin/env python
 # -*- coding: utf-8 -*-
 
+from damage import attack_key, defense_key, hit_damage
+from id_registry import IdRegistry
 from weapon_type import WeaponType
 
 
@@ -55,6 +57,8 @@ class Pokemon():
     [in] health_points Points of health that the Pokemon has.
     [in] attack_rating Attack rating of the Pokemon.
     [in] defense_rating Defense rating of the Pokemon.
+    [in] registry IdRegistry where the ID is registered. By default the
+                  registry Pokemon.pokemon_ids shared by every Pokemon.
 
     Returns
     -------
@@ -67,12 +71,18 @@ class Pokemon():
     Example
     -------
     >>> from pokemon import Pokemon
+    >>> from id_registry import IdRegistry
     >>> from weapon_type import WeaponType
     >>> obj_Pokemon = Pokemon(1, "Bulbasaur", WeaponType.PUNCH, 100, 7, 10)
     """
-    pokemon_ids = []
+    pokemon_ids = IdRegistry()
 
-    def __init__(self, id_pokemon , pokemon_name, weapon_type, health_points, attack_rating, defense_rating):
+    # The attributes are kept in slots instead of a __dict__ per object.
+    __slots__ = ('__id_pokemon', '__pokemon_name', '__weapon_type',
+                 '__health_points', '__attack_rating', '__defense_rating',
+                 '__registry', '__attack_key', '__defense_key')
+
+    def __init__(self, id_pokemon , pokemon_name, weapon_type, health_points, attack_rating, defense_rating, registry=None):
         self.__id_pokemon = id_pokemon
         self.__pokemon_name = pokemon_name
         self.__weapon_type = weapon_type
@@ -80,14 +90,29 @@ class Pokemon():
         self.__attack_rating = attack_rating
         self.__defense_rating = defense_rating
         
-
-        Pokemon.pokemon_ids.append(id_pokemon)
+        # The weapon is checked before the ID is registered, so a rejected
+        # Pokemon does not keep its ID in use.
+        if not isinstance(weapon_type, WeaponType):
+            raise ValueError('El tipo de arma debe ser uno de WeaponType: '
+                             + ', '.join(weapon.name for weapon in WeaponType))
+
+        if registry is None:
+            registry = Pokemon.pokemon_ids
+        # The registry is kept only once the ID is registered, so a
+        # duplicated ID is not released by __del__().
+        registry.register(id_pokemon)
+        self.__registry = registry
+        # Parts of the index of the damage table, see damage.hit_damage().
+        self.__attack_key = attack_key(type(self), weapon_type, attack_rating)
+        self.__defense_key = defense_key(type(self), defense_rating)
 
     def __str__(self):
         return f'Pokemon ID ' + str(self.get_id()) + ' with name ' + self.get_pokemon_name() + ' has as weapon ' + self.get_weapon_type().name + ' and health ' + str(self.get_health_points())
     
     def __del__(self):
-        Pokemon.pokemon_ids.remove(self.__id_pokemon)
+        registry = getattr(self, '_Pokemon__registry', None)
+        if registry is not None:
+            registry.release(self.__id_pokemon)
 
     
     def get_id(self):
@@ -107,6 +132,12 @@ class Pokemon():
     
     def get_defense_rating(self):
         return self.__defense_rating
+
+    def get_attack_key(self):
+        return self.__attack_key
+
+    def get_defense_key(self):
+        return self.__defense_key
     
     # solo se pueden modificar los puntos de salud
     def set_health_points(self, health_points):
@@ -122,16 +153,20 @@ class Pokemon():
             return False
         
     
-    def fight_defense(self, points_of_damage):
-        if self.get_defense_rating() >= points_of_damage:
+    # recibe un golpe cuyo dano ya descuenta la defensa
+    def take_hit(self, damage):
+        if damage <= 0:
             return False
         else:
-            self.set_health_points(self.get_health_points() - (points_of_damage - self.get_defense_rating()))
+            self.set_health_points(self.get_health_points() - damage)
             return True
 
+    def fight_defense(self, points_of_damage):
+        return self.take_hit(points_of_damage - self.get_defense_rating())
+
 
     def fight_attack(self, pokemon_to_attack):
-        if pokemon_to_attack.fight_defense(self.get_attack_rating()):
+        if pokemon_to_attack.take_hit(hit_damage(self, pokemon_to_attack)):
             return True
         else:
             return False
@@ -252,6 +287,51 @@ def main():
             print("Test FAIL. Check the method fight_attack().")
 
 
+    print("=================================================================.")
+    print("Test Case 6: Register the ID in the registry of a game.")
+    print("=================================================================.")
+    registry = IdRegistry(unique=True)
+    pokemon_7 = Pokemon(7, "Blastoise", WeaponType.KICK, 99, 9, 8, registry)
+
+    if 7 in registry and 7 not in Pokemon.pokemon_ids:
+        print("Test PASS. The ID has been registered in the registry of the game.")
+    else:
+        print("Test FAIL. Check the method __init__().")
+
+    try:
+        Pokemon(7, "Wartortle", WeaponType.KICK, 99, 9, 8, registry)
+        duplicated = False
+    except ValueError:
+        duplicated = True
+
+    if duplicated and 7 in registry:
+        print("Test PASS. A duplicated ID has been rejected without releasing the first one.")
+    else:
+        print("Test FAIL. Check the methods __init__() and __del__().")
+
+    del pokemon_7
+
+    if 7 not in registry:
+        print("Test PASS. The ID has been released from the registry of the game.")
+    else:
+        print("Test FAIL. Check the method __del__().")
+
+
+    print("=================================================================.")
+    print("Test Case 7: Reject a weapon that is not a WeaponType.")
+    print("=================================================================.")
+    try:
+        Pokemon(8, "Charmander", "SWORD", 99, 9, 8, registry)
+        rejected = False
+    except ValueError:
+        rejected = True
+
+    if rejected and 8 not in registry:
+        print("Test PASS. The weapon has been rejected without registering the ID.")
+    else:
+        print("Test FAIL. Check the method __init__().")
+
+
 
 # Checking whether this module is executed just itself alone.
 if __name__ == "__main__":
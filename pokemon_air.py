@@ -33,8 +33,8 @@ this Python class.
 
 # Source packages.
 
-import random
 from pokemon import Pokemon
+from rng import get_uniform
 from weapon_type import WeaponType
 
 class PokemonAir(Pokemon):
@@ -55,6 +55,8 @@ class PokemonAir(Pokemon):
       [in] health_points Points of health that the Pokemon has.
       [in] attack_rating Attack rating of the Pokemon.
       [in] defense_rating Defense rating of the Pokemon.
+      [in] registry IdRegistry where the ID is registered. By default the
+                    registry Pokemon.pokemon_ids shared by every Pokemon.
 
     Returns
     -------
@@ -70,8 +72,13 @@ class PokemonAir(Pokemon):
       >>> from weapon_type import WeaponType
       >>> obj_Pokemon = PokemonEarth(1, "Pidgey", WeaponType.PUNCH, 100, 7, 10)
     """
-    def __init__(self,id_pokemon ,pokemon_name, weapon_type, health_points, attack_rating, defense_rating):
-        super().__init__(id_pokemon, pokemon_name, weapon_type, health_points, attack_rating, defense_rating)
+    # Probability of dodging an attack in take_hit().
+    dodge_probability = 0.5
+
+    __slots__ = ()
+
+    def __init__(self,id_pokemon ,pokemon_name, weapon_type, health_points, attack_rating, defense_rating, registry=None):
+        super().__init__(id_pokemon, pokemon_name, weapon_type, health_points, attack_rating, defense_rating, registry)
  
         
        
@@ -79,18 +86,13 @@ class PokemonAir(Pokemon):
         return f'Pokemon ID ' + str(self.get_id()) + ' with name ' + self.get_pokemon_name() + ' has as weapon ' + self.get_weapon_type().name + ' and health ' + str(self.get_health_points())
 
 
-    def fight_defense(self, points_of_damage):
-        if random.random() < 0.5:
-            return False
-            
-        if self.get_defense_rating() >= points_of_damage:
+    def take_hit(self, damage):
+        if get_uniform()() < self.dodge_probability:
             return False
-        
-        else:
-            self.set_health_points(self.get_health_points() - (points_of_damage - self.get_defense_rating()))
-            return True
-        
-        
+
+        return super().take_hit(damage)
+
+
 def main():
     """Function main of the module.
 
@@ -54,6 +54,8 @@ class PokemonEarth(Pokemon):
       [in] health_points Points of health that the Pokemon has.
       [in] attack_rating Attack rating of the Pokemon.
       [in] defense_rating Defense rating of the Pokemon.
+      [in] registry IdRegistry where the ID is registered. By default the
+                    registry Pokemon.pokemon_ids shared by every Pokemon.
 
     Returns
     -------
@@ -69,12 +71,18 @@ class PokemonEarth(Pokemon):
       >>> from weapon_type import WeaponType
       >>> obj_Pokemon = PokemonEarth(1, "Diglett", WeaponType.PUNCH, 100, 7, 10)
     """
-    
-    def __init__(self, id_pokemon, pokemon_name, weapon_type, health_points, attack_rating, defense_index):
-        super().__init__(id_pokemon, pokemon_name, weapon_type, health_points, attack_rating, defense_index)
-        self.__defense_index = defense_index
-        if self.__defense_index < 11 or self.__defense_index > 20:
-            raise ValueError('El índice de defensa debe estar entre 11 y 20')
+    # Range of the defense index of a PokemonEarth.
+    min_defense_index = 11
+    max_defense_index = 20
+
+    # The defense index is the defense rating, so it needs no slot of its own.
+    __slots__ = ()
+
+    def __init__(self, id_pokemon, pokemon_name, weapon_type, health_points, attack_rating, defense_index, registry=None):
+        super().__init__(id_pokemon, pokemon_name, weapon_type, health_points, attack_rating, defense_index, registry)
+        if defense_index < self.min_defense_index or defense_index > self.max_defense_index:
+            raise ValueError('El índice de defensa debe estar entre ' + str(self.min_defense_index)
+                             + ' y ' + str(self.max_defense_index))
         
         
     def __str__(self):
@@ -82,7 +90,7 @@ class PokemonEarth(Pokemon):
     
 
     def get_defense_index(self):
-        return self.__defense_index
+        return self.get_defense_rating()
    
 
 def main():
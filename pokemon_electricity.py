@@ -31,8 +31,8 @@ this Python class.
 
 # Source packages.
 
-import random
 from pokemon import Pokemon
+from rng import get_uniform
 from weapon_type import WeaponType
 
 class PokemonElectricity(Pokemon):
@@ -53,6 +53,8 @@ class PokemonElectricity(Pokemon):
       [in] health_points Points of health that the Pokemon has.
       [in] attack_rating Attack rating of the Pokemon.
       [in] defense_rating Defense rating of the Pokemon.
+      [in] registry IdRegistry where the ID is registered. By default the
+                    registry Pokemon.pokemon_ids shared by every Pokemon.
 
     Returns
     -------
@@ -68,8 +70,10 @@ class PokemonElectricity(Pokemon):
       >>> from weapon_type import WeaponType
       >>> obj_Pokemon = PokemonEarth(1, "Pikachu", WeaponType.PUNCH, 100, 7, 10)
     """
-    def __init__(self, id_pokemon, pokemon_name, weapon_type, health_points,attack_rating, defense_rating):
-        super().__init__(id_pokemon, pokemon_name, weapon_type, health_points,attack_rating, defense_rating)
+    __slots__ = ()
+
+    def __init__(self, id_pokemon, pokemon_name, weapon_type, health_points,attack_rating, defense_rating, registry=None):
+        super().__init__(id_pokemon, pokemon_name, weapon_type, health_points,attack_rating, defense_rating, registry)
         
 
     def __str__(self):
@@ -77,7 +81,7 @@ class PokemonElectricity(Pokemon):
 
 
     def fight_attack(self, pokemon_to_attack):
-        if random.random() < 0.5:
+        if get_uniform()() < 0.5:
             return super().fight_attack(pokemon_to_attack) * 2
         else:
             return super().fight_attack(pokemon_to_attack)
@@ -54,6 +54,8 @@ class PokemonWater(Pokemon):
       [in] health_points Points of health that the Pokemon has.
       [in] attack_rating Attack rating of the Pokemon.
       [in] defense_rating Defense rating of the Pokemon.
+      [in] registry IdRegistry where the ID is registered. By default the
+                    registry Pokemon.pokemon_ids shared by every Pokemon.
 
     Returns
     -------
@@ -69,11 +71,18 @@ class PokemonWater(Pokemon):
       >>> from weapon_type import WeaponType
       >>> obj_Pokemon = PokemonWater(1, "Squirtle", WeaponType.PUNCH, 100, 7, 10)
     """
-    def __init__(self,id_pokemon ,pokemon_name, weapon_type, health_points, attack_rating, defense_rating):
-        super().__init__(id_pokemon, pokemon_name, weapon_type, health_points, attack_rating, defense_rating)
+    # Range of the attack rating of a PokemonWater.
+    min_attack_rating = 11
+    max_attack_rating = 20
 
-        if self.get_attack_rating() < 11 or self.get_attack_rating() > 20:
-            raise ValueError('El índice de ataque debe estar entre 11 y 20')
+    __slots__ = ()
+
+    def __init__(self,id_pokemon ,pokemon_name, weapon_type, health_points, attack_rating, defense_rating, registry=None):
+        super().__init__(id_pokemon, pokemon_name, weapon_type, health_points, attack_rating, defense_rating, registry)
+
+        if self.get_attack_rating() < self.min_attack_rating or self.get_attack_rating() > self.max_attack_rating:
+            raise ValueError('El índice de ataque debe estar entre ' + str(self.min_attack_rating)
+                             + ' y ' + str(self.max_attack_rating))
 
         
     def __str__(self):
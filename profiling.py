@@ -0,0 +1,599 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+
+"""
+This Python module contains the profiler of the hot paths of the Game.
+
+@contents :  This module contains an opt-in profiler that counts the calls to
+             the hot methods of the Pokemons, measures the rounds of each
+             battle and the time spent in random numbers, logic and I/O,
+             exports them as JSON or as Prometheus text, and the test cases
+             to probe its functionality.
+@project :  N/A
+@program :  N/A
+@file :  profiling.py
+@author :  Antonio Artes Garcia (antonio.artesgarcia@ceu.es)
+           Francisco Hernando Gallego (francisco.hernandogallego@ceu.es)
+           Ruben Juarez Cadiz (ruben.juarezcadiz@ceu.es)
+
+@version :  0.0.1, 08 November 2021
+@information :  The Zen of Python
+                  https://www.python.org/dev/peps/pep-0020/
+                Style Guide for Python Code
+                  https://www.python.org/dev/peps/pep-0008/
+                Example NumPy Style Python Docstrings
+                  http://sphinxcontrib-napoleon.readthedocs.io/en/latest/example_numpy.html
+                doctest – Testing through documentation
+                  https://pymotw.com/2/doctest/
+
+@copyright :  Copyright 2021 GNU AFFERO GENERAL PUBLIC.
+              All rights are reserved. Reproduction in whole or in part is
+              prohibited without the written consent of the copyright owner.
+"""
+
+
+# Source packages.
+
+import bisect
+import collections
+import functools
+import io
+import itertools
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+import weakref
+import battle
+import battle_events
+import roster_loader
+import rng
+from pokemon import Pokemon
+from pokemon_air import PokemonAir
+from pokemon_earth import PokemonEarth
+from pokemon_electricity import PokemonElectricity
+from pokemon_water import PokemonWater
+from weapon_type import WeaponType
+
+
+# Methods of the Pokemons whose calls are counted per type.
+HOT_METHODS = ('fight_attack', 'fight_defense', 'take_hit', 'set_health_points')
+
+# Upper bounds of the buckets of the histograms of rounds and of seconds per
+# battle.
+ROUND_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000, 10000)
+SECOND_BUCKETS = (1e-6, 1e-5, 1e-4, 1e-3, 1e-2, 1e-1, 1.0, 10.0)
+
+# Methods of the sinks of events that write to their streams.
+_SINK_CLASSES = (battle_events.BufferedTextSink, battle_events.JsonLinesSink)
+
+
+# Profiler that is enabled, if any. The methods are patched in their classes,
+# so only one profiler can be enabled at a time.
+_enabled_profiler = None
+
+
+def get_enabled_profiler():
+    """Function to obtain the Profiler that is enabled, or None if there is none."""
+    return _enabled_profiler
+
+
+class Histogram():
+    """Python class to implement a histogram with fixed buckets.
+
+    The buckets follow the convention of Prometheus: the bucket of an upper
+    bound counts the values that are lower than or equal to it, and a last
+    bucket without bound counts every value.
+
+    Syntax
+    ------
+      obj = Histogram(buckets)
+
+    Parameters
+    ----------
+      [in] buckets Sorted upper bounds of the buckets.
+
+    Returns
+    -------
+      obj Python object output parameter that represents an instance
+          of the class Histogram.
+
+    Attributes
+    ----------
+
+    Example
+    -------
+      >>> histogram = Histogram((1, 10, 100))
+      >>> histogram.observe(7)
+    """
+
+    __slots__ = ('__buckets', '__counts', '__sum')
+
+    def __init__(self, buckets):
+        self.__buckets = tuple(buckets)
+        self.__counts = [0] * (len(self.__buckets) + 1)
+        self.__sum = 0
+
+    def observe(self, value):
+        self.__counts[bisect.bisect_left(self.__buckets, value)] += 1
+        self.__sum += value
+
+    def get_count(self):
+        return sum(self.__counts)
+
+    def get_sum(self):
+        return self.__sum
+
+    def get_counts(self):
+        """Method to obtain the count of each bucket, not cumulative."""
+        return list(self.__counts)
+
+    def add(self, counts, total):
+        """Method to add the counts of get_counts() and the sum of another histogram."""
+        if len(counts) != len(self.__counts):
+            raise ValueError('El histograma tiene otros intervalos')
+        for index, count in enumerate(counts):
+            self.__counts[index] += count
+        self.__sum += total
+
+    def get_buckets(self):
+        """Method to obtain the list of (upper_bound, cumulative_count)."""
+        return list(zip(self.__buckets + (float('inf'),), itertools.accumulate(self.__counts)))
+
+    def to_json(self):
+        return {'buckets': [[bound if bound != float('inf') else '+Inf', count]
+                            for bound, count in self.get_buckets()],
+                'sum': self.__sum, 'count': self.get_count()}
+
+
+class Profiler():
+    """Python class to implement the profiler of the hot paths of the Game.
+
+    This Python class counts the calls to fight_attack(), fight_defense(),
+    take_hit() and set_health_points() per type of Pokemon, the rounds and the seconds of
+    each battle played by battle.simulate() or step by step by a
+    battle.Battle (as Battle.run(), replay.record_battle(), the Replayer and
+    the battle server do), and the seconds spent in the random numbers of the
+    battles, in their logic and in I/O (the reading of the CSV and binary
+    rosters and the writing of the sinks of events). The time that a Battle
+    waits for the selections of the coaches is not counted.
+
+    The profiler is opt-in: enable() replaces those methods and functions by
+    instrumented ones in their classes and modules, and disable() puts the
+    original ones back, so a disabled profiler costs nothing. Only the
+    current process is profiled: the pool of a tournament profiles its
+    processes when it is given a Profiler, and their counters are added to
+    it with add_counters().
+
+    Syntax
+    ------
+      obj = Profiler()
+
+    Parameters
+    ----------
+      Null .
+
+    Returns
+    -------
+      obj Python object output parameter that represents an instance
+          of the class Profiler.
+
+    Attributes
+    ----------
+
+    Example
+    -------
+      >>> with Profiler() as profiler:
+      ...     battle.simulate(coach_1, coach_2)
+      >>> profiler.write_prometheus("battle.prom")
+    """
+
+    def __init__(self):
+        self.__patches = []
+        self.__calls = collections.Counter()
+        self.__seconds = {'battle': 0.0, 'rng': 0.0, 'io': 0.0}
+        self.reset()
+
+    def __enter__(self):
+        self.enable()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.disable()
+
+    def reset(self):
+        """Method to clear every counter of the profiler.
+
+        The counters are cleared in place, because the instrumented methods
+        of an enabled profiler hold them.
+        """
+        self.__calls.clear()
+        self.__seconds.update(dict.fromkeys(self.__seconds, 0.0))
+        self.__rounds = Histogram(ROUND_BUCKETS)
+        self.__battle_seconds = Histogram(SECOND_BUCKETS)
+        self.__uniforms = 0
+
+    def is_enabled(self):
+        return bool(self.__patches)
+
+    def get_calls(self, method=None, type_name=None):
+        """Method to obtain the number of calls to a method for a type.
+
+        Without method or type_name, the calls of every method or of every
+        type are added.
+        """
+        return sum(count for (call_method, call_type), count in self.__calls.items()
+                   if method in (None, call_method) and type_name in (None, call_type))
+
+    def get_rounds(self):
+        return self.__rounds
+
+    def get_battle_seconds(self):
+        return self.__battle_seconds
+
+    def get_uniforms(self):
+        return self.__uniforms
+
+    def get_seconds(self):
+        """Method to obtain the seconds spent in each part of the Game.
+
+        The seconds of logic are the seconds of the battles that were not
+        spent drawing random numbers.
+        """
+        seconds = dict(self.__seconds)
+        seconds['logic'] = max(0.0, seconds['battle'] - seconds['rng'])
+        return seconds
+
+    def get_counters(self):
+        """Method to obtain the counters of the profiler as plain Python objects.
+
+        They can be sent between processes and added to another profiler
+        with add_counters().
+        """
+        return {'calls': dict(self.__calls), 'uniforms': self.__uniforms, 'seconds': dict(self.__seconds),
+                'rounds': (self.__rounds.get_counts(), self.__rounds.get_sum()),
+                'battle_seconds': (self.__battle_seconds.get_counts(), self.__battle_seconds.get_sum())}
+
+    def add_counters(self, counters):
+        """Method to add the counters of get_counters() of another profiler."""
+        self.__calls.update(counters['calls'])
+        self.__uniforms += counters['uniforms']
+        for part, seconds in counters['seconds'].items():
+            self.__seconds[part] += seconds
+        self.__rounds.add(*counters['rounds'])
+        self.__battle_seconds.add(*counters['battle_seconds'])
+
+    def enable(self):
+        """Method to instrument the hot paths of the Game."""
+        global _enabled_profiler
+        if _enabled_profiler is not None:
+            raise RuntimeError('Ya hay un Profiler activado')
+        _enabled_profiler = self
+
+        pending = [Pokemon]
+        while pending:
+            pokemon_class = pending.pop()
+            pending.extend(pokemon_class.__subclasses__())
+            for name in HOT_METHODS:
+                if name in vars(pokemon_class):
+                    self.__patch(pokemon_class, name, self.__count_calls(pokemon_class, name))
+
+        self.__patch_function('get_uniform', rng.get_uniform, self.__time_uniform(rng.get_uniform))
+        self.__patch(battle, 'simulate', self.__time_battle(battle.simulate))
+        # A Battle is timed by its steps, so the battles played by
+        # Battle.run(), by a replay or by the server are all counted.
+        battle_seconds = weakref.WeakKeyDictionary()
+        for name in ('select', 'step'):
+            self.__patch(battle.Battle, name,
+                         self.__time_battle_method(vars(battle.Battle)[name], battle_seconds))
+        self.__patch_function('read_pokemon_rows', roster_loader.read_pokemon_rows,
+                              self.__time_rows(roster_loader.read_pokemon_rows))
+        for sink_class in _SINK_CLASSES:
+            self.__patch(sink_class, 'flush', self.__time_io(sink_class.flush))
+
+    def disable(self):
+        """Method to put the original hot paths of the Game back."""
+        global _enabled_profiler
+        while self.__patches:
+            owner, name, original = self.__patches.pop()
+            setattr(owner, name, original)
+        if _enabled_profiler is self:
+            _enabled_profiler = None
+
+    def __patch(self, owner, name, value):
+        self.__patches.append((owner, name, vars(owner)[name]))
+        setattr(owner, name, value)
+
+    def __patch_function(self, name, function, value):
+        # The function is replaced in every module that imported it by name.
+        for module in list(sys.modules.values()):
+            if module is not None and vars(module).get(name) is function:
+                self.__patch(module, name, value)
+
+    def __count_calls(self, pokemon_class, name):
+        method = vars(pokemon_class)[name]
+        calls = self.__calls
+
+        def counted(pokemon, *arguments):
+            # A method that calls the one of its parent class with super() is
+            # only counted once, by the class of the Pokemon.
+            if getattr(type(pokemon), name) is counted:
+                calls[(name, type(pokemon).__name__)] += 1
+            return method(pokemon, *arguments)
+        return functools.update_wrapper(counted, method)
+
+    def __time_uniform(self, get_uniform):
+        seconds = self.__seconds
+        perf_counter = time.perf_counter
+
+        def timed_get_uniform():
+            uniform = get_uniform()
+
+            def timed_uniform():
+                start = perf_counter()
+                value = uniform()
+                seconds['rng'] += perf_counter() - start
+                self.__uniforms += 1
+                return value
+            return timed_uniform
+        return functools.update_wrapper(timed_get_uniform, get_uniform)
+
+    def __time_battle(self, function):
+        seconds = self.__seconds
+
+        def timed_battle(*arguments, **keywords):
+            start = time.perf_counter()
+            result = function(*arguments, **keywords)
+            elapsed = time.perf_counter() - start
+            seconds['battle'] += elapsed
+            self.__rounds.observe(result.rounds)
+            self.__battle_seconds.observe(elapsed)
+            return result
+        return functools.update_wrapper(timed_battle, function)
+
+    def __time_battle_method(self, method, battle_seconds):
+        seconds = self.__seconds
+        perf_counter = time.perf_counter
+
+        def timed_method(battle_object, *arguments):
+            was_over = battle_object.is_over()
+            start = perf_counter()
+            try:
+                return method(battle_object, *arguments)
+            finally:
+                elapsed = perf_counter() - start
+                seconds['battle'] += elapsed
+                # The seconds of the battle are added until a step or a
+                # selection (of a Pokemon that cannot be hurt) ends it.
+                elapsed += battle_seconds.pop(battle_object, 0.0)
+                if not battle_object.is_over():
+                    battle_seconds[battle_object] = elapsed
+                elif not was_over:
+                    self.__rounds.observe(battle_object.get_rounds())
+                    self.__battle_seconds.observe(elapsed)
+        return functools.update_wrapper(timed_method, method)
+
+    def __time_io(self, function):
+        seconds = self.__seconds
+
+        def timed_io(*arguments, **keywords):
+            start = time.perf_counter()
+            try:
+                return function(*arguments, **keywords)
+            finally:
+                seconds['io'] += time.perf_counter() - start
+        return functools.update_wrapper(timed_io, function)
+
+    def __time_rows(self, function):
+        seconds = self.__seconds
+
+        def timed_rows(*arguments, **keywords):
+            chunks = function(*arguments, **keywords)
+            while True:
+                start = time.perf_counter()
+                try:
+                    chunk = next(chunks)
+                except StopIteration:
+                    return
+                finally:
+                    seconds['io'] += time.perf_counter() - start
+                yield chunk
+        return functools.update_wrapper(timed_rows, function)
+
+    def to_json(self):
+        """Method to obtain the counters of the profiler as a JSON document."""
+        return {
+            'calls': [{'method': method, 'type': type_name, 'count': count}
+                      for (method, type_name), count in sorted(self.__calls.items())],
+            'uniforms': self.__uniforms,
+            'seconds': self.get_seconds(),
+            'rounds': self.__rounds.to_json(),
+            'battle_seconds': self.__battle_seconds.to_json(),
+        }
+
+    def to_prometheus(self):
+        """Method to obtain the counters of the profiler in Prometheus text format."""
+        lines = ['# HELP pokemon_calls_total Calls to the hot methods of the Pokemons.',
+                 '# TYPE pokemon_calls_total counter']
+        for (method, type_name), count in sorted(self.__calls.items()):
+            lines.append('pokemon_calls_total{method="%s",type="%s"} %d' % (method, type_name, count))
+        lines += ['# HELP pokemon_uniforms_total Uniform numbers drawn in the battles.',
+                  '# TYPE pokemon_uniforms_total counter',
+                  'pokemon_uniforms_total %d' % self.__uniforms,
+                  '# HELP pokemon_seconds_total Seconds spent in each part of the Game.',
+                  '# TYPE pokemon_seconds_total counter']
+        for part, seconds in sorted(self.get_seconds().items()):
+            lines.append('pokemon_seconds_total{part="%s"} %r' % (part, seconds))
+        for name, help_text, histogram in (
+                ('pokemon_battle_rounds', 'Rounds of each battle.', self.__rounds),
+                ('pokemon_battle_seconds', 'Seconds of each battle.', self.__battle_seconds)):
+            lines += ['# HELP ' + name + ' ' + help_text, '# TYPE ' + name + ' histogram']
+            for bound, count in histogram.get_buckets():
+                lines.append('%s_bucket{le="%s"} %d'
+                             % (name, '+Inf' if bound == float('inf') else repr(bound), count))
+            lines += ['%s_sum %r' % (name, histogram.get_sum()),
+                      '%s_count %d' % (name, histogram.get_count())]
+        return '\n'.join(lines) + '\n'
+
+    def write(self, name_file):
+        """Method to write the counters of the profiler in a Prometheus text file
+        if its name ends in .prom, or in a JSON file otherwise."""
+        if name_file.endswith('.prom'):
+            self.write_prometheus(name_file)
+        else:
+            self.write_json(name_file)
+
+    def write_json(self, name_file):
+        """Method to write the counters of the profiler in a JSON file."""
+        _write_atomically(name_file, json.dumps(self.to_json(), indent=2) + '\n')
+
+    def write_prometheus(self, name_file):
+        """Method to write the counters of the profiler in a Prometheus text file."""
+        _write_atomically(name_file, self.to_prometheus())
+
+
+def _write_atomically(name_file, text):
+    """Function to replace a file at once, so a reader never sees it half written."""
+    temporary_file = name_file + '.tmp'
+    with open(temporary_file, 'w') as file:
+        file.write(text)
+    os.replace(temporary_file, name_file)
+
+
+
+def main():
+    """Function main of the module.
+
+    The function main of this module is used to test the profiler that is
+    described in this module.
+
+    Syntax
+    ------
+      [ ] = main()
+
+    Parameters
+    ----------
+      Null .
+
+    Returns
+    -------
+      Null .
+
+    Example
+    -------
+      >>> main()
+    """
+
+    original_methods = (Pokemon.fight_attack, Pokemon.fight_defense,
+                        PokemonAir.take_hit, PokemonElectricity.fight_attack)
+
+    print("=================================================================.")
+    print("Test Case 1: Count the calls per type of Pokemon.")
+    print("=================================================================.")
+    pokemon_1 = PokemonElectricity(1, "Pikachu", WeaponType.HEADBUTT, 1000, 8, 7)
+    pokemon_2 = Pokemon(2, "Squirtle", WeaponType.ELBOW, 1000, 8, 5)
+    with Profiler() as profiler:
+        for _ in range(10):
+            pokemon_1.fight_attack(pokemon_2)
+
+    if (profiler.get_calls('fight_attack', 'PokemonElectricity') == 10
+            and profiler.get_calls('fight_attack', 'Pokemon') == 0
+            and profiler.get_calls('take_hit', 'Pokemon') == 10
+            and profiler.get_calls('set_health_points', 'Pokemon') == 10
+            and profiler.get_uniforms() == 10):
+        print("Test PASS. The calls are counted once per type.")
+    else:
+        print("Test FAIL. Check the method enable()." + " RESULT: " + str(profiler.to_json()['calls']))
+
+
+    print("=================================================================.")
+    print("Test Case 2: A disabled profiler leaves the original methods.")
+    print("=================================================================.")
+    if (not profiler.is_enabled() and rng.get_uniform is sys.modules['pokemon_air'].get_uniform
+            and original_methods == (Pokemon.fight_attack, Pokemon.fight_defense,
+                                     PokemonAir.take_hit, PokemonElectricity.fight_attack)):
+        print("Test PASS. The method disable() has been implemented correctly.")
+    else:
+        print("Test FAIL. Check the method disable().")
+
+
+    print("=================================================================.")
+    print("Test Case 3: Profile battles and export the counters.")
+    print("=================================================================.")
+    team_1 = [PokemonAir(3, "Pidgey", WeaponType.KICK, 85, 7, 7),
+              PokemonEarth(4, "Diglett", WeaponType.HEADBUTT, 60, 8, 15)]
+    team_2 = [PokemonWater(5, "Psyduck", WeaponType.KICK, 70, 12, 6),
+              Pokemon(6, "Squirtle", WeaponType.ELBOW, 74, 7, 6)]
+    stream = io.StringIO()
+    with Profiler() as profiler:
+        for seed in range(20):
+            battle.simulate(team_1, team_2, rng=random.Random(seed))
+        battle.Battle(team_1, team_2, sink=battle_events.JsonLinesSink(stream)).run()
+    with tempfile.TemporaryDirectory() as directory:
+        profiler.write_json(os.path.join(directory, 'profile.json'))
+        profiler.write_prometheus(os.path.join(directory, 'profile.prom'))
+        with open(os.path.join(directory, 'profile.json')) as file:
+            document = json.load(file)
+        with open(os.path.join(directory, 'profile.prom')) as file:
+            text = file.read()
+
+    seconds = profiler.get_seconds()
+    if (document['rounds']['count'] == 21 and profiler.get_calls('take_hit', 'PokemonAir') > 0
+            and 'pokemon_battle_rounds_bucket{le="+Inf"} 21' in text
+            and seconds['battle'] > 0 and seconds['rng'] > 0 and seconds['logic'] > 0):
+        print("Test PASS. The counters have been exported correctly.")
+    else:
+        print("Test FAIL. Check the methods to_json() and to_prometheus()." + " RESULT: " + str(document))
+    print("Seconds: " + ", ".join(part + ' ' + '%.6f' % value for part, value in sorted(seconds.items())))
+
+
+    print("=================================================================.")
+    print("Test Case 4: Only one profiler can be enabled at a time.")
+    print("=================================================================.")
+    with Profiler():
+        try:
+            Profiler().enable()
+            print("Test FAIL. Check the method enable().")
+        except RuntimeError:
+            print("Test PASS. A second profiler has been rejected.")
+
+
+    print("=================================================================.")
+    print("Test Case 5: Profile the battles played step by step and the binary rosters.")
+    print("=================================================================.")
+    import replay
+    import roster_binary
+    team_1 = [PokemonAir(3, "Pidgey", WeaponType.KICK, 85, 7, 7),
+              PokemonEarth(4, "Diglett", WeaponType.HEADBUTT, 60, 8, 15)]
+    team_2 = [PokemonWater(5, "Psyduck", WeaponType.KICK, 70, 12, 6),
+              Pokemon(6, "Squirtle", WeaponType.ELBOW, 74, 7, 6)]
+    with tempfile.TemporaryDirectory() as directory:
+        binary_name = os.path.join(directory, 'coach_1_pokemons.bin')
+        with Profiler() as profiler:
+            recorded, result = replay.record_battle(team_1, team_2, seed=3)
+            replayed = replay.Replayer(recorded).run()
+            roster_binary.convert_csv('coach_1_pokemons.csv', binary_name)
+
+    other = Profiler()
+    other.add_counters(profiler.get_counters())
+    other.add_counters(profiler.get_counters())
+    if (profiler.get_rounds().get_count() == 2 and profiler.get_rounds().get_sum() == 2 * result.rounds
+            and replayed.rounds == result.rounds and profiler.get_seconds()['io'] > 0
+            and other.get_rounds().get_count() == 4 and other.get_uniforms() == 2 * profiler.get_uniforms()
+            and other.get_calls() == 2 * profiler.get_calls()
+            and other.get_seconds()['battle'] == 2 * profiler.get_seconds()['battle']):
+        print("Test PASS. The steps of a Battle and the binary rosters have been profiled.")
+    else:
+        print("Test FAIL. Check the method enable()." + " RESULT: " + str(profiler.to_json()))
+
+
+
+# Checking whether this module is executed just itself alone.
+if __name__ == "__main__":
+    main()
+
+
+# EOF
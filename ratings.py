@@ -0,0 +1,741 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+
+"""
+This Python module contains the ratings of the Pokemons and of the coaches.
+
+@contents :  This module contains the Elo and Glicko ratings updated with each
+             result of a battle, their update by batches with NumPy, their
+             checkpoints and the test cases to probe their functionality.
+@project :  N/A
+@program :  N/A
+@file :  ratings.py
+@author :  Antonio Artes Garcia (antonio.artesgarcia@ceu.es)
+           Francisco Hernando Gallego (francisco.hernandogallego@ceu.es)
+           Ruben Juarez Cadiz (ruben.juarezcadiz@ceu.es)
+
+@version :  0.0.1, 08 November 2021
+@information :  The Zen of Python
+                  https://www.python.org/dev/peps/pep-0020/
+                Style Guide for Python Code
+                  https://www.python.org/dev/peps/pep-0008/
+                Example NumPy Style Python Docstrings
+                  http://sphinxcontrib-napoleon.readthedocs.io/en/latest/example_numpy.html
+                doctest – Testing through documentation
+                  https://pymotw.com/2/doctest/
+
+@copyright :  Copyright 2021 GNU AFFERO GENERAL PUBLIC.
+              All rights are reserved. Reproduction in whole or in part is
+              prohibited without the written consent of the copyright owner.
+"""
+
+
+# Source packages.
+
+import array
+import math
+import os
+import tempfile
+import time
+import numpy as np
+
+
+INITIAL_RATING = 1500.0
+INITIAL_DEVIATION = 350.0
+
+# Constant q of Glicko.
+_Q = math.log(10.0) / 400.0
+
+# Score of the coach or the Pokemon 1 for each winner: 0 is a draw.
+_SCORES = (0.5, 1.0, 0.0)
+
+
+def winner_scores(winners):
+    """Function to obtain the scores of the side 1 from an array of winners."""
+    return np.asarray(_SCORES)[np.asarray(winners, dtype=np.intp)]
+
+
+class Ratings():
+    """Python class to implement the ratings of a set of players.
+
+    This Python class keeps the players in a dictionary from their key, an
+    ID of Pokemon or a name of coach, to their position, and the ratings and
+    the number of games in arrays of the module array. A result updates the
+    two players at once, and update_batch() updates a whole batch with NumPy
+    views over the same arrays. The subclasses EloRatings and GlickoRatings
+    implement the formulas.
+
+    Syntax
+    ------
+      obj = Ratings(initial_rating)
+
+    Parameters
+    ----------
+      [in] initial_rating Rating of a new player.
+
+    Returns
+    -------
+      obj Python object output parameter that represents an instance
+          of the class Ratings.
+
+    Attributes
+    ----------
+
+    Example
+    -------
+      >>> ratings = EloRatings()
+      >>> ratings.update(24, 11, 1.0)
+    """
+
+    system = None
+
+    def __init__(self, initial_rating=INITIAL_RATING):
+        self.__initial_rating = initial_rating
+        self.__index = {}
+        self.__keys = []
+        self._ratings = array.array('d')
+        self._games = array.array('q')
+
+    def __len__(self):
+        return len(self.__keys)
+
+    def __contains__(self, key):
+        return key in self.__index
+
+    def get_initial_rating(self):
+        return self.__initial_rating
+
+    def get_keys(self):
+        return list(self.__keys)
+
+    def get_position(self, key):
+        """Method to obtain the position of a player, adding it if it is new."""
+        position = self.__index.get(key)
+        if position is None:
+            position = len(self.__keys)
+            self.__index[key] = position
+            self.__keys.append(key)
+            self._ratings.append(self.__initial_rating)
+            self._games.append(0)
+            self._add_player()
+        return position
+
+    def _add_player(self):
+        pass
+
+    def get_rating(self, key):
+        position = self.__index.get(key)
+        return self.__initial_rating if position is None else self._ratings[position]
+
+    def get_games(self, key):
+        position = self.__index.get(key)
+        return 0 if position is None else self._games[position]
+
+    def set_rating(self, key, rating):
+        self._ratings[self.get_position(key)] = rating
+
+    def top(self, count):
+        """Method to obtain the count best players as (key, rating), the best first."""
+        ratings = np.frombuffer(self._ratings, dtype=np.float64)
+        count = min(count, len(ratings))
+        if count == 0:
+            return []
+        best = np.argpartition(-ratings, count - 1)[:count]
+        best = best[np.argsort(-ratings[best], kind='stable')]
+        return [(self.__keys[position], float(ratings[position])) for position in best.tolist()]
+
+    def update(self, key_1, key_2, score):
+        """Method to update the ratings with the result of a game.
+
+        Syntax
+        ------
+           [ ] = ratings.update(key_1, key_2, score)
+
+        Parameters
+        ----------
+           [in] key_1 Key of the player 1.
+           [in] key_2 Key of the player 2.
+           [in] score Score of the player 1: 1 for a win, 0.5 for a draw and
+                      0 for a defeat.
+
+        Returns
+        -------
+           Null .
+
+        Example
+        -------
+           >>> ratings.update(24, 11, 1.0)
+        """
+        position_1 = self.get_position(key_1)
+        position_2 = self.get_position(key_2)
+        self._update(position_1, position_2, score)
+        self._games[position_1] += 1
+        self._games[position_2] += 1
+
+    def update_batch(self, keys_1, keys_2, scores):
+        """Method to update the ratings with a batch of games at once.
+
+        The batch is a rating period: every game is valued with the ratings
+        before the batch, and the changes of each player are added. So the
+        result equals that of update() when no player plays twice in the
+        batch, and it does not depend on the order of the games.
+
+        Syntax
+        ------
+           [ ] = ratings.update_batch(keys_1, keys_2, scores)
+
+        Parameters
+        ----------
+           [in] keys_1 Array of the keys of the players 1.
+           [in] keys_2 Array of the keys of the players 2.
+           [in] scores Array of the scores of the players 1.
+
+        Returns
+        -------
+           Null .
+
+        Example
+        -------
+           >>> ratings.update_batch(ids_1, ids_2, winner_scores(winners))
+        """
+        self.update_positions(self.get_positions(keys_1), self.get_positions(keys_2), scores)
+
+    def get_positions(self, keys):
+        """Method to obtain the positions of an array of players at once.
+
+        The new players are added, and each distinct key is looked up once.
+        """
+        keys = np.asarray(keys)
+        if not len(keys):
+            return np.empty(0, dtype=np.intp)
+        if keys.dtype.kind not in 'biu':
+            # Sorting strings is slower than looking each one up.
+            keys = keys.tolist()
+            for key in dict.fromkeys(keys):
+                self.get_position(key)
+            return np.fromiter(map(self.__index.__getitem__, keys), dtype=np.intp, count=len(keys))
+        unique, inverse = np.unique(keys, return_inverse=True)
+        unique_positions = np.array([self.get_position(key) for key in unique.tolist()], dtype=np.intp)
+        return unique_positions[inverse.ravel()]
+
+    def update_positions(self, positions_1, positions_2, scores):
+        """Method to update the ratings with a batch of games of get_positions()."""
+        if not len(positions_1):
+            return
+        positions = np.concatenate([positions_1, positions_2])
+        counts = np.bincount(positions, minlength=len(self))
+        self._update_batch(positions_1, positions_2, np.asarray(scores, dtype=np.float64), np.nonzero(counts)[0])
+        games = np.frombuffer(self._games, dtype=np.int64)
+        games += counts
+        del games
+
+    def to_arrays(self, prefix=''):
+        """Method to obtain the ratings as a dictionary of NumPy arrays."""
+        keys = np.array(self.__keys) if self.__keys else np.empty(0, dtype=np.int64)
+        return {prefix + 'system': np.array(self.system), prefix + 'keys': keys,
+                prefix + 'initial_rating': np.array(self.__initial_rating),
+                prefix + 'ratings': np.array(self._ratings, dtype=np.float64),
+                prefix + 'games': np.array(self._games, dtype=np.int64)}
+
+    def _set_arrays(self, arrays, prefix=''):
+        for key in arrays[prefix + 'keys'].tolist():
+            self.get_position(key)
+        self._ratings[:] = array.array('d', arrays[prefix + 'ratings'].tobytes())
+        self._games[:] = array.array('q', arrays[prefix + 'games'].tobytes())
+
+    def save(self, name_file):
+        """Method to write the ratings to a file of NumPy at once."""
+        _save_atomically(name_file, self.to_arrays())
+
+
+class EloRatings(Ratings):
+    """Python class to implement the Elo ratings of a set of players.
+
+    The expected score of the player 1 is 1 / (1 + 10 ** ((r2 - r1) / 400))
+    and each game moves both ratings by k_factor times the score minus the
+    expected score.
+
+    Syntax
+    ------
+      obj = EloRatings(k_factor, initial_rating)
+
+    Parameters
+    ----------
+      [in] k_factor Largest change of a rating in a game.
+      [in] initial_rating Rating of a new player.
+
+    Returns
+    -------
+      obj Python object output parameter that represents an instance
+          of the class EloRatings.
+
+    Attributes
+    ----------
+
+    Example
+    -------
+      >>> ratings = EloRatings(k_factor=16)
+    """
+
+    system = 'elo'
+
+    def __init__(self, k_factor=32.0, initial_rating=INITIAL_RATING):
+        super().__init__(initial_rating)
+        self.__k_factor = k_factor
+
+    def get_k_factor(self):
+        return self.__k_factor
+
+    def _update(self, position_1, position_2, score):
+        ratings = self._ratings
+        expected = 1.0 / (1.0 + 10.0 ** ((ratings[position_2] - ratings[position_1]) / 400.0))
+        change = self.__k_factor * (score - expected)
+        ratings[position_1] += change
+        ratings[position_2] -= change
+
+    def _update_batch(self, positions_1, positions_2, scores, players):
+        ratings = np.frombuffer(self._ratings, dtype=np.float64)
+        expected = 1.0 / (1.0 + 10.0 ** ((ratings[positions_2] - ratings[positions_1]) / 400.0))
+        changes = self.__k_factor * (scores - expected)
+        ratings += (np.bincount(positions_1, changes, len(ratings))
+                    - np.bincount(positions_2, changes, len(ratings)))
+        del ratings
+
+    def to_arrays(self, prefix=''):
+        arrays = super().to_arrays(prefix)
+        arrays[prefix + 'k_factor'] = np.array(self.__k_factor)
+        return arrays
+
+
+class GlickoRatings(Ratings):
+    """Python class to implement the Glicko ratings of a set of players.
+
+    Each player has a rating and a deviation that measures how uncertain
+    the rating is. A game moves the rating more when the deviation is large
+    and makes the deviation smaller, and start_period() makes every
+    deviation grow again by the constant c, up to the initial deviation.
+    update() takes each game as a rating period of its own.
+
+    Syntax
+    ------
+      obj = GlickoRatings(initial_rating, initial_deviation, c)
+
+    Parameters
+    ----------
+      [in] initial_rating Rating of a new player.
+      [in] initial_deviation Deviation of a new player.
+      [in] c Growth of the deviation in each rating period.
+
+    Returns
+    -------
+      obj Python object output parameter that represents an instance
+          of the class GlickoRatings.
+
+    Attributes
+    ----------
+
+    Example
+    -------
+      >>> ratings = GlickoRatings()
+    """
+
+    system = 'glicko'
+
+    def __init__(self, initial_rating=INITIAL_RATING, initial_deviation=INITIAL_DEVIATION, c=34.6):
+        self.__initial_deviation = initial_deviation
+        self.__c = c
+        self.__deviations = array.array('d')
+        super().__init__(initial_rating)
+
+    def _add_player(self):
+        self.__deviations.append(self.__initial_deviation)
+
+    def get_deviation(self, key):
+        return self.__deviations[self.get_position(key)] if key in self else self.__initial_deviation
+
+    def set_rating(self, key, rating, deviation=None):
+        super().set_rating(key, rating)
+        if deviation is not None:
+            self.__deviations[self.get_position(key)] = deviation
+
+    def start_period(self, periods=1):
+        """Method to make the deviations grow for a number of rating periods."""
+        deviations = np.frombuffer(self.__deviations, dtype=np.float64)
+        np.minimum(np.sqrt(deviations ** 2 + self.__c ** 2 * periods), self.__initial_deviation, out=deviations)
+        del deviations
+
+    def _update(self, position_1, position_2, score):
+        ratings = self._ratings
+        deviations = self.__deviations
+        rating_1 = ratings[position_1]
+        rating_2 = ratings[position_2]
+        deviation_1 = deviations[position_1]
+        deviation_2 = deviations[position_2]
+        for position, rating, deviation, other_rating, other_deviation, player_score in (
+                (position_1, rating_1, deviation_1, rating_2, deviation_2, score),
+                (position_2, rating_2, deviation_2, rating_1, deviation_1, 1.0 - score)):
+            g = 1.0 / math.sqrt(1.0 + 3.0 * _Q * _Q * other_deviation * other_deviation / (math.pi * math.pi))
+            expected = 1.0 / (1.0 + 10.0 ** (-g * (rating - other_rating) / 400.0))
+            denominator = 1.0 / (deviation * deviation) + _Q * _Q * g * g * expected * (1.0 - expected)
+            ratings[position] = rating + _Q / denominator * g * (player_score - expected)
+            deviations[position] = math.sqrt(1.0 / denominator)
+
+    def _update_batch(self, positions_1, positions_2, scores, players):
+        ratings = np.frombuffer(self._ratings, dtype=np.float64)
+        deviations = np.frombuffer(self.__deviations, dtype=np.float64)
+        # Each game is seen from both players.
+        positions = np.concatenate([positions_1, positions_2])
+        others = np.concatenate([positions_2, positions_1])
+        scores = np.concatenate([scores, 1.0 - scores])
+        g = 1.0 / np.sqrt(1.0 + 3.0 * _Q * _Q * deviations[others] ** 2 / (math.pi * math.pi))
+        expected = 1.0 / (1.0 + 10.0 ** (-g * (ratings[positions] - ratings[others]) / 400.0))
+        information = _Q * _Q * np.bincount(positions, g * g * expected * (1.0 - expected), len(ratings))[players]
+        changes = np.bincount(positions, g * (scores - expected), len(ratings))[players]
+        denominators = 1.0 / deviations[players] ** 2 + information
+        ratings[players] += _Q / denominators * changes
+        deviations[players] = np.sqrt(1.0 / denominators)
+        del ratings, deviations
+
+    def to_arrays(self, prefix=''):
+        arrays = super().to_arrays(prefix)
+        arrays[prefix + 'initial_deviation'] = np.array(self.__initial_deviation)
+        arrays[prefix + 'c'] = np.array(self.__c)
+        arrays[prefix + 'deviations'] = np.array(self.__deviations, dtype=np.float64)
+        return arrays
+
+    def _set_arrays(self, arrays, prefix=''):
+        super()._set_arrays(arrays, prefix)
+        self.__deviations[:] = array.array('d', arrays[prefix + 'deviations'].tobytes())
+
+
+def _ratings_from_arrays(arrays, prefix=''):
+    """Function to create the ratings written by Ratings.to_arrays()."""
+    system = str(arrays[prefix + 'system'])
+    initial_rating = float(arrays[prefix + 'initial_rating'])
+    if system == EloRatings.system:
+        ratings = EloRatings(float(arrays[prefix + 'k_factor']), initial_rating)
+    elif system == GlickoRatings.system:
+        ratings = GlickoRatings(initial_rating, float(arrays[prefix + 'initial_deviation']),
+                                float(arrays[prefix + 'c']))
+    else:
+        raise ValueError('El sistema de puntuación ' + system + ' no existe')
+    ratings._set_arrays(arrays, prefix)
+    return ratings
+
+
+def _save_atomically(name_file, arrays):
+    """Function to replace a file of NumPy at once, so a crash never leaves it half written."""
+    temporary_file = name_file + '.tmp'
+    with open(temporary_file, 'wb') as file:
+        np.savez(file, **arrays)
+    os.replace(temporary_file, name_file)
+
+
+def load_ratings(name_file):
+    """Function to read the ratings written with Ratings.save()."""
+    with np.load(name_file) as data:
+        return _ratings_from_arrays(data)
+
+
+class RatingEngine():
+    """Python class to implement the ratings of the Pokemons and the coaches.
+
+    This Python class consumes the results of the battles as a stream. Each
+    battle updates the ratings of both coaches with its winner and the
+    ratings of the Pokemons of each duel, keyed by Pokemon.get_id(), in O(1)
+    per result. Every checkpoint_interval battles both ratings are written
+    to checkpoint_file at once. add_batch() rates the battles of a log with
+    NumPy, in rating periods of period_size battles.
+
+    Syntax
+    ------
+      obj = RatingEngine(pokemons, coaches, checkpoint_file,
+                         checkpoint_interval)
+
+    Parameters
+    ----------
+      [in] pokemons Ratings of the Pokemons. By default EloRatings().
+      [in] coaches Ratings of the coaches. By default EloRatings().
+      [in] checkpoint_file Name of the file of the checkpoints. By default
+                           there are no checkpoints.
+      [in] checkpoint_interval Number of battles between checkpoints.
+
+    Returns
+    -------
+      obj Python object output parameter that represents an instance
+          of the class RatingEngine.
+
+    Attributes
+    ----------
+
+    Example
+    -------
+      >>> engine = RatingEngine(checkpoint_file='ratings.npz')
+      >>> engine.add_result('coach_1', 'coach_2', battle.simulate(coach_1, coach_2))
+    """
+
+    def __init__(self, pokemons=None, coaches=None, checkpoint_file=None, checkpoint_interval=100000):
+        self.__pokemons = EloRatings() if pokemons is None else pokemons
+        self.__coaches = EloRatings() if coaches is None else coaches
+        self.__checkpoint_file = checkpoint_file
+        self.__checkpoint_interval = checkpoint_interval
+        self.__battles = 0
+        self.__last_checkpoint = 0
+
+    def get_pokemons(self):
+        return self.__pokemons
+
+    def get_coaches(self):
+        return self.__coaches
+
+    def get_battles(self):
+        return self.__battles
+
+    def add_battle(self, coach_1, coach_2, winner, duels=()):
+        """Method to rate a battle with its winner and its duels.
+
+        Syntax
+        ------
+           [ ] = engine.add_battle(coach_1, coach_2, winner, duels)
+
+        Parameters
+        ----------
+           [in] coach_1 Name of the coach 1.
+           [in] coach_2 Name of the coach 2.
+           [in] winner 1 or 2 for the coach that won and 0 for a draw.
+           [in] duels Tuples (id_pokemon_1, id_pokemon_2, winner, rounds) of
+                      the duels of the battle.
+
+        Returns
+        -------
+           Null .
+
+        Example
+        -------
+           >>> engine.add_battle('coach_1', 'coach_2', 1)
+        """
+        self.__coaches.update(coach_1, coach_2, _SCORES[winner])
+        for id_pokemon_1, id_pokemon_2, duel_winner, _ in duels:
+            self.__pokemons.update(id_pokemon_1, id_pokemon_2, _SCORES[duel_winner])
+        self.__battles += 1
+        if self.__checkpoint_file is not None and self.__battles - self.__last_checkpoint >= self.__checkpoint_interval:
+            self.checkpoint()
+
+    def add_result(self, coach_1, coach_2, result):
+        """Method to rate a BattleResult of battle.simulate() or battle.Battle."""
+        self.add_battle(coach_1, coach_2, result.winner, result.duels)
+
+    def add_batch(self, coaches_1, coaches_2, winners, pokemons_1=(), pokemons_2=(), duel_winners=(),
+                  period_size=100000):
+        """Method to rate a log of battles with NumPy.
+
+        The battles and the duels are rated in rating periods of period_size
+        games with Ratings.update_batch(), in the order of the log.
+
+        Syntax
+        ------
+           [ ] = engine.add_batch(coaches_1, coaches_2, winners, pokemons_1,
+                                  pokemons_2, duel_winners, period_size)
+
+        Parameters
+        ----------
+           [in] coaches_N Array of the names of the coaches N.
+           [in] winners Array of the winners of the battles.
+           [in] pokemons_N Array of the IDs of the Pokemons N of the duels.
+           [in] duel_winners Array of the winners of the duels.
+           [in] period_size Number of games of a rating period.
+
+        Returns
+        -------
+           Null .
+
+        Example
+        -------
+           >>> engine.add_batch(names_1, names_2, winners)
+        """
+        for ratings, keys_1, keys_2, game_winners in ((self.__coaches, coaches_1, coaches_2, winners),
+                                                      (self.__pokemons, pokemons_1, pokemons_2, duel_winners)):
+            positions_1 = ratings.get_positions(keys_1)
+            positions_2 = ratings.get_positions(keys_2)
+            scores = winner_scores(game_winners)
+            for start in range(0, len(positions_1), period_size):
+                stop = start + period_size
+                ratings.update_positions(positions_1[start:stop], positions_2[start:stop], scores[start:stop])
+        self.__battles += len(winners)
+        if self.__checkpoint_file is not None:
+            self.checkpoint()
+
+    def checkpoint(self):
+        """Method to write the ratings to the file of the checkpoints at once."""
+        arrays = self.__pokemons.to_arrays('pokemons_')
+        arrays.update(self.__coaches.to_arrays('coaches_'))
+        arrays['battles'] = np.array(self.__battles)
+        _save_atomically(self.__checkpoint_file, arrays)
+        self.__last_checkpoint = self.__battles
+
+
+def load_rating_engine(name_file, checkpoint_interval=100000):
+    """Function to resume a RatingEngine from its last checkpoint.
+
+    Syntax
+    ------
+       [ ] = load_rating_engine(name_file, checkpoint_interval)
+
+    Parameters
+    ----------
+       [in] name_file Name of the file of the checkpoints.
+       [in] checkpoint_interval Number of battles between checkpoints.
+
+    Returns
+    -------
+       RatingEngine Engine with the ratings of the checkpoint, which keeps
+                    writing its checkpoints to the same file.
+
+    Example
+    -------
+       >>> engine = load_rating_engine('ratings.npz')
+    """
+    with np.load(name_file) as data:
+        engine = RatingEngine(_ratings_from_arrays(data, 'pokemons_'), _ratings_from_arrays(data, 'coaches_'),
+                              name_file, checkpoint_interval)
+        engine._RatingEngine__battles = engine._RatingEngine__last_checkpoint = int(data['battles'])
+    return engine
+
+
+
+def main():
+    """Function main of the module.
+
+    The function main of this module is used to test the ratings that are
+    described in this module.
+
+    Syntax
+    ------
+      [ ] = main()
+
+    Parameters
+    ----------
+      Null .
+
+    Returns
+    -------
+      Null .
+
+    Example
+    -------
+      >>> main()
+    """
+    import random
+    import battle
+    from pokemon import Pokemon
+    from pokemon_air import PokemonAir
+    from weapon_type import WeaponType
+
+    print("=================================================================.")
+    print("Test Case 1: Update the Elo and Glicko ratings.")
+    print("=================================================================.")
+    elo = EloRatings()
+    elo.update(24, 11, 1.0)
+    first_rating = elo.get_rating(24)
+    elo.update(24, 12, 0.5)
+
+    # Example of the paper of Glickman: a player of rating 1500 and deviation
+    # 200 beats a player of 1400 and loses against players of 1550 and 1700,
+    # so the rating becomes 1464 and the deviation 151.4.
+    glicko = GlickoRatings()
+    glicko.set_rating('player', 1500.0, 200.0)
+    for key, rating, deviation in (('a', 1400.0, 30.0), ('b', 1550.0, 100.0), ('c', 1700.0, 300.0)):
+        glicko.set_rating(key, rating, deviation)
+    glicko.update_batch(['player', 'player', 'player'], ['a', 'b', 'c'], [1.0, 0.0, 0.0])
+
+    if (abs(first_rating - 1516.0) < 1e-9 and abs(elo.get_rating(11) - 1484.0) < 1e-9
+            and abs(elo.get_rating(24) + elo.get_rating(11) + elo.get_rating(12) - 4500.0) < 1e-9
+            and elo.get_games(24) == 2
+            and abs(glicko.get_rating('player') - 1464.0) < 0.5
+            and abs(glicko.get_deviation('player') - 151.4) < 0.05):
+        print("Test PASS. The ratings have been updated correctly.")
+    else:
+        print("Test FAIL. Check the method update()." + " RESULT: " + str(glicko.get_rating('player')))
+
+
+    print("=================================================================.")
+    print("Test Case 2: The batches match the stream and the checkpoints.")
+    print("=================================================================.")
+    team_1 = [PokemonAir(1, "Pidgey", WeaponType.KICK, 85, 7, 7), Pokemon(2, "Squirtle", WeaponType.ELBOW, 74, 9, 6)]
+    team_2 = [Pokemon(3, "Diglett", WeaponType.PUNCH, 82, 9, 7), PokemonAir(4, "Pidgey", WeaponType.KICK, 70, 10, 6)]
+    results = [battle.simulate(team_1, team_2, battle.random_pokemon_policy, rng=random.Random(seed))
+               for seed in range(50)]
+    matches = []
+    with tempfile.TemporaryDirectory() as directory:
+        name_file = os.path.join(directory, 'ratings.npz')
+        for ratings_class in (EloRatings, GlickoRatings):
+            stream = RatingEngine(ratings_class(), ratings_class())
+            for result in results:
+                stream.add_result('coach_1', 'coach_2', result)
+
+            # The process stops after 45 battles and resumes from the
+            # checkpoint of the battle 40.
+            stopped = RatingEngine(ratings_class(), ratings_class(), name_file, checkpoint_interval=20)
+            for result in results[:45]:
+                stopped.add_result('coach_1', 'coach_2', result)
+            resumed = load_rating_engine(name_file, checkpoint_interval=20)
+            for result in results[resumed.get_battles():]:
+                resumed.add_result('coach_1', 'coach_2', result)
+
+            # One game per period is the same as the stream.
+            batch = RatingEngine(ratings_class(), ratings_class())
+            duels = [duel for result in results for duel in result.duels]
+            batch.add_batch(['coach_1'] * len(results), ['coach_2'] * len(results),
+                            [result.winner for result in results],
+                            [duel[0] for duel in duels], [duel[1] for duel in duels],
+                            [duel[2] for duel in duels], period_size=1)
+            for engine in (resumed, batch):
+                matches.append(engine.get_battles() == stream.get_battles() == 50
+                               and all(abs(engine.get_pokemons().get_rating(key) - stream.get_pokemons().get_rating(key))
+                                       < 1e-6 for key in range(1, 5))
+                               and abs(engine.get_coaches().get_rating('coach_1')
+                                       - stream.get_coaches().get_rating('coach_1')) < 1e-6)
+
+    if all(matches):
+        print("Test PASS. The batches and the checkpoints match the stream.")
+    else:
+        print("Test FAIL. Check the method add_batch()." + " RESULT: " + str(matches))
+
+
+    print("=================================================================.")
+    print("Test Case 3: Rate a tournament of millions of battles.")
+    print("=================================================================.")
+    generator = np.random.default_rng(2021)
+    number_of_battles = 10000000
+    coaches = np.array(['coach_' + str(index) for index in range(64)])
+    engine = RatingEngine()
+    start = time.perf_counter()
+    engine.add_batch(coaches[generator.integers(0, 64, number_of_battles)],
+                     coaches[generator.integers(0, 64, number_of_battles)],
+                     generator.integers(0, 3, number_of_battles),
+                     generator.integers(0, 100000, number_of_battles),
+                     generator.integers(100000, 200000, number_of_battles),
+                     generator.integers(0, 3, number_of_battles))
+    elapsed_batch = time.perf_counter() - start
+
+    stream = RatingEngine()
+    start = time.perf_counter()
+    for index in range(100000):
+        stream.add_battle('coach_1', 'coach_2', 1, ((1, 24, 1, 3), (1, 25, 2, 4)))
+    elapsed_stream = (time.perf_counter() - start) / 100000
+
+    if len(engine.get_pokemons()) == 200000 and engine.get_battles() == number_of_battles:
+        print("Test PASS. " + str(number_of_battles) + " battles were rated in " + str(round(elapsed_batch, 2))
+              + " s, and a battle of the stream in " + str(round(elapsed_stream * 1e6, 2)) + " us.")
+    else:
+        print("Test FAIL. Check the method add_batch().")
+
+
+
+# Checking whether this module is executed just itself alone.
+if __name__ == "__main__":
+    main()
+
+
+# EOF
@@ -0,0 +1,543 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+
+"""
+This Python module contains the replay files of the battles.
+
+@contents :  This module contains the recording of a battle in a replay file
+             (seed, rosters and selections), the headless re-simulation of a
+             replay file with seeking through checkpoints, and the test cases
+             to probe their functionality.
+@project :  N/A
+@program :  N/A
+@file :  replay.py
+@author :  Antonio Artes Garcia (antonio.artesgarcia@ceu.es)
+           Francisco Hernando Gallego (francisco.hernandogallego@ceu.es)
+           Ruben Juarez Cadiz (ruben.juarezcadiz@ceu.es)
+
+@version :  0.0.1, 08 November 2021
+@information :  The Zen of Python
+                  https://www.python.org/dev/peps/pep-0020/
+                Style Guide for Python Code
+                  https://www.python.org/dev/peps/pep-0008/
+                Example NumPy Style Python Docstrings
+                  http://sphinxcontrib-napoleon.readthedocs.io/en/latest/example_numpy.html
+                doctest – Testing through documentation
+                  https://pymotw.com/2/doctest/
+
+@copyright :  Copyright 2021 GNU AFFERO GENERAL PUBLIC.
+              All rights are reserved. Reproduction in whole or in part is
+              prohibited without the written consent of the copyright owner.
+"""
+
+
+# Source packages.
+
+import array
+import bisect
+import collections
+import os
+import random
+import struct
+import sys
+import tempfile
+from battle import Battle, BattleState, first_pokemon_policy, random_pokemon_policy
+from damage import (DAMAGE_MODELS, get_damage_model, get_damage_model_name, get_named_damage_model,
+                    use_damage_model)
+from id_registry import IdRegistry
+from pokemon import Pokemon
+from pokemon_air import PokemonAir
+from pokemon_electricity import PokemonElectricity
+from roster import POKEMON_CLASSES
+from roster_loader import PokemonRow
+from weapon_type import WeaponType
+
+
+# Layout of a replay file. The header holds the magic, the version, the
+# position of the model of damage in damage.DAMAGE_MODELS, the seed,
+# the maximum number of rounds of a duel (0 for no limit), the size of each team, the number of
+# selections and the number of checkpoints. Then one record per Pokemon of
+# each team followed by its name in UTF-8, the position in its team of each
+# selected Pokemon, and the checkpoints. The winner of a checkpoint is -1
+# while the battle is not over.
+MAGIC = b'PKRP'
+VERSION = 2
+HEADER = struct.Struct('<4sHHQIIIII')
+POKEMON = struct.Struct('<qiiiBBH')
+CHECKPOINT = struct.Struct('<IIIiiIIIi')
+
+_WEAPON_TYPES = {weapon_type.value: weapon_type for weapon_type in WeaponType}
+
+# Replay of a battle. The fields team_1 and team_2 hold the PokemonRow of each
+# Pokemon as it was at the start, choices the position in its team of each
+# Pokemon selected, in the order of the selections, and checkpoints a tuple of
+# Checkpoint sorted by round, and damage_model the name of the model of damage
+# in damage.DAMAGE_MODELS.
+Replay = collections.namedtuple(
+    'Replay', ['seed', 'max_rounds', 'team_1', 'team_2', 'choices', 'checkpoints', 'damage_model'],
+    defaults=('classic',))
+
+# State of a battle and of the random numbers after a round. The field
+# choice_position is the number of selections already made.
+Checkpoint = collections.namedtuple(
+    'Checkpoint', ['choice_position', 'random_state', 'state'])
+
+
+def _pokemon_row(pokemon):
+    """Function to obtain the PokemonRow of a Pokemon with its class."""
+    for pokemon_class in reversed(POKEMON_CLASSES):
+        if isinstance(pokemon, pokemon_class):
+            break
+    return PokemonRow(pokemon.get_id(), pokemon.get_pokemon_name(), pokemon.get_weapon_type(),
+                      pokemon.get_health_points(), pokemon.get_attack_rating(),
+                      pokemon.get_defense_rating(), pokemon_class)
+
+
+def record_battle(team_1, team_2, policy_1=first_pokemon_policy, policy_2=None,
+                  seed=None, max_rounds=10000, checkpoint_interval=0, sink=None):
+    """Function to play a battle and record its replay.
+
+    The rounds of the battle draw their random numbers from a random.Random
+    seeded with seed, so the replay holds everything needed to play it
+    again. The policies are called outside the rounds, so their own random
+    numbers do not change the replay. The model of damage of the battle must
+    be one of damage.DAMAGE_MODELS, and its name is kept in the replay. The
+    health of the Pokemons is restored afterwards.
+
+    Syntax
+    ------
+       [ ] = record_battle(team_1, team_2, policy_1, policy_2, seed,
+                           max_rounds, checkpoint_interval, sink)
+
+    Parameters
+    ----------
+       [in] team_1 List of the Pokemons of the coach 1.
+       [in] team_2 List of the Pokemons of the coach 2.
+       [in] policy_1 Selection policy of the coach 1.
+       [in] policy_2 Selection policy of the coach 2. By default the same as
+                     the policy of the coach 1.
+       [in] seed Seed of the battle. By default a random one.
+       [in] max_rounds Maximum number of rounds of a single duel, or None
+                       for no limit.
+       [in] checkpoint_interval Number of rounds between the checkpoints kept
+                                in the replay, or 0 for none.
+       [in] sink Sink of the events of the battle, or None.
+
+    Returns
+    -------
+       tuple (Replay, BattleResult) of the battle.
+
+    Example
+    -------
+       >>> replay, result = record_battle(coach_1, coach_2, seed=7)
+    """
+    if seed is None:
+        seed = random.Random().getrandbits(64)
+    damage_model = get_damage_model_name(get_damage_model())
+    policies = (None, policy_1, policy_1 if policy_2 is None else policy_2)
+    rows = (tuple(_pokemon_row(pokemon) for pokemon in team_1),
+            tuple(_pokemon_row(pokemon) for pokemon in team_2))
+    positions = (None,
+                 {id(pokemon): position for position, pokemon in enumerate(team_1)},
+                 {id(pokemon): position for position, pokemon in enumerate(team_2)})
+    choices = []
+    checkpoints = []
+
+    rng = random.Random(seed)
+    try:
+        battle = Battle(team_1, team_2, max_rounds, sink=sink, rng=rng)
+        while not battle.is_over():
+            coach = battle.needs_selection()
+            if coach:
+                pokemon = policies[coach](coach, battle.get_alive(coach), battle.get_fighter(3 - coach))
+                choices.append(positions[coach][id(pokemon)])
+                battle.select(coach, pokemon)
+            else:
+                battle.step()
+                if checkpoint_interval and battle.get_rounds() % checkpoint_interval == 0:
+                    checkpoints.append(Checkpoint(len(choices), rng.getstate(), battle.snapshot()))
+        result = battle.result()
+    finally:
+        for team, team_rows in zip((team_1, team_2), rows):
+            for pokemon, row in zip(team, team_rows):
+                pokemon.set_health_points(row.health_points)
+
+    replay = Replay(seed, max_rounds, rows[0], rows[1], tuple(choices), tuple(checkpoints), damage_model)
+    return replay, result
+
+
+def write_replay(name_file, replay):
+    """Function to write a Replay to a replay file.
+
+    Syntax
+    ------
+       [ ] = write_replay(name_file, replay)
+
+    Parameters
+    ----------
+       [in] name_file Name of the replay file.
+       [in] replay Replay to write.
+
+    Returns
+    -------
+       Null .
+
+    Example
+    -------
+       >>> write_replay("battle.pkrp", replay)
+    """
+    class_codes = {pokemon_class: code for code, pokemon_class in enumerate(POKEMON_CLASSES)}
+    model_code = list(DAMAGE_MODELS).index(replay.damage_model)
+    with open(name_file, 'wb') as replay_file:
+        replay_file.write(HEADER.pack(MAGIC, VERSION, model_code, replay.seed, replay.max_rounds or 0,
+                                      len(replay.team_1), len(replay.team_2),
+                                      len(replay.choices), len(replay.checkpoints)))
+        for row in replay.team_1 + replay.team_2:
+            name = row.pokemon_name.encode('utf-8')
+            replay_file.write(POKEMON.pack(row.id_pokemon, row.health_points, row.attack_rating,
+                                           row.defense_rating, class_codes[row.pokemon_class],
+                                           row.weapon_type.value, len(name)))
+            replay_file.write(name)
+        replay_file.write(array.array('I', replay.choices).tobytes())
+        for checkpoint in replay.checkpoints:
+            state = checkpoint.state
+            replay_file.write(CHECKPOINT.pack(state.rounds, state.duel_rounds, checkpoint.choice_position,
+                                              state.fighters[0], state.fighters[1],
+                                              len(state.alive[0]), len(state.alive[1]), len(state.duels),
+                                              -1 if state.winner is None else state.winner))
+            replay_file.write(array.array('I', state.alive[0] + state.alive[1]).tobytes())
+            replay_file.write(array.array('i', state.health_points[0] + state.health_points[1]).tobytes())
+            replay_file.write(array.array('q', [value for duel in state.duels for value in duel]).tobytes())
+            replay_file.write(array.array('I', checkpoint.random_state[1]).tobytes())
+
+
+def read_replay(name_file):
+    """Function to read a Replay from a replay file.
+
+    Syntax
+    ------
+       [ ] = read_replay(name_file)
+
+    Parameters
+    ----------
+       [in] name_file Name of the replay file.
+
+    Returns
+    -------
+       Replay Replay of the file.
+
+    Example
+    -------
+       >>> replay = read_replay("battle.pkrp")
+    """
+    with open(name_file, 'rb') as replay_file:
+        data = replay_file.read()
+    (magic, version, model_code, seed, max_rounds, count_1, count_2,
+     choice_count, checkpoint_count) = HEADER.unpack_from(data, 0)
+    if magic != MAGIC or version != VERSION or model_code >= len(DAMAGE_MODELS):
+        raise ValueError('El fichero ' + str(name_file) + ' no es una repetición')
+    offset = HEADER.size
+
+    rows = []
+    for _ in range(count_1 + count_2):
+        (id_pokemon, health_points, attack_rating, defense_rating,
+         class_code, weapon_type, length) = POKEMON.unpack_from(data, offset)
+        offset += POKEMON.size
+        rows.append(PokemonRow(id_pokemon, data[offset:offset + length].decode('utf-8'),
+                               _WEAPON_TYPES[weapon_type], health_points, attack_rating,
+                               defense_rating, POKEMON_CLASSES[class_code]))
+        offset += length
+
+    def read_array(typecode, count):
+        nonlocal offset
+        values = array.array(typecode)
+        values.frombytes(data[offset:offset + count * values.itemsize])
+        offset += count * values.itemsize
+        return tuple(values)
+
+    choices = read_array('I', choice_count)
+    checkpoints = []
+    for _ in range(checkpoint_count):
+        (rounds, duel_rounds, choice_position, fighter_1, fighter_2,
+         alive_count_1, alive_count_2, duel_count, winner) = CHECKPOINT.unpack_from(data, offset)
+        offset += CHECKPOINT.size
+        alive = read_array('I', alive_count_1 + alive_count_2)
+        health_points = read_array('i', count_1 + count_2)
+        duels = read_array('q', 4 * duel_count)
+        random_state = (3, read_array('I', 625), None)
+        state = BattleState(rounds, duel_rounds, (fighter_1, fighter_2),
+                            (alive[:alive_count_1], alive[alive_count_1:]),
+                            (health_points[:count_1], health_points[count_1:]),
+                            tuple(duels[i:i + 4] for i in range(0, len(duels), 4)),
+                            None if winner < 0 else winner)
+        checkpoints.append(Checkpoint(choice_position, random_state, state))
+
+    return Replay(seed, max_rounds or None, tuple(rows[:count_1]), tuple(rows[count_1:]),
+                  choices, tuple(checkpoints), list(DAMAGE_MODELS)[model_code])
+
+
+class Replayer():
+    """Python class to implement the headless re-simulation of a Replay.
+
+    This Python class builds the Pokemons of a Replay in a registry of its
+    own and plays the battle again with its seed and its selections. The
+    battle can be sought to any round: the nearest checkpoint at or before
+    that round is restored and only the rounds after it are played. Besides
+    the checkpoints of the Replay, a checkpoint is kept every
+    checkpoint_interval rounds played, so seeking backwards is cheap too.
+    The rounds are played with the model of damage of the Replay and draw their random numbers from a random.Random of their own,
+    so the state of the module random of the caller is not modified.
+
+    Syntax
+    ------
+      obj = Replayer(replay, checkpoint_interval)
+
+    Parameters
+    ----------
+      [in] replay Replay to play.
+      [in] checkpoint_interval Number of rounds between the checkpoints kept
+                               while playing, or 0 for none.
+
+    Returns
+    -------
+      obj Python object output parameter that represents an instance
+          of the class Replayer.
+
+    Attributes
+    ----------
+
+    Example
+    -------
+      >>> replayer = Replayer(read_replay("battle.pkrp"))
+      >>> state = replayer.seek(100)
+    """
+
+    def __init__(self, replay, checkpoint_interval=0):
+        self.__replay = replay
+        self.__checkpoint_interval = checkpoint_interval
+        self.__registry = IdRegistry()
+        self.__teams = tuple([row.pokemon_class(*row[:6], registry=self.__registry) for row in team]
+                             for team in (replay.team_1, replay.team_2))
+        self.__checkpoints = {checkpoint.state.rounds: checkpoint for checkpoint in replay.checkpoints}
+        self.__rounds_of_checkpoints = sorted(self.__checkpoints)
+        self.__start()
+
+    def __start(self):
+        for team, rows in zip(self.__teams, (self.__replay.team_1, self.__replay.team_2)):
+            for pokemon, row in zip(team, rows):
+                pokemon.set_health_points(row.health_points)
+        self.__rng = random.Random(self.__replay.seed)
+        self.__battle = Battle(self.__teams[0], self.__teams[1], self.__replay.max_rounds,
+                               rng=self.__rng)
+        self.__choice_position = 0
+
+    def get_battle(self):
+        return self.__battle
+
+    def get_team(self, coach):
+        return self.__teams[coach - 1]
+
+    def seek(self, round_number):
+        """Method to set the battle to the end of a round and get its state.
+
+        If the battle ends before that round, the final state is returned.
+        """
+        index = bisect.bisect_right(self.__rounds_of_checkpoints, round_number) - 1
+        checkpoint_rounds = self.__rounds_of_checkpoints[index] if index >= 0 else None
+        if self.__battle.get_rounds() > round_number:
+            if checkpoint_rounds is None:
+                self.__start()
+            else:
+                self.__restore(self.__checkpoints[checkpoint_rounds])
+        elif checkpoint_rounds is not None and checkpoint_rounds > self.__battle.get_rounds():
+            self.__restore(self.__checkpoints[checkpoint_rounds])
+        self.__advance(round_number)
+        return self.__battle.snapshot()
+
+    def run(self):
+        """Method to play the battle until its end and get its BattleResult."""
+        self.__advance(None)
+        return self.__battle.result()
+
+    def __restore(self, checkpoint):
+        self.__battle.restore(checkpoint.state)
+        self.__choice_position = checkpoint.choice_position
+        self.__rng.setstate(checkpoint.random_state)
+
+    def __advance(self, round_number):
+        with use_damage_model(get_named_damage_model(self.__replay.damage_model)):
+            self.__play(round_number)
+
+    def __play(self, round_number):
+        battle = self.__battle
+        choices = self.__replay.choices
+        interval = self.__checkpoint_interval
+        while not battle.is_over() and (round_number is None or battle.get_rounds() < round_number):
+            coach = battle.needs_selection()
+            if coach:
+                position = choices[self.__choice_position]
+                self.__choice_position += 1
+                battle.select(coach, self.__teams[coach - 1][position])
+            else:
+                battle.step()
+                rounds = battle.get_rounds()
+                if interval and rounds % interval == 0 and rounds not in self.__checkpoints:
+                    self.__checkpoints[rounds] = Checkpoint(self.__choice_position, self.__rng.getstate(),
+                                                            battle.snapshot())
+                    bisect.insort(self.__rounds_of_checkpoints, rounds)
+
+
+def replay_file(name_file, round_number=None):
+    """Function to re-simulate the battle of a replay file.
+
+    Syntax
+    ------
+       [ ] = replay_file(name_file, round_number)
+
+    Parameters
+    ----------
+       [in] name_file Name of the replay file.
+       [in] round_number Round to seek to, or None to play the whole battle.
+
+    Returns
+    -------
+       BattleResult or BattleState Result of the battle, or its state at the
+                                   end of the round round_number.
+
+    Example
+    -------
+       >>> replay_file("battle.pkrp")
+    """
+    replayer = Replayer(read_replay(name_file))
+    if round_number is None:
+        return replayer.run()
+    return replayer.seek(round_number)
+
+
+
+def main():
+    """Function main of the module.
+
+    The function main of this module is used to test the replay files that
+    are described in this module.
+
+    Syntax
+    ------
+      [ ] = main()
+
+    Parameters
+    ----------
+      Null .
+
+    Returns
+    -------
+      Null .
+
+    Example
+    -------
+      >>> main()
+    """
+
+    registry = IdRegistry()
+    team_1 = [PokemonAir(1, "Pidgey", WeaponType.KICK, 300, 8, 6, registry=registry),
+              PokemonElectricity(2, "Pikachu", WeaponType.HEADBUTT, 250, 9, 7, registry=registry),
+              Pokemon(3, "Squirtle", WeaponType.ELBOW, 280, 8, 6, registry=registry)]
+    team_2 = [PokemonAir(4, "Spearow", WeaponType.PUNCH, 260, 9, 5, registry=registry),
+              Pokemon(5, "Diglett", WeaponType.PUNCH, 290, 9, 7, registry=registry),
+              PokemonAir(6, "Zubat", WeaponType.KICK, 240, 10, 6, registry=registry)]
+
+    print("=================================================================.")
+    print("Test Case 1: Record a battle and play it again from a file.")
+    print("=================================================================.")
+    replay, result = record_battle(team_1, team_2, random_pokemon_policy, seed=7,
+                                   checkpoint_interval=25)
+    name_file = os.path.join(tempfile.mkdtemp(), "battle.pkrp")
+    write_replay(name_file, replay)
+    replay_read = read_replay(name_file)
+
+    if replay_read == replay:
+        print("Test PASS. The functions write_replay() and read_replay() have been implemented correctly.")
+    else:
+        print("Test FAIL. Check the functions write_replay() and read_replay().")
+
+    state = random.getstate()
+    if replay_file(name_file) == result and random.getstate() == state:
+        print("Test PASS. The battle has been played again correctly.")
+    else:
+        print("Test FAIL. Check the class Replayer()." + " RESULT: " + str(result))
+
+
+    print("=================================================================.")
+    print("Test Case 2: Seek to a round through the checkpoints.")
+    print("=================================================================.")
+    middle = result.rounds // 2
+    replayer = Replayer(replay_read._replace(checkpoints=()))
+    expected = replayer.seek(middle)
+    replayer = Replayer(replay_read, checkpoint_interval=10)
+
+    if (replayer.seek(middle) == expected and replayer.seek(3).rounds == 3
+            and replayer.seek(middle) == expected and replayer.run() == result):
+        print("Test PASS. The method seek() has been implemented correctly.")
+    else:
+        print("Test FAIL. Check the method seek().")
+
+
+    print("=================================================================.")
+    print("Test Case 3: Seek to the final round with a checkpoint every round.")
+    print("=================================================================.")
+    replay, result = record_battle(team_1, team_2, random_pokemon_policy, seed=7,
+                                   checkpoint_interval=1)
+    write_replay(name_file, replay)
+    replay_read = read_replay(name_file)
+    replayer = Replayer(replay_read)
+    state = replayer.seek(result.rounds)
+
+    if (replay_read == replay and state.winner == result.winner
+            and replayer.run() == result):
+        print("Test PASS. The final checkpoint keeps the winner of the battle.")
+    else:
+        print("Test FAIL. Check the checkpoints of the final round.")
+
+
+    print("=================================================================.")
+    print("Test Case 4: Write a battle without a limit of rounds.")
+    print("=================================================================.")
+    replay, result = record_battle(team_1, team_2, seed=7, max_rounds=None)
+    write_replay(name_file, replay)
+    replay_read = read_replay(name_file)
+
+    if replay_read == replay and replay_read.max_rounds is None and replay_file(name_file) == result:
+        print("Test PASS. A battle without a limit of rounds has been written correctly.")
+    else:
+        print("Test FAIL. Check the field max_rounds of write_replay() and read_replay().")
+
+
+    print("=================================================================.")
+    print("Test Case 5: Play a battle again with its model of damage.")
+    print("=================================================================.")
+    import damage
+    with damage.use_damage_model(damage.WEAPON_DAMAGE):
+        replay, result = record_battle(team_1, team_2, random_pokemon_policy, seed=7)
+    write_replay(name_file, replay)
+    replay_read = read_replay(name_file)
+
+    if (replay_read.damage_model == 'weapon' and replay_file(name_file) == result
+            and result != record_battle(team_1, team_2, random_pokemon_policy, seed=7)[1]):
+        print("Test PASS. The model of damage has been kept in the replay.")
+    else:
+        print("Test FAIL. Check the field damage_model of the class Replay.")
+    os.remove(name_file)
+    os.rmdir(os.path.dirname(name_file))
+
+
+
+# Checking whether this module is executed just itself alone.
+if __name__ == "__main__":
+    if len(sys.argv) > 1:
+        print(replay_file(sys.argv[1], int(sys.argv[2]) if len(sys.argv) > 2 else None))
+    else:
+        main()
+
+
+# EOF
@@ -0,0 +1,517 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+
+"""
+This Python module contains the store of the results of the battles.
+
+@contents :  This module contains a store of the results of the battles in a
+             SQLite database, the queries of aggregates over them and the test
+             cases to probe its functionality.
+@project :  N/A
+@program :  N/A
+@file :  result_store.py
+@author :  Antonio Artes Garcia (antonio.artesgarcia@ceu.es)
+           Francisco Hernando Gallego (francisco.hernandogallego@ceu.es)
+           Ruben Juarez Cadiz (ruben.juarezcadiz@ceu.es)
+
+@version :  0.0.1, 08 November 2021
+@information :  The Zen of Python
+                  https://www.python.org/dev/peps/pep-0020/
+                Style Guide for Python Code
+                  https://www.python.org/dev/peps/pep-0008/
+                Example NumPy Style Python Docstrings
+                  http://sphinxcontrib-napoleon.readthedocs.io/en/latest/example_numpy.html
+                doctest – Testing through documentation
+                  https://pymotw.com/2/doctest/
+
+@copyright :  Copyright 2021 GNU AFFERO GENERAL PUBLIC.
+              All rights are reserved. Reproduction in whole or in part is
+              prohibited without the written consent of the copyright owner.
+"""
+
+
+# Source packages.
+
+import collections
+import os
+import sqlite3
+import tempfile
+import time
+from weapon_type import WeaponType
+
+
+# Aggregate of the results of a group of Pokemons or coaches. The field key
+# is the name, the WeaponType or the coach of the group, wins, losses and
+# draws count its duels or battles and win_rate is wins divided by all of them.
+WinRate = collections.namedtuple('WinRate', ['key', 'wins', 'losses', 'draws', 'win_rate'])
+
+
+_SCHEMA = (
+    '''CREATE TABLE IF NOT EXISTS coaches (
+           id_coach INTEGER PRIMARY KEY,
+           name TEXT NOT NULL UNIQUE)''',
+    '''CREATE TABLE IF NOT EXISTS pokemons (
+           id_pokemon INTEGER PRIMARY KEY,
+           pokemon_name TEXT NOT NULL,
+           weapon_type INTEGER NOT NULL,
+           pokemon_class TEXT NOT NULL)''',
+    '''CREATE TABLE IF NOT EXISTS battles (
+           id_battle INTEGER PRIMARY KEY,
+           coach_1 INTEGER NOT NULL,
+           coach_2 INTEGER NOT NULL,
+           winner INTEGER NOT NULL,
+           rounds INTEGER NOT NULL)''',
+    '''CREATE TABLE IF NOT EXISTS duels (
+           id_duel INTEGER PRIMARY KEY,
+           id_battle INTEGER NOT NULL,
+           id_pokemon_1 INTEGER NOT NULL,
+           id_pokemon_2 INTEGER NOT NULL,
+           winner INTEGER NOT NULL,
+           rounds INTEGER NOT NULL)''',
+    '''CREATE TABLE IF NOT EXISTS pokemon_results (
+           id_pokemon INTEGER NOT NULL,
+           pokemon_name TEXT NOT NULL,
+           weapon_type INTEGER NOT NULL,
+           pokemon_class TEXT NOT NULL,
+           wins INTEGER NOT NULL,
+           losses INTEGER NOT NULL,
+           draws INTEGER NOT NULL,
+           rounds INTEGER NOT NULL,
+           PRIMARY KEY (id_pokemon, pokemon_name, weapon_type, pokemon_class))''',
+    'CREATE INDEX IF NOT EXISTS battles_coach_1 ON battles (coach_1, winner)',
+    'CREATE INDEX IF NOT EXISTS battles_coach_2 ON battles (coach_2, winner)',
+    'CREATE INDEX IF NOT EXISTS duels_battle ON duels (id_battle)',
+    'CREATE INDEX IF NOT EXISTS duels_pokemon_1 ON duels (id_pokemon_1, winner)',
+    'CREATE INDEX IF NOT EXISTS duels_pokemon_2 ON duels (id_pokemon_2, winner)',
+)
+
+_INSERT_BATTLE = 'INSERT INTO battles (id_battle, coach_1, coach_2, winner, rounds) VALUES (?, ?, ?, ?, ?)'
+_INSERT_DUEL = 'INSERT INTO duels (id_battle, id_pokemon_1, id_pokemon_2, winner, rounds) VALUES (?, ?, ?, ?, ?)'
+_INSERT_POKEMON = ('INSERT OR REPLACE INTO pokemons (id_pokemon, pokemon_name, weapon_type, pokemon_class) '
+                   'VALUES (?, ?, ?, ?)')
+_ADD_POKEMON_RESULTS = '''
+    INSERT INTO pokemon_results (id_pokemon, pokemon_name, weapon_type, pokemon_class, wins, losses, draws, rounds)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+    ON CONFLICT (id_pokemon, pokemon_name, weapon_type, pokemon_class) DO UPDATE SET
+        wins = wins + excluded.wins, losses = losses + excluded.losses,
+        draws = draws + excluded.draws, rounds = rounds + excluded.rounds'''
+
+# Name, weapon and class of the results of a Pokemon that was never added with
+# add_pokemons(). Those results are left out of the aggregates.
+_UNKNOWN_POKEMON = ('', -1, '')
+
+# Each battle seen from each of its coaches, with won = 1, lost = -1 and
+# drawn = 0.
+_COACH_BATTLES = '''
+    SELECT coach_1 AS id_coach, CASE winner WHEN 1 THEN 1 WHEN 2 THEN -1 ELSE 0 END AS outcome FROM battles
+    UNION ALL
+    SELECT coach_2, CASE winner WHEN 2 THEN 1 WHEN 1 THEN -1 ELSE 0 END FROM battles'''
+
+_POKEMON_AGGREGATES = '''
+    SUM(wins), SUM(losses), SUM(draws), CAST(SUM(wins) AS REAL) / SUM(wins + losses + draws) AS win_rate
+    FROM pokemon_results WHERE weapon_type >= 0'''
+
+
+class ResultStore():
+    """Python class to implement the store of the results of the battles.
+
+    This Python class keeps the battles, the duels, the coaches and the
+    Pokemons in a SQLite database in WAL mode, so the queries can read while
+    the results are written. The results are kept in memory and inserted in
+    batches of batch_size battles, each one in a single transaction with
+    executemany() on the same prepared statements. The IDs of the battles
+    are assigned inside that transaction, which holds the lock of the
+    database from its start, so several stores, one per process, can add
+    results to the same file.
+
+    Each battle is one row, indexed by each coach and the winner, and each
+    duel is one row, indexed by its battle and by the ID of each Pokemon and
+    the winner. The wins, losses, draws and rounds of every Pokemon are also
+    kept in a table whose key is its ID with the name, the weapon and the
+    class that it had when the results were added, so a reused ID does not
+    move the past results to its new name. The duels of a batch are counted
+    in memory and added with one upsert per Pokemon, and the win rates are
+    computed by SQL aggregates over that table.
+
+    Syntax
+    ------
+      obj = ResultStore(name_file, batch_size)
+
+    Parameters
+    ----------
+      [in] name_file Name of the database file. It is created if it does not
+                     exist.
+      [in] batch_size Number of battles inserted at once.
+
+    Returns
+    -------
+      obj Python object output parameter that represents an instance
+          of the class ResultStore.
+
+    Attributes
+    ----------
+
+    Example
+    -------
+      >>> with ResultStore('results.sqlite3') as store:
+      ...     store.add_pokemons(coach_1 + coach_2)
+      ...     store.add_result('coach_1', 'coach_2', battle.simulate(coach_1, coach_2))
+    """
+
+    def __init__(self, name_file, batch_size=50000):
+        self.__connection = sqlite3.connect(name_file)
+        self.__connection.execute('PRAGMA journal_mode = WAL')
+        # In WAL mode a commit with synchronous NORMAL is still atomic and
+        # durable against a crash of the process.
+        self.__connection.execute('PRAGMA synchronous = NORMAL')
+        with self.__connection:
+            for statement in _SCHEMA:
+                self.__connection.execute(statement)
+        self.__batch_size = batch_size
+        self.__coaches = dict(self.__connection.execute('SELECT name, id_coach FROM coaches'))
+        self.__pokemons = {row[0]: row[1:] for row in self.__connection.execute(
+            'SELECT id_pokemon, pokemon_name, weapon_type, pokemon_class FROM pokemons')}
+        self.__battles = []
+        self.__duels = collections.Counter()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+        return False
+
+    def close(self):
+        """Method to insert the pending results and close the database."""
+        if self.__connection is not None:
+            self.flush()
+            self.__connection.close()
+            self.__connection = None
+
+    def get_coach(self, name):
+        """Method to obtain the ID of a coach, inserting it if it is new."""
+        id_coach = self.__coaches.get(name)
+        if id_coach is None:
+            with self.__connection:
+                self.__connection.execute('INSERT OR IGNORE INTO coaches (name) VALUES (?)', (name,))
+            id_coach = self.__connection.execute('SELECT id_coach FROM coaches WHERE name = ?',
+                                                 (name,)).fetchone()[0]
+            self.__coaches[name] = id_coach
+        return id_coach
+
+    def add_pokemons(self, pokemons):
+        """Method to store the name, the weapon and the class of Pokemons.
+
+        The results added afterwards are kept with them, so a Pokemon added
+        again with the same ID and another name only changes the new ones.
+        """
+        self.flush()
+        rows = [(pokemon.get_id(), pokemon.get_pokemon_name(), pokemon.get_weapon_type().value,
+                 type(pokemon).__name__) for pokemon in pokemons]
+        with self.__connection:
+            self.__connection.executemany(_INSERT_POKEMON, rows)
+        self.__pokemons.update((row[0], row[1:]) for row in rows)
+
+    def add_battle(self, coach_1, coach_2, winner, rounds, duels=()):
+        """Method to add the result of a battle.
+
+        The battle gets its ID when it is inserted by flush().
+
+        Syntax
+        ------
+           [ ] = store.add_battle(coach_1, coach_2, winner, rounds, duels)
+
+        Parameters
+        ----------
+           [in] coach_1 Name of the coach 1.
+           [in] coach_2 Name of the coach 2.
+           [in] winner 1 or 2 for the coach that won and 0 for a draw.
+           [in] rounds Number of rounds of the battle.
+           [in] duels Tuples (id_pokemon_1, id_pokemon_2, winner, rounds) of
+                      the duels of the battle.
+
+        Returns
+        -------
+           Null .
+
+        Example
+        -------
+           >>> store.add_battle('coach_1', 'coach_2', 1, 12)
+        """
+        coaches = self.__coaches
+        self.__battles.append((coaches[coach_1] if coach_1 in coaches else self.get_coach(coach_1),
+                               coaches[coach_2] if coach_2 in coaches else self.get_coach(coach_2),
+                               winner, rounds, duels))
+        self.__duels.update(duels)
+        if len(self.__battles) >= self.__batch_size:
+            self.flush()
+
+    def add_result(self, coach_1, coach_2, result):
+        """Method to add a BattleResult of battle.simulate() or battle.Battle."""
+        self.add_battle(coach_1, coach_2, result.winner, result.rounds, result.duels)
+
+    def flush(self):
+        """Method to insert the pending results in a single transaction.
+
+        Returns the range of the IDs given to the pending battles, in the
+        order in which they were added.
+        """
+        if not self.__battles:
+            return range(0)
+        results = collections.defaultdict(lambda: [0, 0, 0, 0])
+        for (id_pokemon_1, id_pokemon_2, winner, rounds), count in self.__duels.items():
+            for id_pokemon, outcome in ((id_pokemon_1, (2, 0, 1)[winner]), (id_pokemon_2, (2, 1, 0)[winner])):
+                results[id_pokemon][outcome] += count
+                results[id_pokemon][3] += rounds * count
+        connection = self.__connection
+        with connection:
+            # The lock is taken before the last ID is read, so no other store
+            # can insert the same IDs.
+            connection.execute('BEGIN IMMEDIATE')
+            first = connection.execute('SELECT COALESCE(MAX(id_battle), 0) + 1 FROM battles').fetchone()[0]
+            for id_pokemon in results.keys() - self.__pokemons.keys():
+                row = connection.execute('SELECT pokemon_name, weapon_type, pokemon_class FROM pokemons '
+                                         'WHERE id_pokemon = ?', (id_pokemon,)).fetchone()
+                if row is not None:
+                    self.__pokemons[id_pokemon] = row
+            connection.executemany(_INSERT_BATTLE, (
+                (id_battle,) + battle[:4] for id_battle, battle in enumerate(self.__battles, first)))
+            connection.executemany(_INSERT_DUEL, (
+                (id_battle,) + duel for id_battle, battle in enumerate(self.__battles, first)
+                for duel in battle[4]))
+            connection.executemany(_ADD_POKEMON_RESULTS, (
+                (id_pokemon,) + self.__pokemons.get(id_pokemon, _UNKNOWN_POKEMON) + tuple(counts)
+                for id_pokemon, counts in results.items()))
+        ids = range(first, first + len(self.__battles))
+        self.__battles = []
+        self.__duels.clear()
+        return ids
+
+    def get_battle_count(self):
+        self.flush()
+        return self.__connection.execute('SELECT COUNT(*) FROM battles').fetchone()[0]
+
+    def get_battle(self, id_battle):
+        """Method to obtain a battle as (coach_1, coach_2, winner, rounds, duels)."""
+        self.flush()
+        row = self.__connection.execute('''
+            SELECT coach_1.name, coach_2.name, winner, rounds FROM battles
+            JOIN coaches AS coach_1 ON coach_1.id_coach = battles.coach_1
+            JOIN coaches AS coach_2 ON coach_2.id_coach = battles.coach_2
+            WHERE id_battle = ?''', (id_battle,)).fetchone()
+        if row is None:
+            raise KeyError('La batalla ' + str(id_battle) + ' no existe')
+        return row + (self.__connection.execute(
+            'SELECT id_pokemon_1, id_pokemon_2, winner, rounds FROM duels WHERE id_battle = ? ORDER BY id_duel',
+            (id_battle,)).fetchall(),)
+
+    def get_pokemon_duels(self, id_pokemon, winner=None):
+        """Method to obtain the duels of a Pokemon through the indexes of its ID.
+
+        Returns a list of tuples (id_battle, id_pokemon_1, id_pokemon_2,
+        winner, rounds), only of the duels that the Pokemon won if winner is
+        True or of those it did not win if it is False.
+        """
+        self.flush()
+        if winner is None:
+            condition_1 = condition_2 = ''
+        else:
+            condition_1 = ' AND winner ' + ('=' if winner else '!=') + ' 1'
+            condition_2 = ' AND winner ' + ('=' if winner else '!=') + ' 2'
+        return self.__connection.execute(
+            'SELECT id_battle, id_pokemon_1, id_pokemon_2, winner, rounds FROM duels WHERE id_pokemon_1 = ?'
+            + condition_1 + ' UNION ALL '
+            'SELECT id_battle, id_pokemon_1, id_pokemon_2, winner, rounds FROM duels WHERE id_pokemon_2 = ?'
+            + condition_2 + ' ORDER BY id_battle', (id_pokemon, id_pokemon)).fetchall()
+
+    def get_pokemon_record(self, id_pokemon):
+        """Method to obtain the wins, the losses and the draws of a Pokemon."""
+        self.flush()
+        row = self.__connection.execute('SELECT SUM(wins), SUM(losses), SUM(draws) FROM pokemon_results '
+                                        'WHERE id_pokemon = ?', (id_pokemon,)).fetchone()
+        return row if row[0] is not None else (0, 0, 0)
+
+    def win_rate_by_pokemon_name(self):
+        """Method to obtain the WinRate of the duels of each name of Pokemon.
+
+        Returns a list of WinRate sorted by win rate, the best first.
+        """
+        self.flush()
+        return [WinRate(*row) for row in self.__connection.execute(
+            'SELECT pokemon_name,' + _POKEMON_AGGREGATES + '''
+            GROUP BY pokemon_name ORDER BY win_rate DESC, pokemon_name''')]
+
+    def win_rate_by_weapon_type(self):
+        """Method to obtain the WinRate of the duels of each WeaponType.
+
+        Returns a list of WinRate sorted by win rate, the best first.
+        """
+        self.flush()
+        return [WinRate(WeaponType(row[0]), *row[1:]) for row in self.__connection.execute(
+            'SELECT weapon_type,' + _POKEMON_AGGREGATES + '''
+            GROUP BY weapon_type ORDER BY win_rate DESC, weapon_type''')]
+
+    def win_rate_by_coach(self):
+        """Method to obtain the WinRate of the battles of each coach.
+
+        Returns a list of WinRate sorted by win rate, the best first.
+        """
+        self.flush()
+        return [WinRate(*row) for row in self.__connection.execute(
+            'SELECT coaches.name, SUM(outcome = 1), SUM(outcome = -1), SUM(outcome = 0), AVG(outcome = 1) '
+            'AS win_rate FROM (' + _COACH_BATTLES + ''')
+            JOIN coaches USING (id_coach)
+            GROUP BY coaches.id_coach ORDER BY win_rate DESC, coaches.name''')]
+
+
+
+def main():
+    """Function main of the module.
+
+    The function main of this module is used to test the store that is
+    described in this module.
+
+    Syntax
+    ------
+      [ ] = main()
+
+    Parameters
+    ----------
+      Null .
+
+    Returns
+    -------
+      Null .
+
+    Example
+    -------
+      >>> main()
+    """
+    import random
+    import battle
+    from pokemon import Pokemon
+    from pokemon_air import PokemonAir
+    from pokemon_earth import PokemonEarth
+
+    team_1 = [PokemonAir(1, "Pidgey", WeaponType.KICK, 85, 7, 7),
+              PokemonEarth(2, "Diglett", WeaponType.HEADBUTT, 60, 8, 15)]
+    team_2 = [Pokemon(3, "Squirtle", WeaponType.ELBOW, 74, 9, 6),
+              PokemonAir(4, "Pidgey", WeaponType.KICK, 70, 10, 6)]
+    results = [battle.simulate(team_1, team_2, battle.random_pokemon_policy, rng=random.Random(seed))
+               for seed in range(200)]
+
+    with tempfile.TemporaryDirectory() as directory:
+        name_file = os.path.join(directory, 'results.sqlite3')
+
+        print("=================================================================.")
+        print("Test Case 1: Store the results and aggregate them in SQL.")
+        print("=================================================================.")
+        with ResultStore(name_file, batch_size=64) as store:
+            store.add_pokemons(team_1 + team_2)
+            for result in results:
+                store.add_result('coach_1', 'coach_2', result)
+            by_name = {row.key: row for row in store.win_rate_by_pokemon_name()}
+            by_weapon = {row.key: row for row in store.win_rate_by_weapon_type()}
+            by_coach = {row.key: row for row in store.win_rate_by_coach()}
+            record = store.get_pokemon_record(2)
+
+        # The same aggregates computed in Python.
+        names = {pokemon.get_id(): pokemon.get_pokemon_name() for pokemon in team_1 + team_2}
+        weapons = {pokemon.get_id(): pokemon.get_weapon_type() for pokemon in team_1 + team_2}
+        expected = collections.defaultdict(lambda: [0, 0, 0])
+        for result in results:
+            for id_pokemon_1, id_pokemon_2, winner, _ in result.duels:
+                for id_pokemon, won in ((id_pokemon_1, 1), (id_pokemon_2, 2)):
+                    outcome = 0 if winner == won else 2 if winner == 0 else 1
+                    for key in (names[id_pokemon], weapons[id_pokemon], id_pokemon):
+                        expected[key][outcome] += 1
+        wins_1 = sum(result.winner == 1 for result in results)
+
+        if (all(tuple(by_name[key][1:4]) == tuple(expected[key]) for key in set(names.values()))
+                and all(tuple(by_weapon[key][1:4]) == tuple(expected[key]) for key in set(weapons.values()))
+                and record == tuple(expected[2]) and by_coach['coach_1'].wins == wins_1
+                and abs(by_coach['coach_1'].win_rate - wins_1 / len(results)) < 1e-12):
+            print("Test PASS. The aggregates match the results.")
+        else:
+            print("Test FAIL. Check the class ResultStore()." + " RESULT: " + str(by_name))
+
+
+        print("=================================================================.")
+        print("Test Case 2: A store that is opened again keeps its results.")
+        print("=================================================================.")
+        with ResultStore(name_file) as store:
+            store.add_result('coach_3', 'coach_1', results[0])
+            ids = store.flush()
+            battle_read = store.get_battle(ids[0])
+            count = store.get_battle_count()
+            coaches = {row.key for row in store.win_rate_by_coach()}
+            journal_mode = sqlite3.connect(name_file).execute('PRAGMA journal_mode').fetchone()[0]
+
+        if (ids == range(len(results) + 1, len(results) + 2) and count == len(results) + 1
+                and battle_read == ('coach_3', 'coach_1', results[0].winner, results[0].rounds, results[0].duels)
+                and coaches == {'coach_1', 'coach_2', 'coach_3'} and journal_mode == 'wal'):
+            print("Test PASS. The results have been kept in WAL mode.")
+        else:
+            print("Test FAIL. Check the method __init__()." + " RESULT: " + str(count))
+
+
+        print("=================================================================.")
+        print("Test Case 3: Several stores add results to the same file.")
+        print("=================================================================.")
+        store_1 = ResultStore(name_file, batch_size=10)
+        store_2 = ResultStore(name_file, batch_size=10)
+        for result in results[:50]:
+            store_1.add_result('coach_1', 'coach_2', result)
+            store_2.add_result('coach_2', 'coach_1', result)
+        store_1.close()
+        store_2.close()
+
+        # The ID 2 is reused by another Pokemon, which only changes the new results.
+        with ResultStore(name_file) as store:
+            count = store.get_battle_count()
+            store.add_pokemons([Pokemon(2, "Geodude", WeaponType.PUNCH, 60, 8, 15)])
+            store.add_result('coach_1', 'coach_2', results[0])
+            by_name = {row.key: row for row in store.win_rate_by_pokemon_name()}
+            won = store.get_pokemon_duels(2, winner=True)
+            duels_of_2 = store.get_pokemon_duels(2)
+
+        expected_won = sum(duel[2] == (1 if duel[0] == 2 else 2) for result in results + results[:50] * 2
+                           + [results[0]] * 2 for duel in result.duels if 2 in duel[:2])
+        if (count == len(results) + 101 and "Diglett" in by_name
+                and sum(by_name["Geodude"][1:4]) == sum(2 in duel[:2] for duel in results[0].duels)
+                and len(won) == expected_won and all(2 in duel[1:3] for duel in duels_of_2)):
+            print("Test PASS. The stores have shared the file and the duels are indexed by ID.")
+        else:
+            print("Test FAIL. Check the method flush()." + " RESULT: " + str(count))
+
+
+        print("=================================================================.")
+        print("Test Case 4: Ingest many battles per second.")
+        print("=================================================================.")
+        number_of_battles = 500000
+        with ResultStore(os.path.join(directory, 'ingest.sqlite3')) as store:
+            start = time.perf_counter()
+            for index in range(number_of_battles):
+                result = results[index % len(results)]
+                store.add_battle('coach_1', 'coach_2', result.winner, result.rounds, result.duels)
+            store.flush()
+            elapsed = time.perf_counter() - start
+
+        with ResultStore(os.path.join(directory, 'ingest.sqlite3')) as store:
+            count = store.get_battle_count()
+
+        if count == number_of_battles:
+            print("Test PASS. " + str(round(number_of_battles / elapsed)) + " battles/s with "
+                  + str(sum(len(result.duels) for result in results) // len(results)) + " duels each.")
+        else:
+            print("Test FAIL. Check the method flush()." + " RESULT: " + str(count))
+
+
+
+# Checking whether this module is executed just itself alone.
+if __name__ == "__main__":
+    main()
+
+
+# EOF
@@ -0,0 +1,310 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+
+"""
+This Python module contains the random number service of the Game.
+
+@contents :  This module contains the source of uniform random numbers that
+             the stochastic Pokemons draw from, the sources that can be
+             injected per battle (random.Random, blocks drawn from a NumPy
+             Generator and counter-based streams), and the test cases to
+             probe their functionality.
+@project :  N/A
+@program :  N/A
+@file :  rng.py
+@author :  Antonio Artes Garcia (antonio.artesgarcia@ceu.es)
+           Francisco Hernando Gallego (francisco.hernandogallego@ceu.es)
+           Ruben Juarez Cadiz (ruben.juarezcadiz@ceu.es)
+
+@version :  0.0.1, 08 November 2021
+@information :  The Zen of Python
+                  https://www.python.org/dev/peps/pep-0020/
+                Style Guide for Python Code
+                  https://www.python.org/dev/peps/pep-0008/
+                Example NumPy Style Python Docstrings
+                  http://sphinxcontrib-napoleon.readthedocs.io/en/latest/example_numpy.html
+                doctest – Testing through documentation
+                  https://pymotw.com/2/doctest/
+
+@copyright :  Copyright 2021 GNU AFFERO GENERAL PUBLIC.
+              All rights are reserved. Reproduction in whole or in part is
+              prohibited without the written consent of the copyright owner.
+"""
+
+
+# Source packages.
+
+import contextlib
+import contextvars
+import itertools
+import random
+import threading
+import time
+
+
+# Function without arguments that returns the next uniform number in [0, 1)
+# for the current context. By default it is the generator of the module
+# random. Each thread and each asyncio task has its own context, so a battle
+# can use its own source without affecting the others.
+_uniform = contextvars.ContextVar('uniform', default=random.random)
+
+
+# Function without arguments to obtain the source of uniform numbers of the
+# current context, used as get_uniform()() < 0.5. It is the method get of the
+# context variable itself, so a draw does not pay for a call to a Python
+# function on top of the lookup.
+get_uniform = _uniform.get
+
+
+def as_uniform(source):
+    """Function to obtain the function of uniform numbers of a source.
+
+    Syntax
+    ------
+       [ ] = as_uniform(source)
+
+    Parameters
+    ----------
+       [in] source None for the module random, a random.Random, a
+                   BlockRandom, a NumPy Generator (drawn in blocks by a
+                   BlockRandom) or a function that returns a float in [0, 1).
+
+    Returns
+    -------
+       function Function without arguments that returns a float in [0, 1).
+
+    Example
+    -------
+       >>> uniform = as_uniform(random.Random(7))
+    """
+    if source is None:
+        return random.random
+    if isinstance(source, (random.Random, BlockRandom)):
+        return source.random
+    if hasattr(source, 'bit_generator'):
+        return BlockRandom(source).random
+    if callable(source):
+        return source
+    raise TypeError('La fuente ' + repr(source) + ' no genera números aleatorios')
+
+
+def set_uniform(source):
+    """Function to set the source of the current context.
+
+    Returns a token for reset_uniform().
+    """
+    return _uniform.set(as_uniform(source))
+
+
+def reset_uniform(token):
+    """Function to restore the source that was set before set_uniform()."""
+    _uniform.reset(token)
+
+
+@contextlib.contextmanager
+def use_uniform(source):
+    """Function to use a source in the current context inside a with block.
+
+    Syntax
+    ------
+       [ ] = use_uniform(source)
+
+    Parameters
+    ----------
+       [in] source Source accepted by as_uniform().
+
+    Returns
+    -------
+       Context manager.
+
+    Example
+    -------
+       >>> with use_uniform(random.Random(7)):
+       ...     result = battle.simulate(coach_1, coach_2)
+    """
+    token = _uniform.set(as_uniform(source))
+    try:
+        yield
+    finally:
+        _uniform.reset(token)
+
+
+class BlockRandom():
+    """Python class to implement a source that draws uniforms in blocks.
+
+    This Python class draws block_size uniform numbers at once from a NumPy
+    Generator and returns them one by one. The method random is the method
+    __next__ of an iterator over the blocks, so the Generator is only called
+    once per block. It is used for the reproducible streams of NumPy, such as
+    counter_stream(), and not for speed: each number still costs a call, and
+    in CPython it is slower than random.random, which stays the default.
+
+    Syntax
+    ------
+      obj = BlockRandom(generator, block_size)
+
+    Parameters
+    ----------
+      [in] generator NumPy Generator that draws the numbers.
+      [in] block_size Number of uniforms drawn at once.
+
+    Returns
+    -------
+      obj Python object output parameter that represents an instance
+          of the class BlockRandom.
+
+    Attributes
+    ----------
+      random Function without arguments that returns the next uniform.
+
+    Example
+    -------
+      >>> source = BlockRandom(numpy.random.default_rng(7))
+      >>> source.random()
+    """
+
+    def __init__(self, generator, block_size=4096):
+        self.__generator = generator
+        self.__block_size = block_size
+        self.random = itertools.chain.from_iterable(self.__blocks()).__next__
+
+    def __blocks(self):
+        generator = self.__generator
+        block_size = self.__block_size
+        while True:
+            yield generator.random(block_size).tolist()
+
+    def get_generator(self):
+        return self.__generator
+
+
+def counter_stream(seed, *keys, block_size=4096):
+    """Function to obtain a counter-based stream of uniforms.
+
+    The stream is a Philox generator whose key is derived from the seed and
+    the keys, so the streams of different keys are independent and any
+    stream can be rebuilt without drawing the others: a worker can use
+    counter_stream(seed, worker) or counter_stream(seed, matchup, game).
+
+    Syntax
+    ------
+       [ ] = counter_stream(seed, *keys, block_size)
+
+    Parameters
+    ----------
+       [in] seed Non-negative integer seed shared by every stream.
+       [in] keys Non-negative integers that identify the stream.
+       [in] block_size Number of uniforms drawn at once.
+
+    Returns
+    -------
+       BlockRandom Source of the stream.
+
+    Example
+    -------
+       >>> source = counter_stream(7, 3)
+    """
+    import numpy as np
+
+    seed_sequence = np.random.SeedSequence([seed, *keys])
+    return BlockRandom(np.random.Generator(np.random.Philox(seed_sequence)), block_size)
+
+
+
+def main():
+    """Function main of the module.
+
+    The function main of this module is used to test the sources of random
+    numbers that are described in this module.
+
+    Syntax
+    ------
+      [ ] = main()
+
+    Parameters
+    ----------
+      Null .
+
+    Returns
+    -------
+      Null .
+
+    Example
+    -------
+      >>> main()
+    """
+    import numpy as np
+
+    print("=================================================================.")
+    print("Test Case 1: Use a source in the current context.")
+    print("=================================================================.")
+    expected = random.Random(7).random()
+    with use_uniform(random.Random(7)):
+        value = get_uniform()()
+
+    if value == expected and get_uniform() is random.random:
+        print("Test PASS. The function use_uniform() has been implemented correctly.")
+    else:
+        print("Test FAIL. Check the function use_uniform().")
+
+    values = []
+    thread = threading.Thread(target=lambda: values.append(get_uniform()))
+    with use_uniform(random.Random(7)):
+        thread.start()
+        thread.join()
+
+    if values == [random.random]:
+        print("Test PASS. The source of a context does not leak to other threads.")
+    else:
+        print("Test FAIL. Check the context variable of the source.")
+
+
+    print("=================================================================.")
+    print("Test Case 2: Draw the uniforms in blocks.")
+    print("=================================================================.")
+    source = BlockRandom(np.random.default_rng(7), block_size=100)
+    values = [source.random() for _ in range(250)]
+
+    if values == np.random.default_rng(7).random(300)[:250].tolist():
+        print("Test PASS. The class BlockRandom has been implemented correctly.")
+    else:
+        print("Test FAIL. Check the class BlockRandom().")
+
+    draws = 1000000
+    uniform = source.random
+    start = time.perf_counter()
+    for _ in range(draws):
+        uniform()
+    elapsed_block = time.perf_counter() - start
+    uniform = random.random
+    start = time.perf_counter()
+    for _ in range(draws):
+        uniform()
+    elapsed_random = time.perf_counter() - start
+    print("BlockRandom: " + str(round(elapsed_block * 1e9 / draws, 1)) + " ns per uniform, "
+          + "random.random: " + str(round(elapsed_random * 1e9 / draws, 1)) + " ns per uniform.")
+
+
+    print("=================================================================.")
+    print("Test Case 3: The counter-based streams are reproducible.")
+    print("=================================================================.")
+    stream_a = counter_stream(7, 1)
+    stream_b = counter_stream(7, 2)
+    values_a = [stream_a.random() for _ in range(10)]
+    values_b = [stream_b.random() for _ in range(10)]
+    stream_a = counter_stream(7, 1)
+
+    if values_a == [stream_a.random() for _ in range(10)] and values_a != values_b:
+        print("Test PASS. The function counter_stream() has been implemented correctly.")
+    else:
+        print("Test FAIL. Check the function counter_stream().")
+
+
+
+# Checking whether this module is executed just itself alone.
+if __name__ == "__main__":
+    main()
+
+
+# EOF
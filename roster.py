@@ -0,0 +1,497 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+
+"""
+This Python module contains the compact roster of Pokemons of the Game.
+
+@contents :  This module contains the Roster, a struct-of-arrays container of
+             Pokemons backed by the module array, the records that give access
+             to each Pokemon with the usual getters, and the test cases to
+             probe its functionality.
+@project :  N/A
+@program :  N/A
+@file :  roster.py
+@author :  Antonio Artes Garcia (antonio.artesgarcia@ceu.es)
+           Francisco Hernando Gallego (francisco.hernandogallego@ceu.es)
+           Ruben Juarez Cadiz (ruben.juarezcadiz@ceu.es)
+
+@version :  0.0.1, 08 November 2021
+@information :  The Zen of Python
+                  https://www.python.org/dev/peps/pep-0020/
+                Style Guide for Python Code
+                  https://www.python.org/dev/peps/pep-0008/
+                Example NumPy Style Python Docstrings
+                  http://sphinxcontrib-napoleon.readthedocs.io/en/latest/example_numpy.html
+                doctest – Testing through documentation
+                  https://pymotw.com/2/doctest/
+
+@copyright :  Copyright 2021 GNU AFFERO GENERAL PUBLIC.
+              All rights are reserved. Reproduction in whole or in part is
+              prohibited without the written consent of the copyright owner.
+"""
+
+
+# Source packages.
+
+import array
+import itertools
+import tracemalloc
+import battle
+from damage import attack_key, defense_key
+from pokemon import Pokemon
+from pokemon_air import PokemonAir
+from pokemon_earth import PokemonEarth
+from pokemon_electricity import PokemonElectricity
+from pokemon_water import PokemonWater
+from weapon_type import WeaponType
+
+
+# Classes of Pokemon that a Roster can hold, indexed by the code stored in it.
+POKEMON_CLASSES = (Pokemon, PokemonAir, PokemonEarth, PokemonElectricity, PokemonWater)
+
+_CLASS_CODES = {pokemon_class: code for code, pokemon_class in enumerate(POKEMON_CLASSES)}
+_WEAPON_TYPES = {weapon_type.value: weapon_type for weapon_type in WeaponType}
+
+# State of each Pokemon of a Roster.
+_DEFEATED = 0
+_ALIVE = 1
+_REMOVED = 2
+
+
+class PokemonRecord(Pokemon):
+    """Python class to implement the access to a Pokemon stored in a Roster.
+
+    This Python class implements a light view over one row of a Roster. It
+    keeps the same getters as the class Pokemon, and set_health_points()
+    writes in the Roster. A record of each class of POKEMON_CLASSES is also
+    an instance of that class, so fight_attack() and fight_defense() follow
+    the rules of its type.
+
+    Syntax
+    ------
+      obj = roster[index]
+
+    Parameters
+    ----------
+      [in] roster Roster where the Pokemon is stored.
+      [in] index Position of the Pokemon in the Roster.
+
+    Returns
+    -------
+      obj Python object output parameter that represents an instance
+          of the class PokemonRecord.
+
+    Attributes
+    ----------
+
+    Example
+    -------
+      >>> roster = Roster()
+      >>> roster.append(1, "Bulbasaur", WeaponType.PUNCH, 100, 7, 10)
+      >>> roster[0].get_pokemon_name()
+    """
+    __slots__ = ('__roster', '__index')
+
+    def __init__(self, roster, index):
+        # The record does not register its ID: the Roster owns the Pokemon.
+        self.__roster = roster
+        self.__index = index
+
+    def __del__(self):
+        pass
+
+    def get_index(self):
+        return self.__index
+
+    def get_id(self):
+        return self.__roster.get_id(self.__index)
+
+    def get_pokemon_name(self):
+        return self.__roster.get_pokemon_name(self.__index)
+
+    def get_weapon_type(self):
+        return self.__roster.get_weapon_type(self.__index)
+
+    def get_health_points(self):
+        return self.__roster.get_health_points(self.__index)
+
+    def get_attack_rating(self):
+        return self.__roster.get_attack_rating(self.__index)
+
+    def get_defense_rating(self):
+        return self.__roster.get_defense_rating(self.__index)
+
+    def get_attack_key(self):
+        return attack_key(type(self), self.get_weapon_type(), self.get_attack_rating())
+
+    def get_defense_key(self):
+        return defense_key(type(self), self.get_defense_rating())
+
+    def set_health_points(self, health_points):
+        if not isinstance(health_points, int):
+            raise TypeError('Los puntos de salud deben ser un numero entero')
+        self.__roster.set_health_points(self.__index, health_points)
+
+
+# Record class of each class of POKEMON_CLASSES, indexed by the same code.
+_RECORD_CLASSES = tuple(
+    PokemonRecord if pokemon_class is Pokemon else
+    type(pokemon_class.__name__ + 'Record', (PokemonRecord, pokemon_class), {'__slots__': ()})
+    for pokemon_class in POKEMON_CLASSES)
+
+
+class Roster():
+    """Python class to implement a compact list of Pokemons.
+
+    This Python class stores the Pokemons as columns of the module array
+    instead of one object per Pokemon: the ID, the health, the attack and the
+    defense are machine integers, the weapon and the class are bytes, and the
+    names are interned in a table. Indexing a Roster returns a PokemonRecord.
+
+    The Roster also keeps the state of each Pokemon (undefeated, defeated or
+    removed) in one byte and the number of undefeated ones, updated whenever
+    the health is written, so a KO, a removal and the count of undefeated
+    Pokemons cost O(1). The index from IDs to positions is built the first
+    time a Pokemon is looked up by ID, so a Roster that is never searched
+    does not pay for it.
+
+    Syntax
+    ------
+      obj = Roster()
+
+    Parameters
+    ----------
+      Null .
+
+    Returns
+    -------
+      obj Python object output parameter that represents an instance
+          of the class Roster.
+
+    Attributes
+    ----------
+
+    Example
+    -------
+      >>> roster = Roster()
+      >>> roster.append(1, "Bulbasaur", WeaponType.PUNCH, 100, 7, 10)
+    """
+    __slots__ = ('__ids', '__name_codes', '__names', '__name_table',
+                 '__weapon_types', '__class_codes', '__health_points',
+                 '__attack_ratings', '__defense_ratings', '__states',
+                 '__alive_count', '__id_index')
+
+    def __init__(self):
+        self.__ids = array.array('q')
+        self.__name_codes = array.array('I')
+        self.__names = []
+        self.__name_table = {}
+        self.__weapon_types = array.array('B')
+        self.__class_codes = array.array('B')
+        self.__health_points = array.array('i')
+        self.__attack_ratings = array.array('i')
+        self.__defense_ratings = array.array('i')
+        self.__states = bytearray()
+        self.__alive_count = 0
+        self.__id_index = None
+
+    def __len__(self):
+        return len(self.__ids)
+
+    def __getitem__(self, index):
+        if index < 0:
+            index += len(self.__ids)
+        if index < 0 or index >= len(self.__ids):
+            raise IndexError('El índice está fuera del roster')
+        return _RECORD_CLASSES[self.__class_codes[index]](self, index)
+
+    def __iter__(self):
+        for index in range(len(self.__ids)):
+            yield _RECORD_CLASSES[self.__class_codes[index]](self, index)
+
+    def append(self, id_pokemon, pokemon_name, weapon_type, health_points,
+               attack_rating, defense_rating, pokemon_class=Pokemon):
+        code = self.__name_table.get(pokemon_name)
+        if code is None:
+            code = len(self.__names)
+            self.__name_table[pokemon_name] = code
+            self.__names.append(pokemon_name)
+        self.__ids.append(id_pokemon)
+        self.__name_codes.append(code)
+        self.__weapon_types.append(weapon_type.value)
+        self.__class_codes.append(_CLASS_CODES[pokemon_class])
+        self.__health_points.append(health_points)
+        self.__attack_ratings.append(attack_rating)
+        self.__defense_ratings.append(defense_rating)
+        if health_points > 0:
+            self.__states.append(_ALIVE)
+            self.__alive_count += 1
+        else:
+            self.__states.append(_DEFEATED)
+        if self.__id_index is not None:
+            self.__id_index.setdefault(id_pokemon, len(self.__ids) - 1)
+
+    def append_pokemon(self, pokemon):
+        self.append(pokemon.get_id(), pokemon.get_pokemon_name(),
+                    pokemon.get_weapon_type(), pokemon.get_health_points(),
+                    pokemon.get_attack_rating(), pokemon.get_defense_rating(),
+                    type(pokemon))
+
+    def get_id(self, index):
+        return self.__ids[index]
+
+    def get_pokemon_name(self, index):
+        return self.__names[self.__name_codes[index]]
+
+    def get_weapon_type(self, index):
+        return _WEAPON_TYPES[self.__weapon_types[index]]
+
+    def get_pokemon_class(self, index):
+        return POKEMON_CLASSES[self.__class_codes[index]]
+
+    def get_health_points(self, index):
+        return self.__health_points[index]
+
+    def get_attack_rating(self, index):
+        return self.__attack_ratings[index]
+
+    def get_defense_rating(self, index):
+        return self.__defense_ratings[index]
+
+    def set_health_points(self, index, health_points):
+        self.__health_points[index] = health_points
+        state = self.__states[index]
+        if state == _ALIVE:
+            if health_points <= 0:
+                self.__states[index] = _DEFEATED
+                self.__alive_count -= 1
+        elif state == _DEFEATED and health_points > 0:
+            self.__states[index] = _ALIVE
+            self.__alive_count += 1
+
+    def is_alive(self, index):
+        return self.__states[index] == _ALIVE
+
+    def get_alive_count(self):
+        return self.__alive_count
+
+    def iter_alive(self):
+        """Method to iterate over the records of the undefeated Pokemons in order."""
+        states = self.__states
+        index = states.find(_ALIVE)
+        while index >= 0:
+            yield _RECORD_CLASSES[self.__class_codes[index]](self, index)
+            index = states.find(_ALIVE, index + 1)
+
+    def __get_id_index(self):
+        if self.__id_index is None:
+            # With repeated IDs, the first Pokemon that is not removed wins.
+            id_index = {}
+            states = self.__states
+            for index, id_pokemon in enumerate(self.__ids):
+                if states[index] != _REMOVED:
+                    id_index.setdefault(id_pokemon, index)
+            self.__id_index = id_index
+        return self.__id_index
+
+    def find(self, id_pokemon):
+        """Method to obtain the position of the Pokemon of an ID, or -1 if none."""
+        return self.__get_id_index().get(id_pokemon, -1)
+
+    def get_by_id(self, id_pokemon):
+        """Method to obtain the record of the Pokemon of an ID, or None if none."""
+        index = self.__get_id_index().get(id_pokemon, -1)
+        if index < 0:
+            return None
+        return _RECORD_CLASSES[self.__class_codes[index]](self, index)
+
+    def remove(self, id_pokemon):
+        """Method to remove the Pokemon of an ID from the Roster.
+
+        The row is kept, so the positions of the other Pokemons do not change,
+        but it is no longer undefeated nor found by its ID.
+        """
+        index = self.__get_id_index().pop(id_pokemon, -1)
+        if index < 0:
+            raise KeyError('El Pokemon ' + str(id_pokemon) + ' no está en el roster')
+        if self.__states[index] == _ALIVE:
+            self.__alive_count -= 1
+        self.__states[index] = _REMOVED
+
+    def get_column(self, name):
+        """Method to obtain a column of the Roster without copying it.
+
+        The columns are 'id', 'name_code', 'weapon_type', 'class',
+        'health_points', 'attack_rating' and 'defense_rating'. They support
+        the buffer protocol, so numpy.frombuffer() can read them without a
+        copy. The name codes index the list returned by get_names().
+        """
+        columns = {'id': self.__ids,
+                   'name_code': self.__name_codes,
+                   'weapon_type': self.__weapon_types,
+                   'class': self.__class_codes,
+                   'health_points': self.__health_points,
+                   'attack_rating': self.__attack_ratings,
+                   'defense_rating': self.__defense_ratings}
+        if name not in columns:
+            raise KeyError('La columna ' + str(name) + ' no existe')
+        return columns[name]
+
+    def get_names(self):
+        return self.__names
+
+    def extend_columns(self, names, columns):
+        """Method to append many Pokemons at once from whole columns.
+
+        The argument columns maps each name of get_column() to a buffer with
+        one value per Pokemon, and names is the table of names indexed by
+        the column 'name_code'.
+        """
+        if self.__names:
+            codes = [self.__name_table.setdefault(name, len(self.__name_table)) for name in names]
+            self.__names = list(self.__name_table)
+            self.__name_codes.extend(codes[code] for code in memoryview(columns['name_code']))
+        else:
+            self.__names = list(names)
+            self.__name_table = {name: code for code, name in enumerate(self.__names)}
+            self.__name_codes.frombytes(memoryview(columns['name_code']).cast('B'))
+        start = len(self.__ids)
+        for name, column in (('id', self.__ids),
+                             ('weapon_type', self.__weapon_types),
+                             ('class', self.__class_codes),
+                             ('health_points', self.__health_points),
+                             ('attack_rating', self.__attack_ratings),
+                             ('defense_rating', self.__defense_ratings)):
+            column.frombytes(memoryview(columns[name]).cast('B'))
+        states = bytes(_ALIVE if health_points > 0 else _DEFEATED
+                       for health_points in self.__health_points[start:])
+        self.__states.extend(states)
+        self.__alive_count += states.count(_ALIVE)
+        if self.__id_index is not None:
+            for index in range(start, len(self.__ids)):
+                self.__id_index.setdefault(self.__ids[index], index)
+
+    def to_pokemon(self, index, registry=None):
+        """Method to build a complete object of its class from a row."""
+        return self.get_pokemon_class(index)(
+            self.get_id(index), self.get_pokemon_name(index),
+            self.get_weapon_type(index), self.get_health_points(index),
+            self.get_attack_rating(index), self.get_defense_rating(index),
+            registry)
+
+
+
+def main():
+    """Function main of the module.
+
+    The function main of this module is used to test the Class that is described
+    in this module.
+
+    Syntax
+    ------
+      [ ] = main()
+
+    Parameters
+    ----------
+      Null .
+
+    Returns
+    -------
+      Null .
+
+    Example
+    -------
+      >>> main()
+    """
+
+    print("=================================================================.")
+    print("Test Case 1: Store Pokemons in a Roster.")
+    print("=================================================================.")
+    roster = Roster()
+    roster.append(1, "Ivysaur", WeaponType.HEADBUTT, 20, 10, 5)
+    roster.append(2, "Pidgey", WeaponType.KICK, 12, 8, 6, PokemonAir)
+
+    if (roster[0].get_pokemon_name() == "Ivysaur" and roster[1].get_weapon_type() == WeaponType.KICK
+            and roster[1].get_attack_rating() == 8 and roster[1].get_defense_rating() == 6):
+        print("Test PASS. The getters of the records have been implemented correctly.")
+    else:
+        print("Test FAIL. Check the class PokemonRecord.")
+
+    if isinstance(roster[1], PokemonAir) and str(roster[1]) == "Pokemon ID 2 with name Pidgey has as weapon KICK and health 12":
+        print("Test PASS. The records keep the class of the Pokemons.")
+    else:
+        print("Test FAIL. Check the class PokemonRecord." + " RESULT: " + str(roster[1]))
+
+
+    print("=================================================================.")
+    print("Test Case 2: The records fight with the rules of the Pokemons.")
+    print("=================================================================.")
+    roster[0].fight_defense(70)
+    result = battle.simulate([roster[0]], [roster[1]], restore=False)
+
+    if roster.get_health_points(0) == -45 and result.winner == 2:
+        print("Test PASS. The records write the health in the Roster.")
+    else:
+        print("Test FAIL. Check the method set_health_points()." + " RESULT: " + str(roster.get_health_points(0)))
+
+
+    print("=================================================================.")
+    print("Test Case 3: A Roster needs far less memory than the objects.")
+    print("=================================================================.")
+    tracemalloc.start()
+    list_of_pokemons = [Pokemon(id_pokemon, "Pikachu", WeaponType.PUNCH, 100, 8, 7)
+                        for id_pokemon in range(1000, 21000)]
+    memory_of_objects = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del list_of_pokemons
+
+    tracemalloc.start()
+    roster = Roster()
+    for id_pokemon in range(1000, 21000):
+        roster.append(id_pokemon, "Pikachu", WeaponType.PUNCH, 100, 8, 7)
+    memory_of_roster = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+
+    if memory_of_objects >= 4 * memory_of_roster:
+        print("Test PASS. The Roster needs " + str(round(memory_of_objects / memory_of_roster, 1))
+              + " times less memory.")
+    else:
+        print("Test FAIL. The Roster needs " + str(round(memory_of_objects / memory_of_roster, 1))
+              + " times less memory.")
+
+
+    print("=================================================================.")
+    print("Test Case 4: Find Pokemons by ID and track the undefeated ones.")
+    print("=================================================================.")
+    roster = Roster()
+    for id_pokemon in range(100000):
+        roster.append(id_pokemon, "Pikachu", WeaponType.PUNCH, 100, 8, 7)
+    roster.get_by_id(99999).fight_defense(200)
+    roster.set_health_points(roster.find(5), 0)
+    roster.remove(7)
+
+    if (roster.get_alive_count() == 99997 and roster.get_by_id(7) is None
+            and not roster.is_alive(99999) and roster.get_by_id(8).get_index() == 8
+            and [record.get_id() for record in itertools.islice(roster.iter_alive(), 6)] == [0, 1, 2, 3, 4, 6]):
+        print("Test PASS. The index of IDs and the undefeated Pokemons have been implemented correctly.")
+    else:
+        print("Test FAIL. Check the methods find() and remove()." + " RESULT: " + str(roster.get_alive_count()))
+
+    roster.set_health_points(5, 10)
+    try:
+        roster.remove(7)
+        print("Test FAIL. Check the method remove().")
+    except KeyError:
+        if roster.get_alive_count() == 99998 and roster.is_alive(5):
+            print("Test PASS. A Pokemon can be healed but not removed twice.")
+        else:
+            print("Test FAIL. Check the method set_health_points().")
+
+
+# Checking whether this module is executed just itself alone.
+if __name__ == "__main__":
+    main()
+
+
+# EOF
@@ -0,0 +1,353 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+
+"""
+This Python module contains the binary columnar format of the rosters.
+
+@contents :  This module contains the converter of the CSV files of the
+             coaches to a binary file with one column per stat, the reader of
+             those files through mmap, and the test cases to probe its
+             functionality.
+@project :  N/A
+@program :  N/A
+@file :  roster_binary.py
+@author :  Antonio Artes Garcia (antonio.artesgarcia@ceu.es)
+           Francisco Hernando Gallego (francisco.hernandogallego@ceu.es)
+           Ruben Juarez Cadiz (ruben.juarezcadiz@ceu.es)
+
+@version :  0.0.1, 08 November 2021
+@information :  The Zen of Python
+                  https://www.python.org/dev/peps/pep-0020/
+                Style Guide for Python Code
+                  https://www.python.org/dev/peps/pep-0008/
+                Example NumPy Style Python Docstrings
+                  http://sphinxcontrib-napoleon.readthedocs.io/en/latest/example_numpy.html
+                doctest – Testing through documentation
+                  https://pymotw.com/2/doctest/
+
+@copyright :  Copyright 2021 GNU AFFERO GENERAL PUBLIC.
+              All rights are reserved. Reproduction in whole or in part is
+              prohibited without the written consent of the copyright owner.
+"""
+
+
+# Source packages.
+
+import array
+import mmap
+import os
+import struct
+import tempfile
+import time
+from roster import POKEMON_CLASSES, Roster
+from roster_loader import read_pokemon_rows, validate_file
+from weapon_type import WeaponType
+
+
+# Layout of a binary roster. The header holds the magic, the version, the
+# number of Pokemons and the number of names. Then each column of COLUMNS is
+# stored contiguously, aligned to 8 bytes, with one fixed-width value per
+# Pokemon, and at the end the table of names: one length per name followed by
+# the names encoded in UTF-8.
+MAGIC = b'PKRS'
+VERSION = 1
+HEADER = struct.Struct('<4sHHQI4x')
+COLUMNS = (('id', 'q'),
+           ('health_points', 'i'),
+           ('attack_rating', 'i'),
+           ('defense_rating', 'i'),
+           ('name_code', 'I'),
+           ('weapon_type', 'B'),
+           ('class', 'B'))
+
+_CLASS_CODES = {pokemon_class: code for code, pokemon_class in enumerate(POKEMON_CLASSES)}
+_WEAPON_TYPES = {weapon_type.value: weapon_type for weapon_type in WeaponType}
+
+
+def _column_offsets(count):
+    """Function to compute the offset of each column for a number of Pokemons."""
+    offsets = {}
+    offset = HEADER.size
+    for name, typecode in COLUMNS:
+        offsets[name] = offset
+        offset += count * array.array(typecode).itemsize
+        offset += -offset % 8
+    return offsets, offset
+
+
+def write_roster(name_file, roster):
+    """Function to write a Roster to a binary file.
+
+    Syntax
+    ------
+       [ ] = write_roster(name_file, roster)
+
+    Parameters
+    ----------
+       [in] name_file Name of the binary file.
+       [in] roster Roster to write.
+
+    Returns
+    -------
+       int Number of Pokemons written.
+
+    Example
+    -------
+       >>> write_roster("coach_1.pkr", roster)
+    """
+    count = len(roster)
+    offsets, end = _column_offsets(count)
+    names = roster.get_names()
+    with open(name_file, 'wb') as binary_file:
+        binary_file.write(HEADER.pack(MAGIC, VERSION, 0, count, len(names)))
+        for name, typecode in COLUMNS:
+            binary_file.seek(offsets[name])
+            binary_file.write(roster.get_column(name).tobytes())
+        binary_file.seek(end)
+        _write_names(binary_file, names)
+    return count
+
+
+def _write_names(binary_file, names):
+    """Function to write the table of names at the current position."""
+    encoded = [name.encode('utf-8') for name in names]
+    binary_file.write(array.array('I', [len(name) for name in encoded]).tobytes())
+    binary_file.write(b''.join(encoded))
+
+
+def convert_csv(csv_name, binary_name, chunk_size=100000):
+    """Function to convert the CSV file of a coach to a binary file.
+
+    The CSV file is read twice: first to validate it and count the rows, and
+    then in chunks whose values are written at their place in each column,
+    so the memory needed does not depend on the size of the file.
+
+    Syntax
+    ------
+       [ ] = convert_csv(csv_name, binary_name, chunk_size)
+
+    Parameters
+    ----------
+       [in] csv_name Name of the CSV file.
+       [in] binary_name Name of the binary file.
+       [in] chunk_size Number of rows converted at once.
+
+    Returns
+    -------
+       int Number of Pokemons written.
+
+    Example
+    -------
+       >>> convert_csv("coach_1_pokemons.csv", "coach_1_pokemons.pkr")
+    """
+    count = validate_file(csv_name, chunk_size)
+    offsets, end = _column_offsets(count)
+    name_table = {}
+    position = 0
+    with open(binary_name, 'wb') as binary_file:
+        binary_file.write(HEADER.pack(MAGIC, VERSION, 0, count, 0))
+        for chunk in read_pokemon_rows(csv_name, chunk_size):
+            values = {
+                'id': [row.id_pokemon for row in chunk],
+                'health_points': [row.health_points for row in chunk],
+                'attack_rating': [row.attack_rating for row in chunk],
+                'defense_rating': [row.defense_rating for row in chunk],
+                'name_code': [name_table.setdefault(row.pokemon_name, len(name_table)) for row in chunk],
+                'weapon_type': [row.weapon_type.value for row in chunk],
+                'class': [_CLASS_CODES[row.pokemon_class] for row in chunk],
+            }
+            for name, typecode in COLUMNS:
+                column = array.array(typecode, values[name])
+                binary_file.seek(offsets[name] + position * column.itemsize)
+                binary_file.write(column.tobytes())
+            position += len(chunk)
+        binary_file.seek(end)
+        _write_names(binary_file, list(name_table))
+        binary_file.seek(0)
+        binary_file.write(HEADER.pack(MAGIC, VERSION, 0, count, len(name_table)))
+    return count
+
+
+class BinaryRoster():
+    """Python class to implement the reading of a binary roster.
+
+    This Python class maps a binary roster in memory with mmap. The columns
+    are returned as memoryviews over the mapped file, so reading them does
+    not copy nor parse anything, and numpy.frombuffer() can wrap them as
+    arrays without a copy either. Those arrays must be released before the
+    binary roster is closed.
+
+    Syntax
+    ------
+      obj = BinaryRoster(name_file)
+
+    Parameters
+    ----------
+      [in] name_file Name of the binary file.
+
+    Returns
+    -------
+      obj Python object output parameter that represents an instance
+          of the class BinaryRoster.
+
+    Attributes
+    ----------
+
+    Example
+    -------
+      >>> with BinaryRoster("coach_1_pokemons.pkr") as roster:
+      ...     health_points = roster.get_column('health_points')
+    """
+
+    def __init__(self, name_file):
+        with open(name_file, 'rb') as binary_file:
+            self.__map = mmap.mmap(binary_file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, _, count, name_count = HEADER.unpack_from(self.__map, 0)
+        if magic != MAGIC or version != VERSION:
+            self.__map.close()
+            raise ValueError('El fichero ' + str(name_file) + ' no es un roster binario')
+        self.__count = count
+        self.__view = memoryview(self.__map)
+        offsets, end = _column_offsets(count)
+        self.__columns = {}
+        for name, typecode in COLUMNS:
+            size = count * array.array(typecode).itemsize
+            self.__columns[name] = self.__view[offsets[name]:offsets[name] + size].cast(typecode)
+
+        lengths = self.__view[end:end + 4 * name_count].cast('I')
+        names = []
+        position = end + 4 * name_count
+        for length in lengths:
+            names.append(bytes(self.__view[position:position + length]).decode('utf-8'))
+            position += length
+        lengths.release()
+        self.__names = names
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def __len__(self):
+        return self.__count
+
+    def close(self):
+        for column in self.__columns.values():
+            column.release()
+        self.__columns = {}
+        self.__view.release()
+        self.__map.close()
+
+    def get_column(self, name):
+        return self.__columns[name]
+
+    def get_names(self):
+        return self.__names
+
+    def get_pokemon_name(self, index):
+        return self.__names[self.__columns['name_code'][index]]
+
+    def get_weapon_type(self, index):
+        return _WEAPON_TYPES[self.__columns['weapon_type'][index]]
+
+    def get_pokemon_class(self, index):
+        return POKEMON_CLASSES[self.__columns['class'][index]]
+
+    def to_roster(self):
+        """Method to copy the binary roster to a Roster that can be modified."""
+        roster = Roster()
+        roster.extend_columns(self.__names, self.__columns)
+        return roster
+
+
+
+def main():
+    """Function main of the module.
+
+    The function main of this module is used to test the binary format that
+    is described in this module.
+
+    Syntax
+    ------
+      [ ] = main()
+
+    Parameters
+    ----------
+      Null .
+
+    Returns
+    -------
+      Null .
+
+    Example
+    -------
+      >>> main()
+    """
+
+    directory = tempfile.mkdtemp()
+
+    print("=================================================================.")
+    print("Test Case 1: Convert a CSV file to a binary roster.")
+    print("=================================================================.")
+    name_file = os.path.join(directory, "coach_1_pokemons.pkr")
+    count = convert_csv("coach_1_pokemons.csv", name_file, chunk_size=2)
+
+    with BinaryRoster(name_file) as binary_roster:
+        if (count == len(binary_roster) == 3 and list(binary_roster.get_column('id')) == [11, 12, 13]
+                and binary_roster.get_pokemon_name(1) == "Pidgey"
+                and binary_roster.get_weapon_type(0) == WeaponType.HEADBUTT
+                and binary_roster.get_pokemon_class(1).__name__ == "PokemonAir"):
+            print("Test PASS. The function convert_csv() has been implemented correctly.")
+        else:
+            print("Test FAIL. Check the function convert_csv().")
+
+        roster = binary_roster.to_roster()
+
+    if str(roster[2]) == "Pokemon ID 13 with name Squirtle has as weapon ELBOW and health 74":
+        print("Test PASS. The method to_roster() has been implemented correctly.")
+    else:
+        print("Test FAIL. Check the method to_roster()." + " RESULT: " + str(roster[2]))
+
+
+    print("=================================================================.")
+    print("Test Case 2: Open a binary roster of a million Pokemons.")
+    print("=================================================================.")
+    roster = Roster()
+    columns = {
+        'id': array.array('q', range(1000000)),
+        'name_code': array.array('I', bytes(4000000)),
+        'weapon_type': array.array('B', [WeaponType.KICK.value]) * 1000000,
+        'class': array.array('B', bytes(1000000)),
+        'health_points': array.array('i', [100]) * 1000000,
+        'attack_rating': array.array('i', [8]) * 1000000,
+        'defense_rating': array.array('i', [7]) * 1000000,
+    }
+    roster.extend_columns(["Pikachu"], columns)
+    name_file = os.path.join(directory, "large.pkr")
+    write_roster(name_file, roster)
+
+    start = time.perf_counter()
+    binary_roster = BinaryRoster(name_file)
+    total = binary_roster.get_column('health_points')[999999]
+    elapsed = time.perf_counter() - start
+    binary_roster.close()
+
+    if total == 100 and elapsed < 0.1:
+        print("Test PASS. The binary roster was opened in " + str(round(elapsed * 1000, 2)) + " ms.")
+    else:
+        print("Test FAIL. The binary roster was opened in " + str(round(elapsed * 1000, 2)) + " ms.")
+
+    for name in os.listdir(directory):
+        os.remove(os.path.join(directory, name))
+    os.rmdir(directory)
+
+
+
+# Checking whether this module is executed just itself alone.
+if __name__ == "__main__":
+    main()
+
+
+# EOF
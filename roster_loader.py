@@ -0,0 +1,329 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+
+"""
+This Python module contains the streaming loader of the rosters of the Game.
+
+@contents :  This module contains the lazy reading of the CSV files of the
+             coaches in chunks of validated rows, the table of the types of
+             Pokemon, and the test cases to probe its functionality.
+@project :  N/A
+@program :  N/A
+@file :  roster_loader.py
+@author :  Antonio Artes Garcia (antonio.artesgarcia@ceu.es)
+           Francisco Hernando Gallego (francisco.hernandogallego@ceu.es)
+           Ruben Juarez Cadiz (ruben.juarezcadiz@ceu.es)
+
+@version :  0.0.1, 08 November 2021
+@information :  The Zen of Python
+                  https://www.python.org/dev/peps/pep-0020/
+                Style Guide for Python Code
+                  https://www.python.org/dev/peps/pep-0008/
+                Example NumPy Style Python Docstrings
+                  http://sphinxcontrib-napoleon.readthedocs.io/en/latest/example_numpy.html
+                doctest – Testing through documentation
+                  https://pymotw.com/2/doctest/
+
+@copyright :  Copyright 2021 GNU AFFERO GENERAL PUBLIC.
+              All rights are reserved. Reproduction in whole or in part is
+              prohibited without the written consent of the copyright owner.
+"""
+
+
+# Source packages.
+
+import collections
+import csv
+import os
+import tempfile
+from pokemon import Pokemon
+from pokemon_air import PokemonAir
+from pokemon_earth import PokemonEarth
+from pokemon_electricity import PokemonElectricity
+from pokemon_water import PokemonWater
+from weapon_type import WeaponType
+
+
+# Class of Pokemon of each value of the optional type column of the CSV files.
+POKEMON_TYPES = {
+    'normal': Pokemon,
+    'air': PokemonAir,
+    'earth': PokemonEarth,
+    'electricity': PokemonElectricity,
+    'water': PokemonWater,
+}
+
+
+# Validated row of a CSV file of a coach. The field pokemon_class is the class
+# of Pokemon that has to be built from the row.
+PokemonRow = collections.namedtuple(
+    'PokemonRow',
+    ['id_pokemon', 'pokemon_name', 'weapon_type', 'health_points',
+     'attack_rating', 'defense_rating', 'pokemon_class'])
+
+
+def parse_row(row):
+    """Function to validate a row of the CSV file of a coach.
+
+    A row has the fields ID, name, weapon, health, attack and defense, and
+    optionally a seventh field with the type of the Pokemon (a key of
+    POKEMON_TYPES). Without it the row is a Pokemon of the base class. The
+    ranges of attack of PokemonWater and of defense of PokemonEarth are
+    checked here, so no object has to be built to find a wrong row.
+
+    Syntax
+    ------
+       [ ] = parse_row(row)
+
+    Parameters
+    ----------
+       [in] row List of the fields of the row.
+
+    Returns
+    -------
+       PokemonRow Validated row.
+
+    Example
+    -------
+       >>> parse_row(['11', 'Pikachu', 'headbutt', '69', '8', '8', 'electricity'])
+    """
+    if len(row) != 6 and len(row) != 7:
+        raise ValueError('La fila debe tener 6 o 7 campos y tiene ' + str(len(row)))
+    try:
+        weapon_type = WeaponType[row[2].strip().upper()]
+    except KeyError:
+        raise ValueError('El arma ' + row[2] + ' no existe') from None
+    if len(row) == 7:
+        pokemon_class = POKEMON_TYPES.get(row[6].strip().lower())
+        if pokemon_class is None:
+            raise ValueError('El tipo ' + row[6] + ' no existe')
+    else:
+        pokemon_class = Pokemon
+
+    parsed_row = PokemonRow(int(row[0]), row[1], weapon_type, int(row[3]),
+                            int(row[4]), int(row[5]), pokemon_class)
+
+    if issubclass(pokemon_class, PokemonWater) and not (
+            PokemonWater.min_attack_rating <= parsed_row.attack_rating <= PokemonWater.max_attack_rating):
+        raise ValueError('El índice de ataque debe estar entre ' + str(PokemonWater.min_attack_rating)
+                         + ' y ' + str(PokemonWater.max_attack_rating))
+    if issubclass(pokemon_class, PokemonEarth) and not (
+            PokemonEarth.min_defense_index <= parsed_row.defense_rating <= PokemonEarth.max_defense_index):
+        raise ValueError('El índice de defensa debe estar entre ' + str(PokemonEarth.min_defense_index)
+                         + ' y ' + str(PokemonEarth.max_defense_index))
+    return parsed_row
+
+
+def read_pokemon_rows(name_file, chunk_size=10000, errors=None):
+    """Function to read the CSV file of a coach in chunks of validated rows.
+
+    The file is read lazily, so only one chunk is kept in memory at a time.
+    A malformed row raises a ValueError, unless a list is given in errors:
+    then the tuple (line_number, row, message) is appended to it and the
+    row is skipped. Empty lines are skipped.
+
+    Syntax
+    ------
+       [ ] = read_pokemon_rows(name_file, chunk_size, errors)
+
+    Parameters
+    ----------
+       [in] name_file str Name of the CSV file.
+       [in] chunk_size Maximum number of rows of each chunk.
+       [out] errors List where the malformed rows are reported.
+
+    Returns
+    -------
+       Generator of lists of PokemonRow.
+
+    Example
+    -------
+       >>> for chunk in read_pokemon_rows("file.csv", 1000, errors):
+       ...     print(len(chunk))
+    """
+    chunk = []
+    with open(name_file, newline='') as csvfile:
+        reader = csv.reader(csvfile)
+        for row in reader:
+            if not row:
+                continue
+            try:
+                chunk.append(parse_row(row))
+            except ValueError as error:
+                if errors is None:
+                    raise ValueError('Fila ' + str(reader.line_num) + ': ' + str(error)) from None
+                errors.append((reader.line_num, row, str(error)))
+                continue
+            if len(chunk) >= chunk_size:
+                yield chunk
+                chunk = []
+    if chunk:
+        yield chunk
+
+
+def validate_file(name_file, chunk_size=10000, errors=None):
+    """Function to validate every row of the CSV file of a coach.
+
+    Syntax
+    ------
+       [ ] = validate_file(name_file, chunk_size, errors)
+
+    Parameters
+    ----------
+       [in] name_file str Name of the CSV file.
+       [in] chunk_size Number of rows read at once.
+       [out] errors List where the malformed rows are reported.
+
+    Returns
+    -------
+       int Number of valid rows.
+
+    Example
+    -------
+       >>> validate_file("file.csv")
+    """
+    return sum(len(chunk) for chunk in read_pokemon_rows(name_file, chunk_size, errors))
+
+
+def iter_pokemons(name_file, chunk_size=10000, errors=None, registry=None,
+                  validate_first=False):
+    """Function to build the Pokemons of the CSV file of a coach lazily.
+
+    Each row is built with the class of its type. With validate_first the
+    whole file is validated before building the first Pokemon, so a wrong
+    row fails before any work is done.
+
+    Syntax
+    ------
+       [ ] = iter_pokemons(name_file, chunk_size, errors, registry,
+                           validate_first)
+
+    Parameters
+    ----------
+       [in] name_file str Name of the CSV file.
+       [in] chunk_size Number of rows read at once.
+       [out] errors List where the malformed rows are reported.
+       [in] registry IdRegistry where the IDs are registered.
+       [in] validate_first If True, the file is validated in a first pass.
+
+    Returns
+    -------
+       Generator of Pokemon.
+
+    Example
+    -------
+       >>> for pokemon in iter_pokemons("file.csv"):
+       ...     print(pokemon)
+    """
+    if validate_first:
+        validate_file(name_file, chunk_size, errors)
+        # The errors are already reported, so the second pass skips them.
+        if errors is not None:
+            errors = []
+    for chunk in read_pokemon_rows(name_file, chunk_size, errors):
+        for row in chunk:
+            yield row.pokemon_class(*row[:6], registry=registry)
+
+
+
+def main():
+    """Function main of the module.
+
+    The function main of this module is used to test the loader that is
+    described in this module.
+
+    Syntax
+    ------
+      [ ] = main()
+
+    Parameters
+    ----------
+      Null .
+
+    Returns
+    -------
+      Null .
+
+    Example
+    -------
+      >>> main()
+    """
+
+    name_file = os.path.join(tempfile.mkdtemp(), "coach.csv")
+    with open(name_file, 'w') as csvfile:
+        csvfile.write("11,Pikachu,headbutt,69,8,8,electricity\n"
+                      "12,Pidgey,sword,85,7,7,air\n"
+                      "\n"
+                      "13,Squirtle,elbow,74,7\n"
+                      "14,Diglett,punch,82,9,12,earth\n"
+                      "15,Venusaur,kick,seventy,8,6\n"
+                      "16,Charmeleon,elbow,88,9,7\n"
+                      "17,Psyduck,kick,80,9,7,water\n"
+                      "18,Onix,kick,80,9,7,rock\n")
+
+    print("=================================================================.")
+    print("Test Case 1: Read the rows in chunks.")
+    print("=================================================================.")
+    errors = []
+    chunks = list(read_pokemon_rows(name_file, 2, errors))
+
+    if [len(chunk) for chunk in chunks] == [2, 1] and chunks[0][1].pokemon_name == "Diglett":
+        print("Test PASS. The function read_pokemon_rows() has been implemented correctly.")
+    else:
+        print("Test FAIL. Check the function read_pokemon_rows()." + " RESULT: " + str(chunks))
+
+
+    print("=================================================================.")
+    print("Test Case 2: Report the malformed rows.")
+    print("=================================================================.")
+    if [error[0] for error in errors] == [2, 4, 6, 8, 9]:
+        print("Test PASS. The malformed rows have been reported.")
+    else:
+        print("Test FAIL. Check the function read_pokemon_rows()." + " RESULT: " + str(errors))
+
+    try:
+        list(read_pokemon_rows(name_file))
+        print("Test FAIL. A malformed row must raise a ValueError without errors.")
+    except ValueError:
+        print("Test PASS. A malformed row raises a ValueError without errors.")
+
+
+    print("=================================================================.")
+    print("Test Case 3: Build the Pokemons lazily.")
+    print("=================================================================.")
+    pokemons = iter_pokemons(name_file, errors=[])
+    pokemon = next(pokemons)
+
+    if str(pokemon) == "Pokemon ID 11 with name Pikachu has as weapon HEADBUTT and health 69":
+        print("Test PASS. The function iter_pokemons() has been implemented correctly.")
+    else:
+        print("Test FAIL. Check the function iter_pokemons()." + " RESULT: " + str(pokemon))
+    pokemons.close()
+
+
+    print("=================================================================.")
+    print("Test Case 4: Build each Pokemon with the class of its type.")
+    print("=================================================================.")
+    pokemons = list(iter_pokemons(name_file, errors=[], validate_first=True))
+
+    if [type(pokemon) for pokemon in pokemons] == [PokemonElectricity, PokemonEarth, Pokemon]:
+        print("Test PASS. The type column has been dispatched correctly.")
+    else:
+        print("Test FAIL. Check the table POKEMON_TYPES." + " RESULT: " + str(pokemons))
+
+    try:
+        next(iter_pokemons(name_file, validate_first=True))
+        print("Test FAIL. A wrong row must fail before building any Pokemon.")
+    except ValueError:
+        print("Test PASS. A wrong row fails before building any Pokemon.")
+    os.remove(name_file)
+
+
+
+# Checking whether this module is executed just itself alone.
+if __name__ == "__main__":
+    main()
+
+
+# EOF
@@ -0,0 +1,464 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+
+"""
+This Python module contains the search of the best selection of Pokemons.
+
+@contents :  This module contains an automated coach that selects the next
+             Pokemon of a battle with an expectimax search with alpha-beta
+             pruning, a transposition table and iterative deepening under a
+             time budget, and the test cases to probe its functionality.
+@project :  N/A
+@program :  N/A
+@file :  selection_search.py
+@author :  Antonio Artes Garcia (antonio.artesgarcia@ceu.es)
+           Francisco Hernando Gallego (francisco.hernandogallego@ceu.es)
+           Ruben Juarez Cadiz (ruben.juarezcadiz@ceu.es)
+
+@version :  0.0.1, 08 November 2021
+@information :  The Zen of Python
+                  https://www.python.org/dev/peps/pep-0020/
+                Style Guide for Python Code
+                  https://www.python.org/dev/peps/pep-0008/
+                Example NumPy Style Python Docstrings
+                  http://sphinxcontrib-napoleon.readthedocs.io/en/latest/example_numpy.html
+                doctest – Testing through documentation
+                  https://pymotw.com/2/doctest/
+
+@copyright :  Copyright 2021 GNU AFFERO GENERAL PUBLIC.
+              All rights are reserved. Reproduction in whole or in part is
+              prohibited without the written consent of the copyright owner.
+"""
+
+
+# Source packages.
+
+import random
+import time
+import battle
+import duel_markov
+from damage import hit_damage
+from id_registry import IdRegistry
+from pokemon import Pokemon
+from pokemon_air import PokemonAir
+from weapon_type import WeaponType
+
+
+# Kinds of the values kept in the transposition table.
+EXACT = 0
+LOWER = 1
+UPPER = 2
+
+# Depth of the values that do not depend on the heuristic.
+_SOLVED = 1 << 30
+
+
+class _Timeout(Exception):
+    """Exception raised when the time budget of a search is exhausted."""
+
+
+class SelectionSearch():
+    """Python class to implement a coach that searches the best selections.
+
+    This Python class selects the Pokemons of a coach by searching the tree
+    of the selections that are left. The coaches select in turns, the coach
+    1 maximizes and the coach 2 minimizes the value of the battle for the
+    coach 1 (1 for a win, 0.5 for a draw and 0 for a defeat), and every duel
+    is a chance node whose outcomes are the final healths computed by
+    duel_markov. The search uses alpha-beta pruning on the selections and
+    its bounded version on the duels, a transposition table keyed on the
+    undefeated Pokemons of each coach with their health and the Pokemons in
+    the fight, and iterative deepening on the number of selections: when the
+    time budget runs out, the selection of the deepest complete search is
+    returned. Below the depth reached, a state is valued by the share of
+    health times attack of each coach. The table is kept between the
+    selections of a battle.
+
+    An object of this class is a selection policy for battle.simulate() and
+    battle.Battle.run(). Used as a policy, the undefeated Pokemons of the
+    other coach are the Pokemons of its team with health left.
+
+    Syntax
+    ------
+      obj = SelectionSearch(team_1, team_2, time_budget, max_depth)
+
+    Parameters
+    ----------
+      [in] team_1 List of the Pokemons of the coach 1.
+      [in] team_2 List of the Pokemons of the coach 2.
+      [in] time_budget Seconds that a selection may take.
+      [in] max_depth Maximum number of selections searched ahead.
+
+    Returns
+    -------
+      obj Python object output parameter that represents an instance
+          of the class SelectionSearch.
+
+    Attributes
+    ----------
+
+    Example
+    -------
+      >>> search = SelectionSearch(coach_1, coach_2, time_budget=0.01)
+      >>> result = battle.simulate(coach_1, coach_2, search, battle.first_pokemon_policy)
+    """
+
+    def __init__(self, team_1, team_2, time_budget=0.05, max_depth=64):
+        self.__teams = (None, list(team_1), list(team_2))
+        self.__positions = (None,
+                            {id(pokemon): position for position, pokemon in enumerate(team_1)},
+                            {id(pokemon): position for position, pokemon in enumerate(team_2)})
+        self.__stats = (None,
+                        [(pokemon.get_attack_rating(), pokemon.get_defense_rating(),
+                          duel_markov.dodge_probability(pokemon)) for pokemon in team_1],
+                        [(pokemon.get_attack_rating(), pokemon.get_defense_rating(),
+                          duel_markov.dodge_probability(pokemon)) for pokemon in team_2])
+        # Damage of a hit of each Pokemon of a coach to each one of the other.
+        self.__damages = (None,
+                          [[hit_damage(pokemon_1, pokemon_2) for pokemon_2 in team_2] for pokemon_1 in team_1],
+                          [[hit_damage(pokemon_2, pokemon_1) for pokemon_1 in team_1] for pokemon_2 in team_2])
+        self.__time_budget = time_budget
+        self.__max_depth = max_depth
+        self.__table = {}
+        self.__deadline = None
+        self.__nodes = 0
+        self.__value = None
+        self.__depth = 0
+
+    def __call__(self, coach, list_of_pokemons, opponent):
+        other = 3 - coach
+        alive = {coach: list_of_pokemons,
+                 other: [pokemon for pokemon in self.__teams[other] if pokemon.is_alive()]}
+        fighters = {coach: None, other: opponent}
+        return self.choose(coach, alive[1], alive[2], fighters[1], fighters[2])
+
+    def get_value(self):
+        """Method to obtain the value for the coach 1 of the last selection."""
+        return self.__value
+
+    def get_depth(self):
+        """Method to obtain the depth of the last complete search."""
+        return self.__depth
+
+    def get_nodes(self):
+        return self.__nodes
+
+    def choose(self, coach, alive_1, alive_2, fighter_1, fighter_2):
+        """Method to select the best Pokemon for a coach.
+
+        Syntax
+        ------
+           [ ] = obj.choose(coach, alive_1, alive_2, fighter_1, fighter_2)
+
+        Parameters
+        ----------
+           [in] coach Number of the coach (1 or 2) that has to select.
+           [in] alive_N List of the undefeated Pokemons of the coach N.
+           [in] fighter_N Pokemon of the coach N in the fight, or None.
+
+        Returns
+        -------
+           Pokemon Pokemon selected for the next duel.
+        """
+        state = (self.__encode(1, alive_1), self.__encode(2, alive_2),
+                 -1 if fighter_1 is None else self.__positions[1][id(fighter_1)],
+                 -1 if fighter_2 is None else self.__positions[2][id(fighter_2)])
+        moves = self.__order_moves(coach, state, None)
+        best = moves[0]
+        self.__value = None
+        self.__depth = 0
+        self.__nodes = 0
+        self.__deadline = time.perf_counter() + self.__time_budget
+        try:
+            for depth in range(1, self.__max_depth + 1):
+                value, move, solved = self.__search_root(coach, state, moves, depth)
+                best = move
+                self.__value = value
+                self.__depth = depth
+                moves = [move] + [other for other in moves if other != move]
+                if solved:
+                    break
+        except _Timeout:
+            pass
+        finally:
+            self.__deadline = None
+        return self.__teams[coach][best]
+
+    def __encode(self, coach, pokemons):
+        positions = self.__positions[coach]
+        return tuple(sorted((positions[id(pokemon)], pokemon.get_health_points()) for pokemon in pokemons))
+
+    def __search_root(self, coach, state, moves, depth):
+        alpha = 0.0
+        beta = 1.0
+        best_value = None
+        best_move = moves[0]
+        solved = True
+        for move in moves:
+            child = self.__select(coach, state, move)
+            value, exact = self.__search(child, depth - 1, alpha, beta)
+            solved = solved and exact
+            if best_value is None or (value > best_value if coach == 1 else value < best_value):
+                best_value = value
+                best_move = move
+                if coach == 1:
+                    alpha = max(alpha, value)
+                else:
+                    beta = min(beta, value)
+        return best_value, best_move, solved
+
+    @staticmethod
+    def __select(coach, state, move):
+        if coach == 1:
+            return (state[0], state[1], move, state[3])
+        return (state[0], state[1], state[2], move)
+
+    def __order_moves(self, coach, state, first):
+        """Method to order the selections, the most promising first."""
+        alive = state[coach - 1]
+        opponent = state[4 - coach]
+        stats = self.__stats[coach]
+        if opponent >= 0:
+            # Hits needed to defeat the opponent minus hits it needs.
+            health = dict(state[2 - coach])[opponent]
+            damages = self.__damages[coach]
+            damages_opponent = self.__damages[3 - coach][opponent]
+            scores = {position: -(-health // max(damages[position][opponent], 1))
+                      - health_points / max(damages_opponent[position], 1)
+                      for position, health_points in alive}
+        else:
+            scores = {position: -health_points * stats[position][0] for position, health_points in alive}
+        moves = sorted(scores, key=scores.get)
+        if first is not None and first in scores:
+            moves.remove(first)
+            moves.insert(0, first)
+        return moves
+
+    def __heuristic(self, state):
+        strength_1 = sum(health_points * max(self.__stats[1][position][0], 1) for position, health_points in state[0])
+        strength_2 = sum(health_points * max(self.__stats[2][position][0], 1) for position, health_points in state[1])
+        return strength_1 / (strength_1 + strength_2)
+
+    def __search(self, state, depth, alpha, beta):
+        """Method to value a state for the coach 1. Returns (value, exact)."""
+        alive_1, alive_2, fighter_1, fighter_2 = state
+        if not alive_1 or not alive_2:
+            return (1.0 if alive_1 else 0.5 if not alive_2 else 0.0), True
+        if fighter_1 >= 0 and fighter_2 >= 0:
+            return self.__duel(state, depth, alpha, beta)
+
+        self.__nodes += 1
+        if self.__nodes & 255 == 0 and time.perf_counter() > self.__deadline:
+            raise _Timeout()
+
+        entry = self.__table.get(state)
+        first = None
+        if entry is not None:
+            value, kind, entry_depth, first = entry
+            if entry_depth >= depth:
+                if kind == EXACT:
+                    return value, entry_depth == _SOLVED
+                if kind == LOWER and value >= beta:
+                    return value, entry_depth == _SOLVED
+                if kind == UPPER and value <= alpha:
+                    return value, entry_depth == _SOLVED
+        if depth <= 0:
+            return self.__heuristic(state), False
+
+        coach = 1 if fighter_1 < 0 else 2
+        original_alpha = alpha
+        original_beta = beta
+        best_value = None
+        best_move = None
+        exact = True
+        for move in self.__order_moves(coach, state, first):
+            value, child_exact = self.__search(self.__select(coach, state, move), depth - 1, alpha, beta)
+            exact = exact and child_exact
+            if best_value is None or (value > best_value if coach == 1 else value < best_value):
+                best_value = value
+                best_move = move
+            if coach == 1:
+                alpha = max(alpha, value)
+            else:
+                beta = min(beta, value)
+            if alpha >= beta:
+                break
+
+        if best_value <= original_alpha:
+            kind = UPPER
+        elif best_value >= original_beta:
+            kind = LOWER
+        else:
+            kind = EXACT
+        self.__table[state] = (best_value, kind, _SOLVED if exact else depth, best_move)
+        return best_value, exact
+
+    def __duel(self, state, depth, alpha, beta):
+        """Method to value a duel as a chance node with bounded pruning."""
+        alive_1, alive_2, fighter_1, fighter_2 = state
+        health_1 = dict(alive_1)[fighter_1]
+        health_2 = dict(alive_2)[fighter_2]
+        dodge_1 = self.__stats[1][fighter_1][2]
+        dodge_2 = self.__stats[2][fighter_2][2]
+        outcomes = duel_markov.solve_duel_stats(health_1, self.__damages[1][fighter_1][fighter_2], dodge_1,
+                                                health_2, self.__damages[2][fighter_2][fighter_1], dodge_2).outcomes
+
+        total = 0.0
+        remaining = 1.0
+        exact = True
+        for (final_1, final_2), probability in sorted(outcomes, key=lambda outcome: -outcome[1]):
+            remaining -= probability
+            defeated_1 = final_1 <= 0
+            defeated_2 = final_2 <= 0
+            if defeated_1 == defeated_2:
+                child = (_remove(alive_1, fighter_1), _remove(alive_2, fighter_2), -1, -1)
+            elif defeated_2:
+                child = (_replace(alive_1, fighter_1, final_1), _remove(alive_2, fighter_2), fighter_1, -1)
+            else:
+                child = (_remove(alive_1, fighter_1), _replace(alive_2, fighter_2, final_2), -1, fighter_2)
+            child_alpha = max(0.0, (alpha - total - remaining) / probability)
+            child_beta = min(1.0, (beta - total) / probability)
+            value, child_exact = self.__search(child, depth, child_alpha, child_beta)
+            exact = exact and child_exact
+            total += probability * value
+            if total + max(remaining, 0.0) <= alpha:
+                return total + max(remaining, 0.0), exact
+            if total >= beta:
+                return total, exact
+        return total, exact
+
+
+def _remove(alive, position):
+    return tuple(pokemon for pokemon in alive if pokemon[0] != position)
+
+
+def _replace(alive, position, health_points):
+    return tuple((pokemon[0], health_points) if pokemon[0] == position else pokemon for pokemon in alive)
+
+
+
+def main():
+    """Function main of the module.
+
+    The function main of this module is used to test the search that is
+    described in this module.
+
+    Syntax
+    ------
+      [ ] = main()
+
+    Parameters
+    ----------
+      Null .
+
+    Returns
+    -------
+      Null .
+
+    Example
+    -------
+      >>> main()
+    """
+
+    def reference(team_1, team_2, state):
+        """Exhaustive expectimax without pruning nor table."""
+        alive_1, alive_2, fighter_1, fighter_2 = state
+        if not alive_1 or not alive_2:
+            return 1.0 if alive_1 else 0.5 if not alive_2 else 0.0
+        if fighter_1 < 0:
+            return max(reference(team_1, team_2, (alive_1, alive_2, position, fighter_2))
+                       for position, _ in alive_1)
+        if fighter_2 < 0:
+            return min(reference(team_1, team_2, (alive_1, alive_2, fighter_1, position))
+                       for position, _ in alive_2)
+        pokemon_1 = team_1[fighter_1]
+        pokemon_2 = team_2[fighter_2]
+        outcomes = duel_markov.solve_duel_stats(dict(alive_1)[fighter_1], hit_damage(pokemon_1, pokemon_2),
+                                                duel_markov.dodge_probability(pokemon_1),
+                                                dict(alive_2)[fighter_2], hit_damage(pokemon_2, pokemon_1),
+                                                duel_markov.dodge_probability(pokemon_2)).outcomes
+        value = 0.0
+        for (final_1, final_2), probability in outcomes:
+            if (final_1 <= 0) == (final_2 <= 0):
+                child = (_remove(alive_1, fighter_1), _remove(alive_2, fighter_2), -1, -1)
+            elif final_2 <= 0:
+                child = (_replace(alive_1, fighter_1, final_1), _remove(alive_2, fighter_2), fighter_1, -1)
+            else:
+                child = (_remove(alive_1, fighter_1), _replace(alive_2, fighter_2, final_2), -1, fighter_2)
+            value += probability * reference(team_1, team_2, child)
+        return value
+
+    def random_team(generator, registry, first_id, size):
+        classes = (Pokemon, Pokemon, PokemonAir)
+        return [classes[generator.randrange(3)](first_id + index, "Pokemon", WeaponType.KICK,
+                                                generator.randint(10, 40), generator.randint(4, 12),
+                                                generator.randint(1, 8), registry=registry)
+                for index in range(size)]
+
+    registry = IdRegistry()
+    generator = random.Random(5)
+
+    print("=================================================================.")
+    print("Test Case 1: The search finds the value of the exhaustive search.")
+    print("=================================================================.")
+    errors = []
+    for _ in range(5):
+        team_1 = random_team(generator, registry, 1, 3)
+        team_2 = random_team(generator, registry, 11, 3)
+        state = (tuple((position, pokemon.get_health_points()) for position, pokemon in enumerate(team_1)),
+                 tuple((position, pokemon.get_health_points()) for position, pokemon in enumerate(team_2)),
+                 -1, -1)
+        search = SelectionSearch(team_1, team_2, time_budget=10.0)
+        search.choose(1, team_1, team_2, None, None)
+        errors.append(abs(search.get_value() - reference(team_1, team_2, state)))
+
+    if max(errors) < 1e-9:
+        print("Test PASS. The class SelectionSearch has been implemented correctly.")
+    else:
+        print("Test FAIL. Check the class SelectionSearch()." + " RESULT: " + str(errors))
+
+
+    print("=================================================================.")
+    print("Test Case 2: Select for teams of 6 Pokemons in a time budget.")
+    print("=================================================================.")
+    team_1 = random_team(generator, registry, 21, 6)
+    team_2 = random_team(generator, registry, 31, 6)
+    search = SelectionSearch(team_1, team_2, time_budget=0.02)
+    start = time.perf_counter()
+    search(1, team_1, None)
+    elapsed = time.perf_counter() - start
+
+    if elapsed < 0.1 and search.get_depth() >= 1:
+        print("Test PASS. The selection took " + str(round(elapsed * 1000, 1)) + " ms and searched "
+              + str(search.get_depth()) + " selections ahead.")
+    else:
+        print("Test FAIL. The selection took " + str(round(elapsed * 1000, 1)) + " ms.")
+
+
+    print("=================================================================.")
+    print("Test Case 3: The search beats a coach that sends its first Pokemon.")
+    print("=================================================================.")
+    score = 0.0
+    battles = 20
+    for seed in range(battles):
+        result = battle.simulate(team_1, team_2, SelectionSearch(team_1, team_2, time_budget=0.005),
+                                 battle.first_pokemon_policy, rng=random.Random(seed))
+        score += 1.0 if result.winner == 1 else 0.5 if result.winner == 0 else 0.0
+        result = battle.simulate(team_1, team_2, battle.first_pokemon_policy,
+                                 SelectionSearch(team_1, team_2, time_budget=0.005), rng=random.Random(seed))
+        score += 1.0 if result.winner == 2 else 0.5 if result.winner == 0 else 0.0
+
+    if score / (2 * battles) >= 0.5:
+        print("Test PASS. The search scored " + str(score) + " of " + str(2 * battles) + ".")
+    else:
+        print("Test FAIL. The search scored " + str(score) + " of " + str(2 * battles) + ".")
+
+
+
+# Checking whether this module is executed just itself alone.
+if __name__ == "__main__":
+    main()
+
+
+# EOF
@@ -0,0 +1,650 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+
+"""
+This Python module contains the tournament runner of the Game.
+
+@contents :  This module contains the round-robin and Swiss tournaments between
+             the rosters of several coaches, played in parallel on a pool of
+             processes, and the test cases to probe its functionality.
+@project :  N/A
+@program :  N/A
+@file :  tournament.py
+@author :  Antonio Artes Garcia (antonio.artesgarcia@ceu.es)
+           Francisco Hernando Gallego (francisco.hernandogallego@ceu.es)
+           Ruben Juarez Cadiz (ruben.juarezcadiz@ceu.es)
+
+@version :  0.0.1, 08 November 2021
+@information :  The Zen of Python
+                  https://www.python.org/dev/peps/pep-0020/
+                Style Guide for Python Code
+                  https://www.python.org/dev/peps/pep-0008/
+                Example NumPy Style Python Docstrings
+                  http://sphinxcontrib-napoleon.readthedocs.io/en/latest/example_numpy.html
+                doctest – Testing through documentation
+                  https://pymotw.com/2/doctest/
+
+@copyright :  Copyright 2021 GNU AFFERO GENERAL PUBLIC.
+              All rights are reserved. Reproduction in whole or in part is
+              prohibited without the written consent of the copyright owner.
+"""
+
+
+# Source packages.
+
+import argparse
+import collections
+import concurrent.futures
+import contextlib
+import json
+import os
+import random
+import sys
+import tempfile
+import battle
+from damage import get_named_damage_model, set_damage_model
+from main import get_data_from_user
+from profiling import Profiler, get_enabled_profiler
+from result_store import ResultStore
+
+
+# Result of a tournament. The field table maps the name of each roster file to
+# its [wins, losses, draws] and matchups holds one tuple
+# (name_file_1, name_file_2, game, winner, rounds) per battle that was played.
+TournamentResult = collections.namedtuple('TournamentResult', ['table', 'matchups'])
+
+
+# Rosters loaded by each process of the pool.
+_rosters = []
+
+# Profiler of each process of the pool, if the tournament is profiled.
+_profiler = None
+
+
+def _init_worker(name_files, damage_model, profile=False):
+    """Function to load the rosters and set the model of damage once in each process of the pool.
+
+    If profile is True, the process is profiled from the loading of the
+    rosters on.
+    """
+    global _rosters, _profiler
+    # A process forked from a profiled one inherits its instrumented methods.
+    inherited = get_enabled_profiler()
+    if inherited is not None:
+        inherited.disable()
+    if profile:
+        _profiler = Profiler()
+        _profiler.enable()
+    set_damage_model(get_named_damage_model(damage_model))
+    _rosters = [get_data_from_user(name_file) for name_file in name_files]
+
+
+def _play_matchups(jobs):
+    """Function to play a shard of matchups in a process of the pool.
+
+    Each matchup draws its random numbers from a random.Random of its own
+    seed, so the dodges of PokemonAir and the double hits of PokemonElectricity
+    only depend on the seed of the matchup and not on the process or the
+    shard that plays it. If the process is profiled, the counters of the
+    shard are returned with its results and cleared.
+    """
+    results = []
+    for index_1, index_2, game, seed, policy in jobs:
+        result = battle.simulate(_rosters[index_1], _rosters[index_2], policy,
+                                 rng=random.Random(seed))
+        results.append((index_1, index_2, game, result.winner, result.rounds, result.duels))
+    if _profiler is None:
+        return results, None
+    counters = _profiler.get_counters()
+    _profiler.reset()
+    return results, counters
+
+
+def matchup_seed(master_seed, index_1, index_2, game):
+    """Function to derive the seed of a matchup from the master seed.
+
+    Syntax
+    ------
+       [ ] = matchup_seed(master_seed, index_1, index_2, game)
+
+    Parameters
+    ----------
+       [in] master_seed Seed of the whole tournament.
+       [in] index_1 Index of the roster of the coach 1.
+       [in] index_2 Index of the roster of the coach 2.
+       [in] game Number of the game between both rosters.
+
+    Returns
+    -------
+       int Seed of 64 bits of the matchup.
+
+    Example
+    -------
+       >>> matchup_seed(2021, 0, 1, 0)
+    """
+    key = '%d:%d:%d:%d' % (master_seed, index_1, index_2, game)
+    return random.Random(key).getrandbits(64)
+
+
+class TournamentJournal():
+    """Python class to implement the checkpoints of a tournament.
+
+    This Python class keeps the progress of a tournament in a journal file
+    that only grows. The first line describes the tournament: its kind, its
+    rosters, its parameters and its master seed, from which the seed of the
+    random numbers of every matchup is derived. Each following line is the
+    delta of a shard of matchups, with the tuple (index_1, index_2, game,
+    winner, rounds) of each one, written with a single write() and synced
+    to the disk, so a checkpoint costs the size of the shard and not of the
+    whole tournament. A line cut by a crash is discarded when the journal
+    is opened again, and the finished matchups are skipped on resume.
+
+    Syntax
+    ------
+      obj = TournamentJournal(name_file, header)
+
+    Parameters
+    ----------
+      [in] name_file Name of the journal file. It is created if it does not
+                     exist.
+      [in] header Dictionary that describes the tournament. It must be the
+                  same as that of an existing journal.
+
+    Returns
+    -------
+      obj Python object output parameter that represents an instance
+          of the class TournamentJournal.
+
+    Attributes
+    ----------
+
+    Example
+    -------
+      >>> journal = TournamentJournal('tournament.journal', header)
+      >>> finished = journal.get_finished()
+    """
+
+    def __init__(self, name_file, header):
+        self.__finished = {}
+        if os.path.exists(name_file):
+            with open(name_file, 'rb') as journal_file:
+                data = journal_file.read()
+            # Only the lines ended by a newline were fully written.
+            complete = data[:data.rfind(b'\n') + 1]
+            lines = complete.decode('utf-8').splitlines()
+            if not lines or json.loads(lines[0]) != header:
+                raise ValueError('El fichero ' + name_file + ' es de otro torneo')
+            for line in lines[1:]:
+                for index_1, index_2, game, winner, rounds in json.loads(line):
+                    self.__finished[(index_1, index_2, game)] = (index_1, index_2, game, winner, rounds, None)
+            if len(complete) < len(data):
+                with open(name_file, 'r+b') as journal_file:
+                    journal_file.truncate(len(complete))
+        else:
+            # The header is written at once, so the journal always has one.
+            temporary_file = name_file + '.tmp'
+            with open(temporary_file, 'w') as journal_file:
+                journal_file.write(json.dumps(header) + '\n')
+                journal_file.flush()
+                os.fsync(journal_file.fileno())
+            os.replace(temporary_file, name_file)
+        self.__file = open(name_file, 'a')
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+        return False
+
+    def close(self):
+        self.__file.close()
+
+    def get_finished(self):
+        """Method to obtain the finished matchups keyed by (index_1, index_2, game).
+
+        Their duels are None, because the journal does not keep them.
+        """
+        return self.__finished
+
+    def append(self, results):
+        """Method to add the results of a shard of matchups to the journal."""
+        if results:
+            self.__file.write(json.dumps([list(result[:5]) for result in results]) + '\n')
+            self.__file.flush()
+            os.fsync(self.__file.fileno())
+            for result in results:
+                self.__finished[tuple(result[:3])] = result
+
+
+def _open_journal(checkpoint_file, header):
+    """Function to open the journal of a tournament, if there is one."""
+    if checkpoint_file is None:
+        return contextlib.nullcontext()
+    return TournamentJournal(checkpoint_file, header)
+
+
+def _run_matchups(executor, jobs, chunk_size, journal=None, profiler=None):
+    """Function to shard the matchups among the processes of the pool.
+
+    With a journal, the finished matchups are not played again, the results
+    of each shard are added to the journal as soon as it ends, and the
+    results are returned in the order of the jobs. With a profiler, the
+    counters of each shard are added to it.
+    """
+    finished = {} if journal is None else journal.get_finished()
+    pending = [job for job in jobs if tuple(job[:3]) not in finished]
+    shards = [pending[i:i + chunk_size] for i in range(0, len(pending), chunk_size)]
+    results = []
+    for shard_results, counters in executor.map(_play_matchups, shards):
+        if profiler is not None:
+            profiler.add_counters(counters)
+        if journal is not None:
+            journal.append(shard_results)
+        results.extend(shard_results)
+    if journal is None:
+        return results
+    return [finished[tuple(job[:3])] for job in jobs]
+
+
+def _merge_results(table, matchups, name_files, results, store=None):
+    """Function to merge the results of the matchups in the win/loss table.
+
+    The battles are also added to the ResultStore store if it is given,
+    except those read from a journal, which were played before.
+    """
+    for index_1, index_2, game, winner, rounds, duels in results:
+        if store is not None and duels is not None:
+            store.add_battle(name_files[index_1], name_files[index_2], winner, rounds, duels)
+        if winner == 1:
+            table[name_files[index_1]][0] += 1
+            table[name_files[index_2]][1] += 1
+        elif winner == 2:
+            table[name_files[index_1]][1] += 1
+            table[name_files[index_2]][0] += 1
+        else:
+            table[name_files[index_1]][2] += 1
+            table[name_files[index_2]][2] += 1
+        matchups.append((name_files[index_1], name_files[index_2], game, winner, rounds))
+
+
+def _add_pokemons(store, name_files):
+    """Function to store the Pokemons of the rosters in the ResultStore."""
+    if store is not None:
+        for name_file in name_files:
+            store.add_pokemons(get_data_from_user(name_file))
+
+
+def round_robin(name_files, games_per_pair=1, master_seed=0,
+                policy=battle.first_pokemon_policy, max_workers=None,
+                chunk_size=64, store=None, checkpoint_file=None, damage_model='classic',
+                profiler=None):
+    """Function to play a round-robin tournament between several rosters.
+
+    Every roster plays games_per_pair battles against every other roster. The
+    coach that selects first alternates between games.
+
+    Syntax
+    ------
+       [ ] = round_robin(name_files, games_per_pair, master_seed, policy,
+                         max_workers, chunk_size, store, checkpoint_file,
+                         damage_model, profiler)
+
+    Parameters
+    ----------
+       [in] name_files List of the CSV files with the roster of each coach.
+       [in] games_per_pair Number of battles between each pair of rosters.
+       [in] master_seed Seed of the whole tournament.
+       [in] policy Selection policy of every coach. It must be a function of
+                   a module so it can be sent to the pool.
+       [in] max_workers Number of processes of the pool. By default one per
+                        core.
+       [in] chunk_size Number of matchups sent at once to a process.
+       [in] store ResultStore where the Pokemons and the battles are
+                  stored. By default they are not stored.
+       [in] checkpoint_file Name of the TournamentJournal where the
+                            progress is kept. If it exists, the tournament
+                            is resumed and only the unfinished matchups are
+                            played. By default there are no checkpoints.
+       [in] damage_model Name of the model of damage of the battles in
+                         damage.DAMAGE_MODELS.
+       [in] profiler Profiler where the counters of the processes of the
+                     pool are added. By default the pool is not profiled.
+
+    Returns
+    -------
+       TournamentResult Result of the tournament.
+
+    Example
+    -------
+       >>> result = round_robin(['coach_1_pokemons.csv', 'coach_2_pokemons.csv'])
+    """
+    get_named_damage_model(damage_model)
+    jobs = []
+    for index_1 in range(len(name_files)):
+        for index_2 in range(index_1 + 1, len(name_files)):
+            for game in range(games_per_pair):
+                if game % 2 == 0:
+                    pair = (index_1, index_2)
+                else:
+                    pair = (index_2, index_1)
+                seed = matchup_seed(master_seed, pair[0], pair[1], game)
+                jobs.append((pair[0], pair[1], game, seed, policy))
+
+    table = {name_file: [0, 0, 0] for name_file in name_files}
+    matchups = []
+    header = {'tournament': 'round_robin', 'name_files': list(name_files), 'games_per_pair': games_per_pair,
+              'master_seed': master_seed, 'policy': policy.__module__ + '.' + policy.__qualname__,
+              'damage_model': damage_model}
+    with _open_journal(checkpoint_file, header) as journal, concurrent.futures.ProcessPoolExecutor(
+            max_workers, initializer=_init_worker, initargs=(name_files, damage_model, profiler is not None)) as executor:
+        results = _run_matchups(executor, jobs, chunk_size, journal, profiler)
+    _add_pokemons(store, name_files)
+    _merge_results(table, matchups, name_files, results, store)
+    return TournamentResult(table, matchups)
+
+
+def swiss(name_files, number_of_rounds, master_seed=0,
+          policy=battle.first_pokemon_policy, max_workers=None, chunk_size=64,
+          store=None, checkpoint_file=None, damage_model='classic', profiler=None):
+    """Function to play a Swiss tournament between several rosters.
+
+    In each round the rosters are sorted by score (one point per win and half
+    a point per draw) and paired in order, avoiding rematches when possible.
+    With an odd number of rosters the last one without a bye gets a bye,
+    which counts as a win. The battles of a round are played in parallel.
+
+    Syntax
+    ------
+       [ ] = swiss(name_files, number_of_rounds, master_seed, policy,
+                   max_workers, chunk_size, store, checkpoint_file,
+                   damage_model, profiler)
+
+    Parameters
+    ----------
+       [in] name_files List of the CSV files with the roster of each coach.
+       [in] number_of_rounds Number of rounds of the tournament.
+       [in] master_seed Seed of the whole tournament.
+       [in] policy Selection policy of every coach. It must be a function of
+                   a module so it can be sent to the pool.
+       [in] max_workers Number of processes of the pool. By default one per
+                        core.
+       [in] chunk_size Number of matchups sent at once to a process.
+       [in] store ResultStore where the Pokemons and the battles are
+                  stored. By default they are not stored.
+       [in] checkpoint_file Name of the TournamentJournal where the
+                            progress is kept. If it exists, the tournament
+                            is resumed and only the unfinished matchups are
+                            played. By default there are no checkpoints.
+       [in] damage_model Name of the model of damage of the battles in
+                         damage.DAMAGE_MODELS.
+       [in] profiler Profiler where the counters of the processes of the
+                     pool are added. By default the pool is not profiled.
+
+    Returns
+    -------
+       TournamentResult Result of the tournament.
+
+    Example
+    -------
+       >>> result = swiss(list_of_name_files, 5)
+    """
+    get_named_damage_model(damage_model)
+    table = {name_file: [0, 0, 0] for name_file in name_files}
+    matchups = []
+    played = set()
+    byes = set()
+    _add_pokemons(store, name_files)
+
+    # The pairings of a round only depend on the results of the previous
+    # ones, so on resume they are computed again from the journal.
+    header = {'tournament': 'swiss', 'name_files': list(name_files), 'number_of_rounds': number_of_rounds,
+              'master_seed': master_seed, 'policy': policy.__module__ + '.' + policy.__qualname__,
+              'damage_model': damage_model}
+    with _open_journal(checkpoint_file, header) as journal, concurrent.futures.ProcessPoolExecutor(
+            max_workers, initializer=_init_worker, initargs=(name_files, damage_model, profiler is not None)) as executor:
+        for game in range(number_of_rounds):
+            standings = sorted(
+                range(len(name_files)),
+                key=lambda index: (-(table[name_files[index]][0] + 0.5 * table[name_files[index]][2]), index))
+
+            if len(standings) % 2 == 1:
+                bye = next((index for index in reversed(standings) if index not in byes),
+                           standings[-1])
+                byes.add(bye)
+                standings.remove(bye)
+                table[name_files[bye]][0] += 1
+
+            jobs = []
+            while standings:
+                index_1 = standings.pop(0)
+                position = next((i for i, index_2 in enumerate(standings)
+                                 if (min(index_1, index_2), max(index_1, index_2)) not in played), 0)
+                index_2 = standings.pop(position)
+                played.add((min(index_1, index_2), max(index_1, index_2)))
+                seed = matchup_seed(master_seed, index_1, index_2, game)
+                jobs.append((index_1, index_2, game, seed, policy))
+
+            _merge_results(table, matchups, name_files,
+                           _run_matchups(executor, jobs, chunk_size, journal, profiler), store)
+
+    return TournamentResult(table, matchups)
+
+
+def run(arguments=None):
+    """Function to play a tournament from the command line.
+
+    A round-robin tournament is played, or a Swiss one with --rounds, and
+    its table is printed. With --profile, the processes of the pool are
+    profiled and their counters are written in a Prometheus text file if
+    its name ends in .prom, or in a JSON file otherwise.
+
+    Syntax
+    ------
+       [ ] = run(arguments)
+
+    Parameters
+    ----------
+       [in] arguments List of the arguments of the command line.
+
+    Returns
+    -------
+       int Exit status.
+
+    Example
+    -------
+       >>> run(['coach_1_pokemons.csv', 'coach_2_pokemons.csv', '--profile', 'tournament.prom'])
+    """
+    parser = argparse.ArgumentParser(description='Tournaments of the Game.')
+    parser.add_argument('name_files', nargs='+', help='CSV files with the roster of each coach')
+    parser.add_argument('--games', type=int, default=1, help='battles between each pair of rosters')
+    parser.add_argument('--rounds', type=int, help='play a Swiss tournament of this number of rounds')
+    parser.add_argument('--seed', type=int, default=0, help='master seed of the tournament')
+    parser.add_argument('--workers', type=int, help='number of processes of the pool')
+    parser.add_argument('--damage-model', default='classic', help='name of the model of damage')
+    parser.add_argument('--profile', help='file where the profile of the pool is written')
+    options = parser.parse_args(arguments)
+
+    profiler = None if options.profile is None else Profiler()
+    if options.rounds is None:
+        result = round_robin(options.name_files, options.games, options.seed, max_workers=options.workers,
+                             damage_model=options.damage_model, profiler=profiler)
+    else:
+        result = swiss(options.name_files, options.rounds, options.seed, max_workers=options.workers,
+                       damage_model=options.damage_model, profiler=profiler)
+    for name_file, (wins, losses, draws) in sorted(result.table.items(), key=lambda item: -item[1][0]):
+        print('%s: %d wins, %d losses, %d draws' % (name_file, wins, losses, draws))
+    if profiler is not None:
+        profiler.write(options.profile)
+    return 0
+
+
+
+def main():
+    """Function main of the module.
+
+    The function main of this module is used to test the tournaments that are
+    described in this module.
+
+    Syntax
+    ------
+      [ ] = main()
+
+    Parameters
+    ----------
+      Null .
+
+    Returns
+    -------
+      Null .
+
+    Example
+    -------
+      >>> main()
+    """
+
+    name_files = ['coach_1_pokemons.csv', 'coach_2_pokemons.csv']
+
+    print("=================================================================.")
+    print("Test Case 1: Play a round-robin tournament.")
+    print("=================================================================.")
+    result = round_robin(name_files, games_per_pair=4, master_seed=2021, max_workers=2)
+
+    if len(result.matchups) == 4 and sum(sum(row) for row in result.table.values()) == 8:
+        print("Test PASS. The function round_robin() has been implemented correctly.")
+    else:
+        print("Test FAIL. Check the function round_robin()." + " RESULT: " + str(result.table))
+
+
+    print("=================================================================.")
+    print("Test Case 2: The tournament is reproducible with the same seed.")
+    print("=================================================================.")
+    other_result = round_robin(name_files, games_per_pair=4, master_seed=2021,
+                               max_workers=1, chunk_size=1)
+
+    if other_result == result:
+        print("Test PASS. The results do not depend on the pool of processes.")
+    else:
+        print("Test FAIL. Check the function matchup_seed().")
+
+
+    print("=================================================================.")
+    print("Test Case 3: Play a Swiss tournament.")
+    print("=================================================================.")
+    result = swiss(name_files, 3, master_seed=2021, max_workers=2)
+
+    if len(result.matchups) == 3:
+        print("Test PASS. The function swiss() has been implemented correctly.")
+    else:
+        print("Test FAIL. Check the function swiss()." + " RESULT: " + str(result.matchups))
+
+
+    print("=================================================================.")
+    print("Test Case 4: Store the battles of a tournament.")
+    print("=================================================================.")
+    with tempfile.TemporaryDirectory() as directory:
+        with ResultStore(os.path.join(directory, 'results.sqlite3')) as store:
+            result = round_robin(name_files, games_per_pair=4, master_seed=2021, max_workers=1, store=store)
+            count = store.get_battle_count()
+            by_coach = {row.key: tuple(row[1:4]) for row in store.win_rate_by_coach()}
+            by_name = store.win_rate_by_pokemon_name()
+
+    if (count == 4 and all(by_coach[name_file] == tuple(result.table[name_file]) for name_file in name_files)
+            and sum(row.wins + row.losses + row.draws for row in by_name) > 0):
+        print("Test PASS. The battles have been stored in the ResultStore.")
+    else:
+        print("Test FAIL. Check the function _merge_results()." + " RESULT: " + str(by_coach))
+
+
+    print("=================================================================.")
+    print("Test Case 5: Resume a tournament from its checkpoints.")
+    print("=================================================================.")
+    expected_round_robin = round_robin(name_files, games_per_pair=6, master_seed=7, max_workers=1)
+    expected_swiss = swiss(name_files, 3, master_seed=7, max_workers=1)
+    with tempfile.TemporaryDirectory() as directory:
+        checks = []
+        for name, play, expected, deltas in (
+                ('round_robin', lambda checkpoint_file: round_robin(
+                    name_files, games_per_pair=6, master_seed=7, max_workers=1, chunk_size=1,
+                    checkpoint_file=checkpoint_file), expected_round_robin, 6),
+                ('swiss', lambda checkpoint_file: swiss(
+                    name_files, 3, master_seed=7, max_workers=1, chunk_size=1,
+                    checkpoint_file=checkpoint_file), expected_swiss, 3)):
+            checkpoint_file = os.path.join(directory, name + '.journal')
+            play(checkpoint_file)
+
+            # The process dies in the middle of the third delta.
+            with open(checkpoint_file) as journal_file:
+                lines = journal_file.readlines()
+            with open(checkpoint_file, 'w') as journal_file:
+                journal_file.write(''.join(lines[:3]) + lines[3][:5])
+            resumed = play(checkpoint_file)
+            with open(checkpoint_file) as journal_file:
+                resumed_lines = journal_file.readlines()
+
+            # A finished tournament plays nothing again.
+            size = os.path.getsize(checkpoint_file)
+            finished = play(checkpoint_file)
+            checks.append(resumed == finished == expected and resumed_lines == lines
+                          and len(lines) == deltas + 1 and os.path.getsize(checkpoint_file) == size)
+
+        try:
+            round_robin(name_files, games_per_pair=6, master_seed=8, max_workers=1,
+                        checkpoint_file=os.path.join(directory, 'round_robin.journal'))
+            checks.append(False)
+        except ValueError:
+            checks.append(True)
+
+    if all(checks):
+        print("Test PASS. The tournaments have been resumed from their checkpoints.")
+    else:
+        print("Test FAIL. Check the class TournamentJournal()." + " RESULT: " + str(checks))
+
+
+    print("=================================================================.")
+    print("Test Case 6: Play a tournament with another model of damage.")
+    print("=================================================================.")
+    import damage
+    result = round_robin(name_files, games_per_pair=4, master_seed=2021, max_workers=1,
+                         damage_model='weapon')
+    with damage.use_damage_model(damage.WEAPON_DAMAGE):
+        rosters = [get_data_from_user(name_file) for name_file in name_files]
+        expected = [battle.simulate(rosters[index_1], rosters[index_2],
+                                    rng=random.Random(matchup_seed(2021, index_1, index_2, game))).rounds
+                    for index_1, index_2, game in ((0, 1, 0), (1, 0, 1), (0, 1, 2), (1, 0, 3))]
+
+    if [matchup[4] for matchup in result.matchups] == expected:
+        print("Test PASS. The parameter damage_model has been sent to the pool.")
+    else:
+        print("Test FAIL. Check the function _init_worker()." + " RESULT: " + str(result.matchups))
+
+
+    print("=================================================================.")
+    print("Test Case 7: Profile the processes of the pool.")
+    print("=================================================================.")
+    profiler = Profiler()
+    with profiler:
+        # The processes forked from a profiled one are profiled on their own.
+        result = round_robin(name_files, games_per_pair=4, master_seed=2021, max_workers=2,
+                             chunk_size=1, profiler=profiler)
+    expected = round_robin(name_files, games_per_pair=4, master_seed=2021, max_workers=2)
+
+    if (result == expected and profiler.get_rounds().get_count() == 4
+            and profiler.get_rounds().get_sum() == sum(matchup[4] for matchup in result.matchups)
+            and profiler.get_calls('fight_attack') > 0 and profiler.get_seconds()['io'] > 0):
+        print("Test PASS. The counters of the pool have been added to the profiler.")
+    else:
+        print("Test FAIL. Check the function _play_matchups()." + " RESULT: " + str(profiler.to_json()))
+
+
+
+# Checking whether this module is executed just itself alone.
+if __name__ == "__main__":
+    if len(sys.argv) > 1:
+        sys.exit(run(sys.argv[1:]))
+    else:
+        main()
+
+
+# EOF